@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Single-document chat transcript for AxonOS Assistant
+
+The whole conversation is one WebKit2.WebView. The document and its stylesheet
+are loaded once; each message is a DOM node appended, replaced or streamed
+into through small JavaScript calls, addressed by a message id. A message
+costs a few KB of DOM instead of a web view, a web process share, a copy of
+the CSS and a height round trip of its own.
+
+Bubble HTML is memoized by (message hash, sender, theme version), so
+re-showing a message that has not changed (scroll-back, placeholders, the
+welcome message after a reset) skips the markdown pass. A theme change swaps
+the single shared stylesheet and leaves the rendered messages alone.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gdk, WebKit2
+
+logger = logging.getLogger(__name__)
+
+# Distance from the bottom (px) within which the view keeps following new content
+FOLLOW_THRESHOLD = 48
+# Link at the top of the transcript; its navigation is intercepted by the window
+LOAD_EARLIER_URI = "axonos:load-earlier"
+
+TRANSCRIPT_SCRIPT = """
+function followBottom() {
+    return window.innerHeight + window.scrollY >= document.body.scrollHeight - %(follow)d;
+}
+function scrollToBottom() {
+    window.scrollTo(0, document.body.scrollHeight);
+}
+function setStylesheet(css) {
+    document.getElementById("transcript-style").textContent = css;
+}
+function appendMessage(id, html) {
+    var node = document.createElement("div");
+    node.id = id;
+    node.className = "message";
+    node.innerHTML = html;
+    document.getElementById("transcript").appendChild(node);
+    scrollToBottom();
+}
+function updateMessage(id, html) {
+    var node = document.getElementById(id);
+    if (!node) return;
+    var follow = followBottom();
+    node.innerHTML = html;
+    if (follow) scrollToBottom();
+}
+function streamMessage(id, doneHtml, tailHtml) {
+    var text = document.querySelector("#" + id + " .text");
+    if (!text) return;
+    var follow = followBottom();
+    if (!text.querySelector(".md-tail")) {
+        text.innerHTML = '<div class="md-done"></div><div class="md-tail"></div>';
+    }
+    if (doneHtml) {
+        text.querySelector(".md-done").insertAdjacentHTML("beforeend", doneHtml);
+    }
+    text.querySelector(".md-tail").innerHTML = tailHtml;
+    if (follow) scrollToBottom();
+}
+function removeMessage(id) {
+    var node = document.getElementById(id);
+    if (!node) return;
+    // Removing from the top must not move the messages being read
+    var follow = followBottom();
+    var before = document.body.scrollHeight;
+    node.remove();
+    if (!follow) window.scrollBy(0, document.body.scrollHeight - before);
+}
+function prependMessages(messages) {
+    // Keep the messages in view where they are while older ones are added above
+    var before = document.body.scrollHeight;
+    var transcript = document.getElementById("transcript");
+    for (var i = messages.length - 1; i >= 0; i--) {
+        var node = document.createElement("div");
+        node.id = messages[i][0];
+        node.className = "message";
+        node.innerHTML = messages[i][1];
+        transcript.insertBefore(node, transcript.firstChild);
+    }
+    window.scrollBy(0, document.body.scrollHeight - before);
+}
+function showLoadEarlier(visible) {
+    document.getElementById("load-earlier").hidden = !visible;
+}
+function clearTranscript() {
+    document.getElementById("transcript").innerHTML = "";
+    showLoadEarlier(false);
+}
+""" % {"follow": FOLLOW_THRESHOLD}
+
+
+def bubble_html(sender: str, html: str) -> str:
+    """Wrap rendered message HTML in its chat bubble"""
+    if sender == "user":
+        return (
+            '<div class="message-container user">'
+            f'<div class="bubble bubble-user"><div class="text">{html}</div></div>'
+            '<div class="avatar">👤</div></div>'
+        )
+    return (
+        '<div class="message-container assistant"><div class="bubble bubble-assistant">'
+        f'<div class="avatar">🧑‍🔬</div><div class="text">{html}</div></div></div>'
+    )
+
+
+class BubbleRenderCache:
+    """LRU of bubble HTML keyed by (message hash, sender, theme version)"""
+
+    def __init__(self, render: Callable[[str], str], max_entries: int = 256):
+        self.render = render  # Markdown text -> HTML
+        self.max_entries = max(1, int(max_entries))
+        self.entries: "OrderedDict[Tuple[bytes, str, int], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sender: str, message: str, theme_version: int) -> str:
+        key = (hashlib.blake2b(message.encode("utf-8", errors="replace"), digest_size=16).digest(),
+               sender, theme_version)
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = bubble_html(sender, self.render(message))
+        self.entries[key] = html
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        self.entries.clear()
+
+
+class ChatTranscript:
+    """One WebView holding every chat message as a DOM node"""
+
+    def __init__(self, render: Callable[[str], str]):
+        self.webview = WebKit2.WebView()
+        self.webview.set_name("chat_transcript")
+        self.webview.set_background_color(Gdk.RGBA(1, 1, 1, 1))  # White background
+        self.webview.set_hexpand(True)
+        self.webview.set_vexpand(True)
+        self.next_id = 0
+        self.stylesheet = ""
+        self.theme_version = 0  # Bumped whenever the stylesheet changes
+        self.render_cache = BubbleRenderCache(render)
+        self.ready = False
+        self.pending: List[str] = []  # Scripts issued before the document finished loading
+        self.webview.connect("load-changed", self._on_load_changed)
+        self.webview.load_html(
+            f'<html><head><meta charset="UTF-8"><style id="transcript-style"></style>'
+            f'<script>{TRANSCRIPT_SCRIPT}</script></head>'
+            f'<body><div id="load-earlier" class="load-earlier" hidden><a href="{LOAD_EARLIER_URI}">'
+            'Load earlier messages</a></div><div id="transcript"></div></body></html>',
+            "file:///"
+        )
+
+    def _on_load_changed(self, webview, load_event):
+        if load_event == WebKit2.LoadEvent.FINISHED and not self.ready:
+            self.ready = True
+            if self.pending:
+                script, self.pending = "\n".join(self.pending), []
+                self._run(script)
+
+    def _run(self, script: str):
+        self.webview.run_javascript(script, None, self._on_script_finished, None)
+
+    def _on_script_finished(self, webview, result, user_data):
+        try:
+            webview.run_javascript_finish(result)
+        except Exception as e:
+            logger.error(f"Transcript script failed: {e}")
+
+    def _call(self, function: str, *args):
+        # json.dumps gives properly escaped JavaScript literals
+        script = f"{function}({', '.join(json.dumps(arg) for arg in args)});"
+        if self.ready:
+            self._run(script)
+        else:
+            self.pending.append(script)
+
+    def _new_id(self) -> str:
+        message_id = f"msg-{self.next_id}"
+        self.next_id += 1
+        return message_id
+
+    def set_stylesheet(self, css: str):
+        """Replace the shared stylesheet; rendered messages are restyled in place"""
+        if css == self.stylesheet:
+            return
+        self.stylesheet = css
+        self.theme_version += 1
+        self._call("setStylesheet", css)
+
+    def render(self, sender: str, message: str) -> str:
+        return self.render_cache.get(sender, message, self.theme_version)
+
+    def append(self, sender: str, message: str) -> str:
+        """Add a message bubble for markdown text and return its id"""
+        message_id = self._new_id()
+        self._call("appendMessage", message_id, self.render(sender, message))
+        return message_id
+
+    def prepend(self, messages: List[Tuple[str, str]]) -> List[str]:
+        """Add (sender, message) bubbles, oldest first, above the others and return their ids"""
+        rows = [[self._new_id(), self.render(sender, message)] for sender, message in messages]
+        if rows:
+            self._call("prependMessages", rows)
+        return [row[0] for row in rows]
+
+    def remove(self, message_id: str):
+        self._call("removeMessage", message_id)
+
+    def show_load_earlier(self, visible: bool):
+        self._call("showLoadEarlier", visible)
+
+    def update(self, message_id: str, sender: str, message: str):
+        """Replace the content of a message bubble with markdown text"""
+        self._call("updateMessage", message_id, self.render(sender, message))
+
+    def stream(self, message_id: str, done_html: str, tail_html: str):
+        """Append newly completed blocks to a streaming bubble and replace its tail"""
+        self._call("streamMessage", message_id, done_html, tail_html)
+
+    def clear(self):
+        self._call("clearTranscript")
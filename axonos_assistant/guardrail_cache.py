@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Guardrail verdict cache for AxonOS Assistant
+
+Remembers Granite Guardian verdicts per (model, category, normalized text) so
+suggestion prompts, repeated questions and repeated response fragments are not
+re-classified. Entries live in an in-memory LRU backed by a small SQLite file,
+so verdicts survive restarts.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "axonos_assistant",
+    "guardrail_cache.sqlite3",
+)
+
+# Verdicts that only say the check itself did not complete; never cached.
+UNCACHEABLE_RESPONSES = {"check_failed", "check_error", "check_timeout", "check_cancelled"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key TEXT PRIMARY KEY,
+    risky INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    description TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of text used for cache keys"""
+    return " ".join(str(text).lower().split())
+
+
+def cache_key(model: str, category: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}\x00{category}\x00{digest}"
+
+
+class GuardrailVerdictCache:
+    """LRU + TTL cache of guardrail verdicts, persisted to SQLite"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_entries: int = 2000,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl_seconds
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self.conn.executescript(_SCHEMA)
+                self._load()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Guardrail cache store unavailable, using memory only: {e}")
+                self.conn = None
+
+    def _load(self):
+        """Load the most recently used unexpired verdicts from disk"""
+        now = time.time()
+        self.conn.execute("DELETE FROM verdicts WHERE created < ?", (now - self.ttl,))
+        rows = self.conn.execute(
+            "SELECT key, risky, response, description, created FROM verdicts "
+            "ORDER BY last_used DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for key, risky, response, description, created in reversed(rows):
+            self.entries[key] = {
+                "risky": bool(risky),
+                "response": response,
+                "description": description,
+                "created": created,
+            }
+        self.conn.execute(
+            "DELETE FROM verdicts WHERE key NOT IN (SELECT key FROM verdicts ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        logger.info(f"Loaded {len(self.entries)} cached guardrail verdicts from {self.path}")
+
+    def _persist(self, sql: str, params: tuple):
+        if self.conn is None:
+            return
+        try:
+            self.conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.warning(f"Guardrail cache write failed: {e}")
+
+    def get(self, model: str, category: str, text: str) -> Optional[Dict[str, Any]]:
+        """Return the cached risk_details entry for this check, or None"""
+        key = cache_key(model, category, text)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry["created"] > self.ttl:
+                del self.entries[key]
+                self._persist("DELETE FROM verdicts WHERE key = ?", (key,))
+                return None
+            self.entries.move_to_end(key)
+            self._persist("UPDATE verdicts SET last_used = ? WHERE key = ?", (time.time(), key))
+            return {
+                "risky": entry["risky"],
+                "response": entry["response"],
+                "description": entry["description"],
+                "cached": True,
+            }
+
+    def put(self, model: str, category: str, text: str, details: Dict[str, Any]):
+        """Store a verdict; incomplete checks (errors, timeouts) are ignored"""
+        if details.get("response") in UNCACHEABLE_RESPONSES or details.get("cached"):
+            return
+        key = cache_key(model, category, text)
+        now = time.time()
+        entry = {
+            "risky": bool(details.get("risky", False)),
+            "response": str(details.get("response", "")),
+            "description": str(details.get("description", "")),
+            "created": now,
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self._persist(
+                "INSERT OR REPLACE INTO verdicts (key, risky, response, description, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, int(entry["risky"]), entry["response"], entry["description"], now, now),
+            )
+            while len(self.entries) > self.max_entries:
+                old_key, _ = self.entries.popitem(last=False)
+                self._persist("DELETE FROM verdicts WHERE key = ?", (old_key,))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self._persist("DELETE FROM verdicts", ())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Intent router for AxonOS Assistant
+
+Classifies a user message into every intent whose keywords it contains
+(help, vision, web search, ...) with one pass over the text. All keywords are
+compiled once into an Aho-Corasick automaton, so classification time depends
+on the length of the message, not on how many keywords or intents exist.
+Matching is case-insensitive substring matching, as with `keyword in text`.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+HELP_KEYWORDS = [
+    "help", "help me", "i need help", "can you help", "please help", "assist me",
+    "i'm stuck", "what should i do", "how do i", "i don't know", "confused",
+    "trouble", "problem", "issue", "stuck", "lost", "guide me", "show me",
+    "explain", "what next", "next step", "what now", "i need assistance",
+    "support", "tutorial", "walkthrough", "step by step", "guide", "instructions"
+]
+
+VISION_KEYWORDS = [
+    # Direct vision requests
+    "what do you see", "describe the screen", "what's on screen", "analyze the image",
+    "look at", "see on", "visible", "screen shows", "what's displayed", "current view",
+    "what am i looking at", "describe what", "analyze what", "explain the screen",
+    "interpret the", "what's happening", "screen content", "desktop shows",
+
+    # Scientific analysis requests
+    "analyze this", "what's in this", "examine this", "review this", "check this",
+    "interpret this", "explain this visualization", "describe this plot", "analyze this graph",
+    "what does this show", "what's this data", "explain this chart", "read this",
+
+    # UI/Interface requests
+    "what's open", "what applications", "what windows", "what programs", "current state",
+    "desktop state", "interface", "gui", "user interface", "what's running",
+
+    # General observation requests
+    "observe", "inspect", "examine", "review", "check", "survey", "study",
+    "what can you tell me about", "what information", "what details"
+]
+
+SEARCH_KEYWORDS = [
+    "search the web", "browse the web", "find online", "web result", "look up", "search online",
+    "search internet", "web search", "online search", "internet search", "about", "what is",
+    "tell me about", "information about", "research about", "news", "latest news", "recent news",
+    "headlines", "breaking news", "current events"
+]
+
+TOOLS_KEYWORDS = [
+    "what is installed", "what tools", "what software", "what can you do", "available tools",
+    "list apps", "list software"
+]
+
+SYSTEM_KEYWORDS = [
+    "system status", "system info", "system resources", "resource usage", "processes",
+    "memory usage", "cpu usage", "disk usage", "system performance", "system health",
+    "system monitoring", "top processes", "running processes", "system load"
+]
+
+MEMORY_KEYWORDS = [
+    "ram", "memory", "how much ram", "memory info", "memory usage", "total memory",
+    "available memory", "memory status"
+]
+
+LAUNCH_KEYWORDS = [
+    "launch", "start", "open", "run application", "execute", "start program"
+]
+
+INTENT_KEYWORDS = {
+    "help": HELP_KEYWORDS,
+    "vision": VISION_KEYWORDS,
+    "search": SEARCH_KEYWORDS,
+    "tools": TOOLS_KEYWORDS,
+    "system": SYSTEM_KEYWORDS,
+    "memory": MEMORY_KEYWORDS,
+    "launch": LAUNCH_KEYWORDS,
+}
+
+# Intents that select a handler, most specific first; anything else is "generate"
+ROUTE_ORDER = ["help", "search", "tools", "system", "memory", "launch"]
+DEFAULT_ROUTE = "generate"
+
+
+class IntentRouter:
+    """Keyword intent classifier backed by an Aho-Corasick automaton"""
+
+    def __init__(self, intents: Optional[Dict[str, Iterable[str]]] = None,
+                 route_order: Optional[List[str]] = None):
+        if intents is None:
+            intents = INTENT_KEYWORDS
+        self.route_order = list(ROUTE_ORDER if route_order is None else route_order)
+        # Trie as parallel lists indexed by state; state 0 is the root
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[FrozenSet[str]] = [frozenset()]
+        pending: List[Set[str]] = [set()]
+        for intent, keywords in intents.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    next_state = self.goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self.goto)
+                        self.goto[state][char] = next_state
+                        self.goto.append({})
+                        self.fail.append(0)
+                        pending.append(set())
+                    state = next_state
+                pending[state].add(intent)
+        # Breadth-first failure links; each state also reports its suffixes' intents
+        queue = deque(self.goto[0].values())
+        order = []
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0) if state else 0
+                queue.append(child)
+        self.output = [frozenset()] * len(self.goto)
+        for state in order:
+            self.output[state] = frozenset(pending[state] | self.output[self.fail[state]])
+
+    def classify(self, text: str) -> Set[str]:
+        """Return every intent with at least one keyword occurring in text"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found: Set[str] = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def route(self, intents: Set[str]) -> str:
+        """The handler route for a classification result"""
+        for intent in self.route_order:
+            if intent in intents:
+                return intent
+        return DEFAULT_ROUTE
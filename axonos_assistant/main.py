@@ -30,21 +30,30 @@ gi.require_version('Gtk', '3.0')
 gi.require_version('Notify', '0.7')
 from gi.repository import Gtk, GLib, Notify, Gdk, WebKit2, Pango
 import threading
+import concurrent.futures
 from bs4 import BeautifulSoup
 import markdown
 import random
 import subprocess
-from PIL import Image
-import base64
-import io
 import time
-import tempfile
 import os
 import asyncio
 import logging
+from collections import deque
 
 # MCP integration
 from mcp_client import get_mcp_client_manager, shutdown_mcp_client_manager
+from guardrail_cache import GuardrailVerdictCache
+from ollama_client import CancelToken, OllamaCancelled, OllamaError, get_ollama_client
+from model_residency import ModelResidencyManager
+from turn_pipeline import TurnPipeline
+from intent_router import IntentRouter
+from screen_capture import (ENCODING_FORMATS, FocusRegionCache, VisionEncoding, capture_screen, encode_for_vision,
+                            pick_focus_window, tile_for_vision, window_region)
+from vision_cache import VisionDescriptionCache, screen_fingerprint
+from streaming_markdown import IncrementalMarkdownRenderer
+from chat_transcript import LOAD_EARLIER_URI, ChatTranscript
+from transcript_store import TranscriptStore
 
 DOCKERFILE_SUMMARY = (
     "This assistant was built from a Dockerfile with the following features: "
@@ -79,113 +88,111 @@ GUARDRAIL_CATEGORIES = {
     "answer_relevance": "Response relevance to query"
 }
 
+# Deterministic decoding for guardrail classification
+GUARDRAIL_OPTIONS = {
+    "temperature": 0.0,
+    "top_p": 1.0,
+    "top_k": 1
+}
+
 def safe_decode(text):
     if isinstance(text, bytes):
         return text.decode('utf-8', errors='replace')
     return str(text)
 
-def capture_and_process_screen():
-    """Capture the screen and intelligently resize it for the vision model"""
+STREAM_RENDER_INTERVAL = 1 / 30  # Streamed text is re-rendered at most 30 times a second
+DEBUG_STREAMING = os.environ.get("AXONOS_DEBUG_STREAMING", "") not in ("", "0")  # Per-chunk debug output
+
+def render_markdown(text):
+    return markdown.markdown(safe_decode(text))
+
+def guardrail_failure_details(error):
+    """risk_details entry for a guardrail check that could not complete (never blocks)"""
+    if isinstance(error, OllamaError) and error.status_code is not None:
+        return {
+            "risky": False,
+            "response": "check_failed",
+            "description": f"Check failed: HTTP {error.status_code}"
+        }
+    return {
+        "risky": False,
+        "response": "check_error",
+        "description": f"Check error: {str(error)}"
+    }
+
+# risk_details entry for a check abandoned because the turn was cancelled (never blocks)
+GUARDRAIL_CANCELLED_DETAILS = {
+    "risky": False,
+    "response": "check_cancelled",
+    "description": "Check cancelled"
+}
+
+def parse_guardrail_verdicts(raw, categories):
+    """
+    Parse a multi-category guardrail answer such as {"harm": "no", "violence": "yes"}.
+    Returns {category: is_risky} covering every requested category, or None if the
+    output is malformed or any category is missing.
+    """
     try:
-        print("Starting screen capture process...")
-        # Use multiple fallback methods for screenshot capture
-        screenshot = None
-        
-        # Method 1: Try xwd (X Window Dump) - works well in VNC/X11 environments
-        print("Trying xwd method...")
+        start, end = raw.index("{"), raw.rindex("}") + 1
+        parsed = json.loads(raw[start:end])
+    except ValueError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    
+    normalized = {str(key).strip().lower().replace(" ", "_"): value for key, value in parsed.items()}
+    verdicts = {}
+    for category in categories:
+        value = normalized.get(category)
+        if isinstance(value, dict):
+            # Tolerate {"harm": {"risk": "no"}} style nesting
+            value = next(iter(value.values()), None)
+        if isinstance(value, bool):
+            verdicts[category] = value
+        elif isinstance(value, (int, float)):
+            verdicts[category] = value >= 0.5
+        elif isinstance(value, str) and value.strip().lower() in ("yes", "true", "risky", "unsafe"):
+            verdicts[category] = True
+        elif isinstance(value, str) and value.strip().lower() in ("no", "false", "safe"):
+            verdicts[category] = False
+        else:
+            return None
+    return verdicts
+
+def capture_and_process_screen(encoding=None, region=None, tiles=False):
+    """
+    Capture the screen (or only region, as (left, top, width, height)) and resize and
+    encode it for the vision model (see VisionEncoding). With tiles, captures larger
+    than the model's image size also get full-resolution tiles.
+    Returns (base64 image, width, height, fingerprint of the capture, list of base64 tiles).
+    """
+    try:
+        started = time.perf_counter()
         try:
-            with tempfile.NamedTemporaryFile(suffix='.xwd', delete=False) as tmp_file:
-                temp_path = tmp_file.name
-            
-            # Get the root window ID and capture it
-            result = subprocess.run(['xwd', '-root', '-out', temp_path], 
-                                  capture_output=True, timeout=10)
-            
-            if result.returncode == 0:
-                # Convert XWD to PNG using ImageMagick or similar
-                try:
-                    result2 = subprocess.run(['convert', temp_path, temp_path + '.png'], 
-                                           capture_output=True, timeout=10)
-                    if result2.returncode == 0:
-                        screenshot = Image.open(temp_path + '.png')
-                        os.unlink(temp_path + '.png')
-                except:
-                    # Fallback: try to open XWD directly with PIL
-                    try:
-                        screenshot = Image.open(temp_path)
-                    except:
-                        pass
-                        
-            # Clean up temp file
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-                
+            screenshot, backend = capture_screen(region)
         except Exception as e:
-            print(f"xwd method failed: {e}")
-        
-        # Method 2: Try scrot if xwd failed
-        if screenshot is None:
-            try:
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                    temp_path = tmp_file.name
-                
-                result = subprocess.run(['scrot', temp_path], 
-                                      capture_output=True, timeout=10)
-                
-                if result.returncode == 0 and os.path.exists(temp_path):
-                    screenshot = Image.open(temp_path)
-                    os.unlink(temp_path)
-                    
-            except Exception as e:
-                print(f"scrot method failed: {e}")
-        
-        # Method 3: Try gnome-screenshot as final fallback
-        if screenshot is None:
-            try:
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                    temp_path = tmp_file.name
-                
-                result = subprocess.run(['gnome-screenshot', '-f', temp_path], 
-                                      capture_output=True, timeout=10)
-                
-                if result.returncode == 0 and os.path.exists(temp_path):
-                    screenshot = Image.open(temp_path)
-                    os.unlink(temp_path)
-                    
-            except Exception as e:
-                print(f"gnome-screenshot method failed: {e}")
-        
-        if screenshot is None:
-            raise Exception("All screenshot methods failed")
-        
-        original_width, original_height = screenshot.size
-        print(f"Original screen size: {original_width}x{original_height}")
-        
-        # Target size for the model (max 1344x1344)
-        target_max = 1344
+            if region is None:
+                raise
+            print(f"Window capture failed ({e}), capturing the whole screen")
+            screenshot, backend = capture_screen()
+        captured = time.perf_counter()
+        print(f"Original screen size: {screenshot.width}x{screenshot.height} ({backend}, {1000 * (captured - started):.0f} ms)")
         
-        # Calculate scaling to fit within 1344x1344 while maintaining aspect ratio
-        scale_factor = min(target_max / original_width, target_max / original_height)
-        new_width = int(original_width * scale_factor)
-        new_height = int(original_height * scale_factor)
+        screen_hash = screen_fingerprint(screenshot)
+        img_base64, new_width, new_height = encode_for_vision(screenshot, encoding)
+        print(f"Resized to: {new_width}x{new_height}, encoded in {1000 * (time.perf_counter() - captured):.0f} ms "
+              f"({len(img_base64) // 1024} KB base64)")
         
-        print(f"Resizing to: {new_width}x{new_height} (scale factor: {scale_factor:.3f})")
+        tile_images = tile_for_vision(screenshot, encoding) if tiles else []
+        if tile_images:
+            print(f"Added {len(tile_images)} full-resolution tiles")
         
-        # Resize with high quality
-        resized_screenshot = screenshot.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # Convert to base64 for API
-        buffer = io.BytesIO()
-        resized_screenshot.save(buffer, format='PNG', optimize=True, quality=95)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        return img_base64, new_width, new_height
+        return img_base64, new_width, new_height, screen_hash, tile_images
         
     except Exception as e:
         print(f"Error capturing screen: {e}")
-        return None, 0, 0
+        return None, 0, 0, None, []
 
 def get_improved_css_styles():
     """Get improved CSS styles for better text formatting with eye-friendly colors"""
@@ -209,6 +216,8 @@ body { font-family: 'Segoe UI', 'Liberation Sans', Arial, sans-serif; font-size:
 .text a:hover { color: #357abd; border-bottom-color: #357abd; text-decoration: none; }
 .text a:visited { color: #7b68ee; }
 .text a:visited:hover { color: #6a5acd; border-bottom-color: #6a5acd; }
+.load-earlier { text-align: center; padding: 8px 0 4px 0; font-size: 13px; }
+.load-earlier a { color: #4a90e2; text-decoration: none; }
     """
 
     theme_style = """
@@ -221,7 +230,63 @@ body { color: #2c3e50; }
 .message-container.user { justify-content: flex-end; }
     """
     
-    return f"<style>{common_style}{theme_style}</style>"
+    return common_style + theme_style
+
+class StreamingGuardrail:
+    """
+    Classifies a response while it is being streamed.
+
+    Text is checked in windows that end on a paragraph break (or once enough text
+    has piled up), each overlapping the previous one a little so a risky sentence
+    split across windows is still seen whole. At most one check runs at a time;
+    text arriving meanwhile is folded into the next window. Once a window is
+    flagged, `flagged` is set and the generator should stop.
+    """
+
+    def __init__(self, check, min_chars=200, max_chars=800, overlap_chars=200):
+        self.check = check  # callable(text) -> (is_safe, risk_details)
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.overlap_chars = overlap_chars
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-guardrail")
+        self.checked_upto = 0
+        self.pending = None
+        self.flagged = threading.Event()
+        self.risk_details = {}
+
+    def _submit(self, text, end):
+        window = text[max(0, self.checked_upto - self.overlap_chars):end]
+        self.checked_upto = end
+        self.pending = self.executor.submit(self._run, window)
+
+    def _run(self, window):
+        is_safe, risk_details = self.check(window)
+        self.risk_details.update(risk_details)
+        if not is_safe:
+            self.flagged.set()
+
+    def feed(self, text):
+        """Called with the full response so far after each streamed chunk."""
+        if self.flagged.is_set() or (self.pending is not None and not self.pending.done()):
+            return
+        unchecked = text[self.checked_upto:]
+        if len(unchecked) < self.min_chars:
+            return
+        boundary = unchecked.rfind("\n\n")
+        if boundary >= self.min_chars:
+            self._submit(text, self.checked_upto + boundary)
+        elif len(unchecked) >= self.max_chars:
+            self._submit(text, len(text))
+
+    def finish(self, text):
+        """Check whatever is left and return (is_safe, risk_details) for the whole text."""
+        if self.pending is not None:
+            self.pending.result()
+        if not self.flagged.is_set() and self.checked_upto < len(text.rstrip()):
+            self._submit(text, len(text))
+            self.pending.result()
+        self.executor.shutdown(wait=False)
+        return not self.flagged.is_set(), self.risk_details
 
 class AxonOSChatWidget(Gtk.Window):
     def __init__(self):
@@ -238,12 +303,27 @@ class AxonOSChatWidget(Gtk.Window):
         self.set_opacity(0.95)
         self.set_events(Gdk.EventMask.BUTTON_PRESS_MASK)
         self.connect("button-press-event", self.on_window_button_press)
-        self.messages = []  # Store (sender, message) tuples for re-rendering
-        self.ollama_url = "http://localhost:11434/api/generate"
+        self.messages = []  # Recent (sender, message) tuples; older ones are paged out to transcript_store
+        self.message_ids = deque()  # Transcript ids of the rendered messages, oldest first
+        self.transcript_store = TranscriptStore()
+        self.transcript_max_messages = 60  # Messages kept in memory and rendered
+        self.transcript_page_size = 20  # Older messages restored per "Load earlier messages" click
+        self.ollama = get_ollama_client()  # Pooled client shared with other Ollama callers
+        self.model_residency = ModelResidencyManager(self.ollama)
+        self.intent_router = IntentRouter()  # Keyword automaton, built once
         self.vision_model = "granite3.2-vision"
         self.text_model = "command-r7b"
         self.guardrail_model = "granite3-guardian"  # Added guardrail model
         self.current_screenshot = None  # Store the current screenshot for vision queries
+        self.current_screenshot_hash = None  # Fingerprint of current_screenshot (see vision_cache)
+        self.current_screenshot_tiles = []  # Full-resolution tiles of a large current_screenshot
+        self.vision_capture_window = True  # Capture only the window the user works in
+        self.vision_tiling = False  # Also send full-resolution tiles of large captures
+        self.vision_deadline = 45  # Seconds a screen description may take before we move on
+        self.vision_max_chars = 2400  # Descriptions are cut off here; the text model needs no more
+        self.vision_cache = VisionDescriptionCache()  # Descriptions of recent screens
+        self.vision_encoding = VisionEncoding()  # Resize filter, format and quality for screenshots
+        self.focus_region_cache = FocusRegionCache()  # Last focus window lookup for window captures
         self.mcp_manager = None  # MCP client manager for OS context awareness
         self.mcp_context_enabled = True  # Enable MCP context by default
         
@@ -252,6 +332,15 @@ class AxonOSChatWidget(Gtk.Window):
         self.guardrail_categories = ["harm", "jailbreak", "violence", "profanity"]  # Default categories
         self.guardrail_prompt_check = True   # Check user prompts
         self.guardrail_response_check = True  # Check AI responses
+        self.guardrail_deadline = 8  # Overall seconds for one check across all categories
+        self.guardrail_single_pass = True  # Score all categories in one model call, per-category on parse failure
+        self.guardrail_stream_check = True  # Check responses window by window while they stream
+        self.stream_guardrail_verdict = None  # (response, is_safe, risk_details) from the last streamed generation
+        self.guardrail_cache = GuardrailVerdictCache()  # Verdicts keyed by (model, category, normalized text)
+        # Categories are checked concurrently; Ollama serves them in parallel up to OLLAMA_NUM_PARALLEL
+        self.guardrail_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(GUARDRAIL_CATEGORIES), thread_name_prefix="guardrail"
+        )
         
         self.system_prompt = (
             "You ARE AxonOS (Decentralized Science Operating System). You are not just an assistant - you ARE the operating system itself, "
@@ -354,6 +443,8 @@ class AxonOSChatWidget(Gtk.Window):
             "with all tools ready and waiting to be used. Always prioritize safety and ethical use of technology."
         )
         self.conversation_history = []  # Store conversation for context
+        self.history_max_turns = 4  # User turns kept before the history window is trimmed...
+        self.history_min_turns = 2  # ...back to this many
 
         Notify.init("AxonOS Assistant")
 
@@ -382,23 +473,10 @@ class AxonOSChatWidget(Gtk.Window):
         # Make this header the real window title-bar
         self.set_titlebar(header)
 
-        # Chat area (scrollable)
-        self.chat_listbox = Gtk.ListBox()
-        self.chat_listbox.set_name("chat_listbox")
-        self.chat_listbox.set_selection_mode(Gtk.SelectionMode.NONE)
-        self.chat_listbox.set_vexpand(True)
-        self.chat_listbox.set_hexpand(True)
-        self.chat_listbox.set_valign(Gtk.Align.FILL)
-        self.chat_listbox.set_halign(Gtk.Align.FILL)
-        
-        chat_scroll = Gtk.ScrolledWindow()
-        chat_scroll.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
-        chat_scroll.set_vexpand(True)
-        chat_scroll.set_hexpand(True)
-        chat_scroll.set_valign(Gtk.Align.FILL)
-        chat_scroll.set_halign(Gtk.Align.FILL)
-        chat_scroll.add(self.chat_listbox)
-        main_vbox.pack_start(chat_scroll, True, True, 0)
+        # Chat area: one scrollable document, messages are appended to it as DOM nodes
+        self.transcript = ChatTranscript(render_markdown)
+        self.transcript.webview.connect('decide-policy', self.on_decide_policy)
+        main_vbox.pack_start(self.transcript.webview, True, True, 0)
 
         # Prompt suggestions area
         self.suggestions_container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
@@ -460,6 +538,9 @@ class AxonOSChatWidget(Gtk.Window):
         
         # Initialize MCP in a separate thread
         self.initialize_mcp_async()
+        
+        # Load the models in the background so the first turn doesn't pay for it
+        self.preload_models()
 
         # Input area
         input_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
@@ -533,6 +614,11 @@ class AxonOSChatWidget(Gtk.Window):
 
         # State for generation
         self.is_generating = False
+        self.turn_cancel = None  # CancelToken of the turn in progress
+        self.stream_chunks = deque()  # Streamed chunks not yet rendered
+        self.streamed_any = False
+        self.stream_render_source = None  # GLib timer draining stream_chunks
+        self.streaming_message_id = None  # Transcript id of the message being streamed
 
         # Welcome message (always show on startup)
         welcome_msg = ("Hello! I am AxonOS Assistant, your AI-powered guide to decentralized science. "
@@ -573,6 +659,14 @@ class AxonOSChatWidget(Gtk.Window):
         # Start MCP initialization in background thread
         threading.Thread(target=mcp_init_thread, daemon=True).start()
     
+    def preload_models(self):
+        """Pin the per-turn models and load all three in the order a turn uses them"""
+        self.model_residency.set_pinned([self.guardrail_model, self.text_model])
+        models = [self.text_model, self.vision_model]
+        if self.guardrail_enabled:
+            models.insert(0, self.guardrail_model)
+        self.model_residency.preload(models)
+    
     def show_mcp_status(self, message):
         """Show MCP status message in the chat"""
         self.append_message("assistant", f"🔧 **System Status**: {message}")
@@ -596,19 +690,11 @@ class AxonOSChatWidget(Gtk.Window):
     background-color: #ffffff;
 }
 
-#chat_listbox, #chat_listbox row {
+#chat_transcript {
     background-color: #ffffff;
     border-radius: 12px;
 }
 
-#chat_listbox scrolledwindow {
-    background-color: #ffffff;
-}
-
-#chat_listbox scrolledwindow viewport {
-    background-color: #ffffff;
-}
-
 /* Header bar styling */
 #headerbar {
     background: #3498db;
@@ -879,6 +965,8 @@ window {
 
 """
         self.css_provider.load_from_data(css)
+        # The chat transcript shares one stylesheet; swapping it restyles every message
+        self.transcript.set_stylesheet(get_improved_css_styles())
 
     def on_window_button_press(self, widget, event):
         if event.type == Gdk.EventType.BUTTON_PRESS and event.button == 1:
@@ -887,210 +975,88 @@ window {
     def append_message(self, sender, message):
         print(f"append_message called with sender={sender}, message={message}")
         self.messages.append((sender, message))
-        self._append_message_no_store(sender, message)
+        self.message_ids.append(self._append_message_no_store(sender, message))
+        self.trim_transcript()
 
     def append_streaming_message(self, sender, message):
         """Append a message that can be updated in real-time for streaming"""
         print(f"append_streaming_message called with sender={sender}, message={message}")
         self.messages.append((sender, message))
-        self._append_streaming_message_no_store(sender, message)
+        self.message_ids.append(self._append_streaming_message_no_store(sender, message))
+        self.trim_transcript()
+
+    def trim_transcript(self):
+        """Page the oldest messages out to the transcript log and drop their bubbles"""
+        while len(self.messages) > self.transcript_max_messages:
+            self.transcript_store.archive(*self.messages.pop(0))
+        while len(self.message_ids) > self.transcript_max_messages:
+            self.transcript.remove(self.message_ids.popleft())
+        self.transcript.show_load_earlier(self.rendered_from() > 0 and self.transcript_store.available)
+
+    def rendered_from(self):
+        """Position in the whole conversation of the oldest rendered message"""
+        return self.transcript_store.count + len(self.messages) - len(self.message_ids)
+
+    def load_earlier_messages(self):
+        """Render the page of archived messages just above the oldest rendered one"""
+        end = self.rendered_from()
+        if end <= 0:
+            return
+        older = self.transcript_store.read(end - self.transcript_page_size, end)
+        ids = self.transcript.prepend(older)
+        self.message_ids.extendleft(reversed(ids))
+        self.transcript.show_load_earlier(self.rendered_from() > 0)
 
     def _append_streaming_message_no_store(self, sender, message):
-        """Append a message with WebView that can be updated for streaming"""
+        """Append a message that can be updated for streaming"""
         print(f"_append_streaming_message_no_store called with sender={sender}, message={message}")
-        row = Gtk.ListBoxRow()
-        row.set_selectable(False)
-        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
-        
-        webview = WebKit2.WebView()
-        webview.set_background_color(Gdk.RGBA(1, 1, 1, 1))  # White background
-        webview.set_size_request(-1, 1)  # Let it shrink to fit
-        
-        # Add policy decision handler to open links in Firefox
-        def on_decide_policy(webview, decision, decision_type, user_data):
-            if decision_type == WebKit2.PolicyDecisionType.NAVIGATION_ACTION:
-                navigation_action = decision.get_navigation_action()
-                request = navigation_action.get_request()
-                uri = request.get_uri()
-                
-                # Only handle http/https links
-                if uri.startswith(('http://', 'https://')):
-                    try:
-                        # Launch Firefox with the URL
-                        subprocess.Popen(['firefox', uri], 
-                                       stdout=subprocess.DEVNULL, 
-                                       stderr=subprocess.DEVNULL)
-                        print(f"🌐 Opened link in Firefox: {uri}")
-                        decision.ignore()
-                        return True
-                    except Exception as e:
-                        print(f"❌ Failed to open link in Firefox: {e}")
-                        # Fall back to default behavior
-                        decision.use()
-                        return True
-                else:
-                    # For non-http links, use default behavior
-                    decision.use()
-                    return True
-            return False
-        
-        webview.connect('decide-policy', on_decide_policy)
-        
+        message_id = self._append_message_no_store(sender, message)
         # Store reference for streaming updates
-        self.streaming_webview = webview
-
-        html_content = markdown.markdown(safe_decode(message))
-        full_style = get_improved_css_styles()
-
-        if sender == 'user':
-            body_html = f"""
-              <div class="message-container user">
-                <div class="bubble bubble-user"><div class="text">{html_content}</div></div>
-                <div class="avatar">👤</div>
-              </div>
-            """
-        else: # assistant
-            body_html = f"""
-              <div class="message-container assistant">
-                <div class="bubble bubble-assistant">
-                  <div class="avatar">🧑‍🔬</div>
-                  <div class="text">{html_content}</div>
-                </div>
-              </div>
-            """
-        
-        html = f'<html><head><meta charset="UTF-8">{full_style}</head><body>{body_html}</body></html>'
-        
-        print("HTML being loaded into WebView:")
-        print(html)
-        webview.load_html(html, "file:///")
-        webview.set_hexpand(True)
-        webview.set_vexpand(False)
-
-        def on_load_changed(webview, load_event):
-            if load_event == WebKit2.LoadEvent.FINISHED:
-                # This JS returns the height of the body content
-                webview.run_javascript(
-                    "document.body.scrollHeight;",
-                    None,
-                    lambda webview, result, user_data: set_webview_height(webview, result),
-                    None
-                )
-
-        def set_webview_height(webview, result):
-            try:
-                value = webview.run_javascript_finish(result)
-                js_result = value.get_js_value()
-                height = js_result.to_int32()
-                print(f"Setting WebView height to: {height}")
-                webview.set_size_request(-1, height)
-            except Exception as e:
-                print(f"Error setting height: {e}")
-
-        webview.connect("load-changed", on_load_changed)
-
-        hbox.pack_start(webview, True, True, 0)
-        
-        row.add(hbox)
-        self.chat_listbox.add(row)
-        self.chat_listbox.show_all()
-        adj = self.chat_listbox.get_parent().get_vadjustment()
-        GLib.idle_add(adj.set_value, adj.get_upper())
+        self.streaming_message_id = message_id
+        self.stream_renderer = IncrementalMarkdownRenderer(render_markdown)
+        # The worker appends chunks here; one main-loop timer drains and renders them
+        self.stream_chunks = deque()
+        self.streamed_any = False
+        if self.stream_render_source is None:
+            self.stream_render_source = GLib.timeout_add(int(STREAM_RENDER_INTERVAL * 1000), self._drain_stream_chunks)
+        return message_id
 
     def _append_message_no_store(self, sender, message):
+        """Add a message bubble to the transcript and return its id"""
         print(f"_append_message_no_store called with sender={sender}, message={message}")
-        row = Gtk.ListBoxRow()
-        row.set_selectable(False)
-        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
-        
-        webview = WebKit2.WebView()
-        webview.set_background_color(Gdk.RGBA(1, 1, 1, 1))  # White background
-        webview.set_size_request(-1, 1)  # Let it shrink to fit
-        
-        # Add policy decision handler to open links in Firefox
-        def on_decide_policy(webview, decision, decision_type, user_data):
-            if decision_type == WebKit2.PolicyDecisionType.NAVIGATION_ACTION:
-                navigation_action = decision.get_navigation_action()
-                request = navigation_action.get_request()
-                uri = request.get_uri()
-                
-                # Only handle http/https links
-                if uri.startswith(('http://', 'https://')):
-                    try:
-                        # Launch Firefox with the URL
-                        subprocess.Popen(['firefox', uri], 
-                                       stdout=subprocess.DEVNULL, 
-                                       stderr=subprocess.DEVNULL)
-                        print(f"🌐 Opened link in Firefox: {uri}")
-                        decision.ignore()
-                        return True
-                    except Exception as e:
-                        print(f"❌ Failed to open link in Firefox: {e}")
-                        # Fall back to default behavior
-                        decision.use()
-                        return True
-                else:
-                    # For non-http links, use default behavior
-                    decision.use()
-                    return True
-            return False
-        
-        webview.connect('decide-policy', on_decide_policy)
-
-        html_content = markdown.markdown(safe_decode(message))
-        full_style = get_improved_css_styles()
-
-        if sender == 'user':
-            body_html = f"""
-              <div class="message-container user">
-                <div class="bubble bubble-user"><div class="text">{html_content}</div></div>
-                <div class="avatar">👤</div>
-              </div>
-            """
-        else: # assistant
-            body_html = f"""
-              <div class="message-container assistant">
-                <div class="bubble bubble-assistant">
-                  <div class="avatar">🧑‍🔬</div>
-                  <div class="text">{html_content}</div>
-                </div>
-              </div>
-            """
-        
-        html = f'<html><head><meta charset="UTF-8">{full_style}</head><body>{body_html}</body></html>'
-        
-        print("HTML being loaded into WebView:")
-        print(html)
-        webview.load_html(html, "file:///")
-        webview.set_hexpand(True)
-        webview.set_vexpand(False)
-
-        def on_load_changed(webview, load_event):
-            if load_event == WebKit2.LoadEvent.FINISHED:
-                # This JS returns the height of the body content
-                webview.run_javascript(
-                    "document.body.scrollHeight;",
-                    None,
-                    lambda webview, result, user_data: set_webview_height(webview, result),
-                    None
-                )
-
-        def set_webview_height(webview, result):
-            value = webview.run_javascript_finish(result)
-            js_result = value.get_js_value()
-            height = js_result.to_int32()
-            print(f"Setting WebView height to: {height}")
-            webview.set_size_request(-1, height)
-
-        webview.connect("load-changed", on_load_changed)
-
-        hbox.pack_start(webview, True, True, 0)
-        
-        row.add(hbox)
-        self.chat_listbox.add(row)
-        self.chat_listbox.show_all()
-        adj = self.chat_listbox.get_parent().get_vadjustment()
-        GLib.idle_add(adj.set_value, adj.get_upper())
+        return self.transcript.append(sender, message)
+
+    def on_decide_policy(self, webview, decision, decision_type):
+        """Open links in Firefox and keep the transcript document in place"""
+        if decision_type == WebKit2.PolicyDecisionType.NAVIGATION_ACTION:
+            navigation_action = decision.get_navigation_action()
+            request = navigation_action.get_request()
+            uri = request.get_uri()
+            
+            if uri == LOAD_EARLIER_URI:
+                self.load_earlier_messages()
+                decision.ignore()
+                return True
+            # Only handle http/https links
+            elif uri.startswith(('http://', 'https://')):
+                try:
+                    # Launch Firefox with the URL
+                    subprocess.Popen(['firefox', uri], 
+                                   stdout=subprocess.DEVNULL, 
+                                   stderr=subprocess.DEVNULL)
+                    print(f"🌐 Opened link in Firefox: {uri}")
+                except Exception as e:
+                    print(f"❌ Failed to open link in Firefox: {e}")
+                decision.ignore()
+                return True
+            elif navigation_action.get_navigation_type() == WebKit2.NavigationType.LINK_CLICKED:
+                # Following any other link would replace the whole transcript
+                decision.ignore()
+                return True
+            else:
+                decision.use()
+                return True
+        return False
 
     def on_send_clicked(self, widget):
         text_buffer = self.input_textview.get_buffer()
@@ -1114,31 +1080,10 @@ window {
         # Add streaming message and prepare for real-time updates
         self.streaming_response = ""  # Initialize streaming response buffer
         
-        # Check if this will be a vision query to show appropriate thinking message
-        vision_keywords = [
-            "what do you see", "describe the screen", "what's on screen", "analyze the image",
-            "look at", "see on", "visible", "screen shows", "what's displayed", "current view",
-            "what am i looking at", "describe what", "analyze what", "explain the screen",
-            "interpret the", "what's happening", "screen content", "desktop shows",
-            "analyze this", "what's in this", "examine this", "review this", "check this",
-            "interpret this", "explain this visualization", "describe this plot", "analyze this graph",
-            "what does this show", "what's this data", "explain this chart", "read this",
-            "what's open", "what applications", "what windows", "what programs", "current state",
-            "desktop state", "interface", "gui", "user interface", "what's running",
-            "observe", "inspect", "examine", "review", "check", "survey", "study",
-            "what can you tell me about", "what information", "what details"
-        ]
-        is_vision_query = any(keyword in user_text.lower() for keyword in vision_keywords)
-        
-        # Check for help requests
-        help_keywords = [
-            "help", "help me", "i need help", "can you help", "please help", "assist me",
-            "i'm stuck", "what should i do", "how do i", "i don't know", "confused",
-            "trouble", "problem", "issue", "stuck", "lost", "guide me", "show me",
-            "explain", "what next", "next step", "what now", "i need assistance",
-            "support", "tutorial", "walkthrough", "step by step", "guide", "instructions"
-        ]
-        is_help_request = any(keyword in user_text.lower() for keyword in help_keywords)
+        # Classify once; the worker reuses the intents to pick its route
+        intents = self.intent_router.classify(user_text)
+        is_vision_query = "vision" in intents
+        is_help_request = "help" in intents
         
         if is_help_request:
             self.append_streaming_message("assistant", "🆘 Analyzing your screen for contextual help...")
@@ -1147,21 +1092,25 @@ window {
         else:
             self.append_streaming_message("assistant", "🤔 Thinking...")
         
-        # Store the last row (the thinking message) for updating
-        self.thinking_row = self.chat_listbox.get_row_at_index(len(self.chat_listbox.get_children()) - 1)
+        # Store the id of the thinking message for updating
+        self.thinking_message_id = self.streaming_message_id
         
-        threading.Thread(target=self.handle_user_query, args=(user_text,), daemon=True).start()
+        self.turn_cancel = CancelToken()
+        threading.Thread(target=self.handle_user_query, args=(user_text, self.turn_cancel, intents), daemon=True).start()
 
     def on_stop_clicked(self, widget):
         if not self.is_generating:
             return
         
         self.is_generating = False
-        # The thread will see is_generating is false and discard its result
+        # Close the turn's Ollama streams and skip its remaining stages; the
+        # thread will see the token is cancelled and discard its result
+        if self.turn_cancel is not None:
+            self.turn_cancel.cancel()
         
         # Update UI immediately
         self.messages[-1] = ("assistant", "Generation stopped.")
-        self.update_message(self.thinking_row, "assistant", "Generation stopped.")
+        self.update_message(self.thinking_message_id, "assistant", "Generation stopped.")
         
         self._restore_input_state()
 
@@ -1171,9 +1120,14 @@ window {
         self.button_stack.set_visible_child_name("send")
         self.input_textview.set_sensitive(True)
 
-    def check_guardrail(self, text, categories=None, timeout=5):
+    def check_guardrail(self, text, categories=None, timeout=5, deadline=None, cancel=None):
         """
         Check text against guardrail categories using Granite Guardian.
+        Verdicts already in the guardrail cache are reused; the remaining categories
+        are evaluated concurrently, stopping as soon as one category flags risk or the
+        overall deadline (seconds, default guardrail_deadline) passes. Cancelling
+        the cancel token aborts the checks still running; the unfinished categories
+        then come back as safe with a "check_cancelled" response.
         Returns (is_safe, risk_details) where is_safe is bool and risk_details is dict.
         """
         if not self.guardrail_enabled:
@@ -1181,64 +1135,168 @@ window {
         
         if categories is None:
             categories = self.guardrail_categories
+        if deadline is None:
+            deadline = self.guardrail_deadline
+        
+        cached_details = {}
+        for category in categories:
+            cached = self.guardrail_cache.get(self.guardrail_model, category, text)
+            if cached is not None:
+                cached_details[category] = cached
+        if any(details["risky"] for details in cached_details.values()):
+            print(f"⚠️ Guardrail cache hit flags risk in {', '.join(c for c, d in cached_details.items() if d['risky'])}")
+            return False, cached_details
+        
+        remaining = [category for category in categories if category not in cached_details]
+        if not remaining:
+            print("✅ Guardrail verdicts served from cache")
+            return True, cached_details
+        
+        is_safe, risk_details = self._evaluate_guardrail(text, remaining, timeout, deadline, cancel)
+        for category, details in risk_details.items():
+            self.guardrail_cache.put(self.guardrail_model, category, text, details)
+        risk_details.update(cached_details)
+        return is_safe, risk_details
+
+    def _evaluate_guardrail(self, text, categories, timeout, deadline, cancel=None):
+        """Run the guardrail model for the given categories. Returns (is_safe, risk_details)."""
+        if self.guardrail_single_pass and len(categories) > 1:
+            result = self._check_guardrail_combined(text, categories, deadline, cancel)
+            if result is not None:
+                return result
+            print("⚠️ Combined guardrail output could not be parsed, checking categories one by one")
         
         risk_details = {}
         overall_safe = True
         
-        for category in categories:
-            try:
-                # Set system prompt for the specific category
-                data = {
-                    "model": self.guardrail_model,
-                    "prompt": text,
-                    "system": category,  # Category as system prompt
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.0,  # Deterministic output
-                        "top_p": 1.0,
-                        "top_k": 1
-                    }
-                }
-                
-                response = requests.post(self.ollama_url, json=data, timeout=timeout)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    guardrail_response = result.get("response", "").strip().lower()
-                    
-                    # Granite Guardian returns "yes" for risky content, "no" for safe content
-                    is_risky = guardrail_response.startswith("yes")
-                    risk_details[category] = {
-                        "risky": is_risky,
-                        "response": guardrail_response,
-                        "description": GUARDRAIL_CATEGORIES.get(category, "Unknown category")
-                    }
-                    
-                    if is_risky:
-                        overall_safe = False
-                        print(f"⚠️ Guardrail detected risk in category '{category}': {guardrail_response}")
-                    else:
-                        print(f"✅ Guardrail check passed for category '{category}'")
-                else:
-                    print(f"❌ Guardrail check failed for category '{category}': HTTP {response.status_code}")
-                    # On failure, err on the side of caution but don't block
+        # Checks left behind by an early verdict or the deadline are aborted through
+        # this token so they don't keep the shared executor busy for the next check
+        stage_cancel = cancel.child() if cancel is not None else CancelToken()
+        futures = {
+            self.guardrail_executor.submit(self._check_guardrail_category, text, category, timeout, stage_cancel): category
+            for category in categories
+        }
+        cancelled = False
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=deadline):
+                category = futures[future]
+                try:
+                    risk_details[category] = future.result()
+                except OllamaCancelled:
+                    # Stop was clicked; the caller discards the turn, so give up on the rest
+                    cancelled = True
+                    break
+                if risk_details[category]["risky"]:
+                    overall_safe = False
+                    # One flagged category decides the verdict; don't wait for the rest
+                    break
+        except concurrent.futures.TimeoutError:
+            print(f"⏱️ Guardrail deadline of {deadline}s reached")
+        
+        if len(risk_details) < len(futures):
+            stage_cancel.cancel()
+        for future, category in futures.items():
+            if category not in risk_details:
+                future.cancel()
+                if cancelled:
+                    risk_details[category] = dict(GUARDRAIL_CANCELLED_DETAILS)
+                elif overall_safe:
+                    # On timeout, err on the side of caution but don't block
                     risk_details[category] = {
                         "risky": False,
-                        "response": "check_failed",
-                        "description": f"Check failed: HTTP {response.status_code}"
+                        "response": "check_timeout",
+                        "description": f"Check did not finish within {deadline}s"
                     }
-                    
-            except Exception as e:
-                print(f"❌ Guardrail check error for category '{category}': {e}")
-                # On error, err on the side of caution but don't block
-                risk_details[category] = {
-                    "risky": False,
-                    "response": "check_error",
-                    "description": f"Check error: {str(e)}"
-                }
         
         return overall_safe, risk_details
 
+    def _check_guardrail_combined(self, text, categories, timeout, cancel=None):
+        """
+        Score all categories with a single guardrail generation.
+        Returns (is_safe, risk_details) like check_guardrail, or None if the model
+        output could not be parsed so the caller can fall back to per-category checks.
+        """
+        category_lines = "\n".join(
+            f"- {category}: {GUARDRAIL_CATEGORIES.get(category, category)}" for category in categories
+        )
+        system = (
+            "You are a safety classifier. Assess the user message against each risk category below "
+            "and answer \"yes\" if the message carries that risk, otherwise \"no\".\n"
+            f"{category_lines}\n"
+            "Respond only with a JSON object mapping every category name to \"yes\" or \"no\"."
+        )
+        try:
+            result = self.ollama.generate(
+                self.guardrail_model,
+                text,
+                system=system,
+                format="json",  # Constrain output to a JSON object
+                keep_alive=self.model_residency.keep_alive_for(self.guardrail_model),
+                options=GUARDRAIL_OPTIONS,
+                timeout=timeout,
+                cancel=cancel,
+            )
+            verdicts = parse_guardrail_verdicts(result.get("response", ""), categories)
+        except OllamaCancelled:
+            return True, {category: dict(GUARDRAIL_CANCELLED_DETAILS) for category in categories}
+        except Exception as e:
+            print(f"❌ Combined guardrail check error: {e}")
+            # On error, err on the side of caution but don't block
+            return True, {category: guardrail_failure_details(e) for category in categories}
+        
+        if verdicts is None:
+            return None
+        
+        risk_details = {}
+        for category in categories:
+            is_risky = verdicts[category]
+            risk_details[category] = {
+                "risky": is_risky,
+                "response": "yes" if is_risky else "no",
+                "description": GUARDRAIL_CATEGORIES.get(category, "Unknown category")
+            }
+            if is_risky:
+                print(f"⚠️ Guardrail detected risk in category '{category}'")
+        
+        overall_safe = not any(details["risky"] for details in risk_details.values())
+        if overall_safe:
+            print(f"✅ Guardrail check passed for categories {', '.join(categories)}")
+        return overall_safe, risk_details
+
+    def _check_guardrail_category(self, text, category, timeout, cancel=None):
+        """Run a single guardrail category check. Returns the risk_details entry for it."""
+        try:
+            result = self.ollama.generate(
+                self.guardrail_model,
+                text,
+                system=category,  # Category as system prompt
+                keep_alive=self.model_residency.keep_alive_for(self.guardrail_model),
+                options=GUARDRAIL_OPTIONS,
+                timeout=timeout,
+                cancel=cancel,
+            )
+            guardrail_response = result.get("response", "").strip().lower()
+            
+            # Granite Guardian returns "yes" for risky content, "no" for safe content
+            is_risky = guardrail_response.startswith("yes")
+            
+            if is_risky:
+                print(f"⚠️ Guardrail detected risk in category '{category}': {guardrail_response}")
+            else:
+                print(f"✅ Guardrail check passed for category '{category}'")
+            return {
+                "risky": is_risky,
+                "response": guardrail_response,
+                "description": GUARDRAIL_CATEGORIES.get(category, "Unknown category")
+            }
+                
+        except OllamaCancelled:
+            raise  # Abandoned by the caller; nobody reads this result
+        except Exception as e:
+            print(f"❌ Guardrail check error for category '{category}': {e}")
+            # On error, err on the side of caution but don't block
+            return guardrail_failure_details(e)
+
     def handle_guardrail_violation(self, text, risk_details, is_prompt=True):
         """Handle when guardrail detects risky content."""
         content_type = "prompt" if is_prompt else "response"
@@ -1275,63 +1333,17 @@ How can I assist you with your research in a constructive way?"""
         user_text_lower = user_text.strip().lower()
         return any(user_text_lower.startswith(starter) for starter in new_topic_starters)
 
-    def handle_user_query(self, user_text):
+    def handle_user_query(self, user_text, cancel=None, intents=None):
+        if cancel is None:
+            cancel = CancelToken()
         # If the user starts a new topic, reset the conversation history except for the system prompt
         if self.is_new_topic(user_text):
             self.conversation_history = []
         
-        # Guardrail check for user prompt
-        if self.guardrail_enabled and self.guardrail_prompt_check:
-            print("🛡️ Running guardrail check on user prompt...")
-            is_safe, risk_details = self.check_guardrail(user_text)
-            
-            if not is_safe:
-                # Handle guardrail violation
-                warning_msg = self.handle_guardrail_violation(user_text, risk_details, is_prompt=True)
-                if warning_msg and self.is_generating:
-                    # Update the thinking message with the warning
-                    if self.messages and self.messages[-1][1] in ["🤔 Thinking...", "👁️ Looking at the screen... then thinking..."]:
-                        self.messages[-1] = ("assistant", warning_msg)
-                    GLib.idle_add(self.update_message, self.thinking_row, "assistant", warning_msg)
-                GLib.idle_add(self._restore_input_state)
-                return
-            else:
-                print("✅ User prompt passed guardrail checks")
-        
-        self.conversation_history.append({"role": "user", "content": user_text})
-        
-        # Check for help requests first
-        help_keywords = [
-            "help", "help me", "i need help", "can you help", "please help", "assist me",
-            "i'm stuck", "what should i do", "how do i", "i don't know", "confused",
-            "trouble", "problem", "issue", "stuck", "lost", "guide me", "show me",
-            "explain", "what next", "next step", "what now", "i need assistance",
-            "support", "tutorial", "walkthrough", "step by step", "guide", "instructions"
-        ]
-        is_help_request = any(keyword in user_text.lower() for keyword in help_keywords)
-        
-        # Check for vision-related queries with expanded keywords
-        vision_keywords = [
-            # Direct vision requests
-            "what do you see", "describe the screen", "what's on screen", "analyze the image",
-            "look at", "see on", "visible", "screen shows", "what's displayed", "current view",
-            "what am i looking at", "describe what", "analyze what", "explain the screen",
-            "interpret the", "what's happening", "screen content", "desktop shows",
-            
-            # Scientific analysis requests
-            "analyze this", "what's in this", "examine this", "review this", "check this",
-            "interpret this", "explain this visualization", "describe this plot", "analyze this graph",
-            "what does this show", "what's this data", "explain this chart", "read this",
-            
-            # UI/Interface requests  
-            "what's open", "what applications", "what windows", "what programs", "current state",
-            "desktop state", "interface", "gui", "user interface", "what's running",
-            
-            # General observation requests
-            "observe", "inspect", "examine", "review", "check", "survey", "study",
-            "what can you tell me about", "what information", "what details"
-        ]
-        is_vision_query = any(keyword in user_text.lower() for keyword in vision_keywords)
+        if intents is None:
+            intents = self.intent_router.classify(user_text)
+        is_help_request = "help" in intents
+        is_vision_query = "vision" in intents
         
         # For help requests, always capture screen to provide contextual assistance
         if is_help_request:
@@ -1343,93 +1355,195 @@ How can I assist you with your research in a constructive way?"""
             print(f"🔍 Vision query detected: '{user_text}'")
             print("📸 Will use two-stage process: Vision model → Text model")
         
-        # Auto-capture screenshot for vision queries
-        if is_vision_query:
-            print(f"Vision query detected: '{user_text}'")
-            try:
-                # Simple direct call - if it fails, we'll handle it gracefully
-                img_base64, width, height = capture_and_process_screen()
-                if img_base64:
-                    self.current_screenshot = img_base64
-                    print(f"Auto-captured screenshot: {width}x{height}")
-                else:
-                    print("Screenshot capture failed, proceeding without vision")
+        # Help requests first (with vision), then web search, tools, system, memory, launch
+        route = self.intent_router.route(intents)
+        
+        # Independent stages overlap; the response waits for everything it needs
+        pipeline = TurnPipeline(cancel_token=cancel)
+        
+        if self.guardrail_enabled and self.guardrail_prompt_check:
+            def prompt_guardrail_stage(inputs):
+                print("🛡️ Running guardrail check on user prompt...")
+                is_safe, risk_details = self.check_guardrail(user_text, cancel=cancel)
+                if not is_safe:
+                    pipeline.cancel()
+                return is_safe, risk_details
+            pipeline.add("guardrail", prompt_guardrail_stage)
+        
+        uses_vision = is_vision_query and route in ("help", "generate")
+        if uses_vision:
+            def screenshot_stage(inputs):
+                # Auto-capture screenshot for vision queries
+                self.current_screenshot_hash = None
+                self.current_screenshot_tiles = []
+                try:
+                    region = self.get_focus_window_region() if self.vision_capture_window else None
+                    img_base64, width, height, self.current_screenshot_hash, self.current_screenshot_tiles = \
+                        capture_and_process_screen(self.vision_encoding, region, self.vision_tiling)
+                    if img_base64:
+                        self.current_screenshot = img_base64
+                        print(f"Auto-captured screenshot: {width}x{height}")
+                    else:
+                        print("Screenshot capture failed, proceeding without vision")
+                        self.current_screenshot = None
+                except Exception as e:
+                    print(f"Screenshot capture error: {e}")
                     self.current_screenshot = None
-            except Exception as e:
-                print(f"Screenshot capture error: {e}")
-                self.current_screenshot = None
+                return self.current_screenshot
+            pipeline.add("screenshot", screenshot_stage)
         
-        # Handle help requests first (with vision)
-        if is_help_request:
-            response = self.handle_help_request(user_text)
-        # Handle online search requests by launching Firefox
-        elif any(x in user_text.lower() for x in ["search the web", "browse the web", "find online", "web result", "look up", "search online", "search internet", "web search", "online search", "internet search", "about", "what is", "tell me about", "information about", "research about", "news", "latest news", "recent news", "headlines", "breaking news", "current events"]):
-            response = self.launch_firefox_search(user_text)
-        elif any(x in user_text.lower() for x in ["what is installed", "what tools", "what software", "what can you do", "available tools", "list apps", "list software"]):
-            response = self.scan_installed_tools()
-        elif any(x in user_text.lower() for x in ["system status", "system info", "system resources", "resource usage", "processes", "memory usage", "cpu usage", "disk usage", "system performance", "system health", "system monitoring", "top processes", "running processes", "system load"]):
-            response = self.handle_system_query(user_text)
-        elif any(x in user_text.lower() for x in ["ram", "memory", "how much ram", "memory info", "memory usage", "total memory", "available memory", "memory status"]):
-            response = self.handle_memory_query(user_text)
-        elif any(x in user_text.lower() for x in ["launch", "start", "open", "run application", "execute", "start program"]):
-            response = self.handle_application_launch(user_text)
-        else:
-            response = self.generate_response(use_vision=is_vision_query)
+        if route in ("help", "system", "generate") and self.mcp_manager and self.mcp_context_enabled:
+            def mcp_refresh_stage(inputs):
+                try:
+                    self.refresh_mcp_context()
+                except Exception as e:
+                    # The response goes ahead with the last context rather than being skipped
+                    print(f"MCP context refresh error: {e}")
+            pipeline.add("mcp_refresh", mcp_refresh_stage)
+        
+        if uses_vision:
+            def before_vision_model():
+                # Describing the screen speculatively is only worth it if it doesn't
+                # mean loading the vision model for a prompt the guardrail may reject
+                if pipeline.has("guardrail") and not self.model_residency.is_resident(self.vision_model):
+                    pipeline.result("guardrail")
+                return not cancel.cancelled
+            
+            def vision_stage(inputs):
+                if not inputs.get("screenshot"):
+                    return None
+                return self.get_vision_description(cancel=cancel, before_model=before_vision_model)
+            pipeline.add("vision", vision_stage, after=["screenshot"])
+        
+        def respond_stage(inputs):
+            self.append_history("user", user_text)
+            vision_description = inputs.get("vision")
+            if route == "help":
+                return self.handle_help_request(user_text, vision_description=vision_description, cancel=cancel)
+            if route == "search":
+                return self.launch_firefox_search(user_text)
+            if route == "tools":
+                return self.scan_installed_tools()
+            if route == "system":
+                return self.handle_system_query(user_text, refresh=False)
+            if route == "memory":
+                return self.handle_memory_query(user_text)
+            if route == "launch":
+                return self.handle_application_launch(user_text)
+            return self.generate_response(use_vision=uses_vision, vision_description=vision_description, cancel=cancel)
+        pipeline.add("respond", respond_stage, after=["guardrail", "screenshot", "mcp_refresh", "vision"])
+        
+        pipeline.start()
+        is_safe, risk_details = pipeline.result("guardrail", (True, {}))
+        if not is_safe:
+            # Handle guardrail violation
+            warning_msg = self.handle_guardrail_violation(user_text, risk_details, is_prompt=True)
+            if warning_msg and self.is_generating:
+                # Update the thinking message with the warning
+                if self.messages and self.messages[-1][1] in ["🤔 Thinking...", "👁️ Looking at the screen... then thinking..."]:
+                    self.messages[-1] = ("assistant", warning_msg)
+                GLib.idle_add(self.update_message, self.thinking_message_id, "assistant", warning_msg)
+            GLib.idle_add(self._restore_input_state)
+            pipeline.wait()
+            print(f"⏱️ Turn stages: {pipeline.timing_summary()}")
+            return
+        elif pipeline.has("guardrail"):
+            print("✅ User prompt passed guardrail checks")
+        
+        response = pipeline.result("respond")
+        print(f"⏱️ Turn stages: {pipeline.timing_summary()}")
+        # The respond stage failed or was skipped (the error is in the log)
+        response_failed = response is None
+        if response_failed:
+            response = "Error: No response could be produced for this message. Please try again."
         
         # Guardrail check for assistant response
-        if self.guardrail_enabled and self.guardrail_response_check and response and self.is_generating:
-            print("🛡️ Running guardrail check on assistant response...")
-            is_safe, risk_details = self.check_guardrail(response)
+        response_flagged = False
+        if (self.guardrail_enabled and self.guardrail_response_check and response and not response_failed
+                and not cancel.cancelled):
+            verdict = self.stream_guardrail_verdict
+            if verdict and verdict[0] == response:
+                # Already classified window by window while it streamed
+                is_safe, risk_details = verdict[1], verdict[2]
+            else:
+                print("🛡️ Running guardrail check on assistant response...")
+                is_safe, risk_details = self.check_guardrail(response, cancel=cancel)
             
             if not is_safe:
                 # Handle guardrail violation in response
                 warning_msg = self.handle_guardrail_violation(response, risk_details, is_prompt=False)
                 if warning_msg:
                     response = warning_msg
+                    response_flagged = True
                     print("⚠️ Assistant response was flagged and replaced with warning")
             else:
                 print("✅ Assistant response passed guardrail checks")
+        self.stream_guardrail_verdict = None
         
-        if self.is_generating: # Check if stop was clicked
-            self.conversation_history.append({"role": "assistant", "content": response})
+        if cancel.cancelled:
+            # Stop was clicked; on_stop_clicked already restored the input and
+            # a newer turn may be running by now
+            return
+        
+        if self.is_generating:
+            if not response_failed:
+                self.append_history("assistant", response)
             # Update the thinking message with the actual response
             # Also update the messages list to replace the "Thinking..." message
-            if self.messages and self.messages[-1][1] in ["🤔 Thinking...", "👁️ Looking at the screen... then thinking..."]:
+            if response_flagged or self.messages and self.messages[-1][1] in ["🤔 Thinking...", "👁️ Looking at the screen... then thinking..."]:
                 self.messages[-1] = ("assistant", response)
-            # Only update if we haven't been streaming (for non-streaming responses)
-            if not hasattr(self, 'streaming_response') or not self.streaming_response:
-                GLib.idle_add(self.update_message, self.thinking_row, "assistant", response)
+            if response_flagged:
+                self.stream_chunks.clear()  # Don't render more of the flagged text
+            else:
+                # Render the chunks that arrived since the last timer tick, then the whole text once
+                GLib.idle_add(self.finish_streaming_message)
+            # Only update if we haven't been streaming (for non-streaming responses),
+            # or if the streamed text was flagged and has to be replaced
+            if response_flagged or not self.streamed_any:
+                GLib.idle_add(self.update_message, self.thinking_message_id, "assistant", response)
         
         GLib.idle_add(self._restore_input_state)
 
-    def build_prompt(self):
-        prompt = self.system_prompt + "\n\n"
+    def append_history(self, role, content):
+        """
+        Add a turn to conversation_history, keeping it bounded on every route.
+
+        The history only grows until it holds history_max_turns user turns, then
+        jumps back to the last history_min_turns rather than sliding every turn,
+        so consecutive /api/chat requests share their prefix (see build_messages).
+        """
+        history = self.conversation_history
+        history.append({"role": role, "content": content})
+        user_indexes = [i for i, msg in enumerate(history) if msg["role"] == "user"]
+        if len(user_indexes) > self.history_max_turns:
+            del history[:user_indexes[-self.history_min_turns]]
+
+    def build_messages(self):
+        """
+        Build the /api/chat message list: the static system prompt, the recent
+        history, and the real-time MCP context attached to the newest user message.
+
+        Everything that changes from turn to turn goes at the end, so each request
+        starts with the same bytes as the previous one and Ollama can reuse its
+        prompt cache instead of re-reading the system prompt.
+        """
+        messages = [{"role": "system", "content": self.system_prompt}]
+        messages += [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in self.conversation_history
+            if msg["role"] in ("user", "assistant")
+        ]
         
         # Add MCP context if available
-        if self.mcp_context_enabled and self.mcp_manager:
+        if self.mcp_context_enabled and self.mcp_manager and len(messages) > 1 and messages[-1]["role"] == "user":
             try:
                 mcp_context = self.get_mcp_context_summary()
-                prompt += f"## CURRENT SYSTEM CONTEXT (Real-time via MCP):\n{mcp_context}\n\n"
+                messages[-1]["content"] = (
+                    f"## CURRENT SYSTEM CONTEXT (Real-time via MCP):\n{mcp_context}\n\n{messages[-1]['content']}"
+                )
             except Exception as e:
                 print(f"Error adding MCP context to prompt: {e}")
-        
-        # Only include the last 2 user-assistant pairs for context
-        history = []
-        count = 0
-        for msg in reversed(self.conversation_history):
-            if msg["role"] == "assistant" or msg["role"] == "user":
-                history.append(msg)
-                if msg["role"] == "user":
-                    count += 1
-                if count == 2:
-                    break
-        for msg in reversed(history):
-            if msg["role"] == "user":
-                prompt += f"User: {msg['content']}\n"
-            else:
-                prompt += f"Assistant: {msg['content']}\n"
-        prompt += "Assistant:"
-        return prompt
+        return messages
 
     def web_search_and_summarize(self, query):
         try:
@@ -1865,25 +1979,54 @@ The AxonOS environment includes Firefox ESR for web browsing, and you can access
         except Exception as e:
             return f"Error scanning environment: {str(e)}"
     
-    def handle_system_query(self, user_text):
-        """Handle system-related queries using MCP"""
+    def get_focus_window_region(self):
+        """Geometry of the window the user is working in (not this one), or None"""
+        if not self.mcp_manager:
+            return None
+        loop = asyncio.new_event_loop()
+        try:
+            # One xprop call per capture; windows are only listed again once focus or stacking changes
+            state = loop.run_until_complete(self.mcp_manager._get_focus_state())
+            return self.focus_region_cache.lookup(state, lambda: self.find_focus_window_region(loop))
+        except Exception as e:
+            print(f"Could not list windows: {e}")
+            return None
+        finally:
+            loop.close()
+    
+    def find_focus_window_region(self, loop):
+        """List and probe the windows to find the focus window's geometry, or None"""
+        windows = loop.run_until_complete(self.mcp_manager._get_active_windows())
+        desktop = loop.run_until_complete(self.mcp_manager._get_current_desktop())
+        active_id = loop.run_until_complete(self.mcp_manager._get_active_window_id())
+        window = pick_focus_window(
+            windows, exclude_titles=["AxonOS Assistant"], desktop=desktop, active_id=active_id,
+            is_hidden=lambda window_id: loop.run_until_complete(self.mcp_manager._is_window_hidden(window_id))
+        )
+        if window is None:
+            return None
+        print(f"🪟 Capturing window '{window['title']}' ({window['width']}x{window['height']})")
+        return window_region(window)
+    
+    def refresh_mcp_context(self):
+        """Run an MCP OS context update to completion on the calling thread"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.mcp_manager._update_os_context())
+        finally:
+            loop.close()
+    
+    def handle_system_query(self, user_text, refresh=True):
+        """Handle system-related queries using MCP (refresh=False if the context was just updated)"""
         try:
             if not self.mcp_manager or not self.mcp_context_enabled:
                 return "MCP system monitoring is not available. Please check the system status."
             
-            # Force a fresh system context update for better accuracy
-            print("🔄 Forcing fresh system context update for query...")
-            
-            # Run async context update in a thread
-            def run_async_context_update():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    loop.run_until_complete(self.mcp_manager._update_os_context())
-                finally:
-                    loop.close()
-            
-            run_async_context_update()
+            if refresh:
+                # Force a fresh system context update for better accuracy
+                print("🔄 Forcing fresh system context update for query...")
+                self.refresh_mcp_context()
             
             # Get current system context
             context_summary = self.get_mcp_context_summary()
@@ -2110,15 +2253,14 @@ Firefox should open shortly with search results. If you encounter any issues, tr
         except Exception as e:
             return f"Error launching Firefox search: {str(e)}"
 
-    def handle_help_request(self, user_text):
+    def handle_help_request(self, user_text, vision_description=None, cancel=None):
         """Handle help requests with contextual screen analysis"""
         try:
             print(f"🆘 Processing help request: '{user_text}'")
             
             # Get vision description of current screen
-            vision_description = None
-            if self.current_screenshot:
-                vision_description = self.get_vision_description(user_text)
+            if vision_description is None and self.current_screenshot:
+                vision_description = self.get_vision_description(cancel=cancel)
             
             # Create a comprehensive help prompt
             help_prompt = f"""You are AxonOS Assistant, providing contextual help to a user. The user has asked for help with: "{user_text}"
@@ -2154,8 +2296,8 @@ RESPONSE FORMAT:
 
 Remember: Be encouraging, specific, and focus on helping the user achieve their scientific research goals using AxonOS capabilities."""
 
-            # Generate contextual help response
-            response = self.generate_response(prompt_override=help_prompt, use_vision=True)
+            # Generate contextual help response (the vision description is already in the prompt)
+            response = self.generate_response(prompt_override=help_prompt, cancel=cancel)
             
             if not response or response.strip() == "":
                 # Fallback response if AI generation fails
@@ -2357,283 +2499,239 @@ Please specify which application you'd like to launch, and I'll help you get sta
         except Exception as e:
             return f"Error handling application launch: {str(e)}"
 
-    def get_vision_description(self, user_query):
-        """Get vision description from vision model to feed to text model"""
+    def get_vision_description(self, cancel=None, before_model=None):
+        """
+        Get vision description from vision model to feed to text model.
+        The description does not depend on the question (the text model gets that),
+        so a description of a near-identical recent screen is reused instead; otherwise
+        before_model() (if given) is called first and may return False to skip the model.
+        """
         try:
             if not self.current_screenshot:
                 return None
+            
+            screen_hash = self.current_screenshot_hash
+            if screen_hash is not None:
+                cached = self.vision_cache.get(screen_hash)
+                if cached:
+                    print(f"♻️ Screen unchanged - reusing vision description ({len(cached)} characters)")
+                    return cached
+            if before_model is not None and not before_model():
+                return None
                 
             # Create a focused prompt for vision analysis
-            vision_prompt = f"""Analyze this screenshot and provide a detailed description of what you see. Focus on:
+            vision_prompt = """Analyze this screenshot and provide a detailed description of what you see. Focus on:
 - Visual elements, interfaces, applications, and content
 - Any data, charts, graphs, or scientific visualizations
 - Text content that's visible and readable
 - Overall layout and context
 
-User's question: {user_query}
+Provide a comprehensive visual description that will help answer questions about this screen:"""
 
-Provide a comprehensive visual description that will help answer their question:"""
-
-            data = {
-                "model": self.vision_model,
-                "prompt": vision_prompt,
-                "images": [self.current_screenshot],
-                "stream": False  # Non-streaming for vision preprocessing
-            }
-            
             print(f"🔍 Stage 1: Getting vision description from {self.vision_model}...")
-            response = requests.post(self.ollama_url, json=data, stream=False)
-            
-            if response.status_code == 200:
-                json_response = response.json()
-                vision_description = json_response.get("response", "")
-                print(f"✅ Vision description received: {len(vision_description)} characters")
-                print(f"📝 Preview: {vision_description[:100]}...")
-                return vision_description
-            else:
-                print(f"Vision model error: {response.status_code}")
+            # Streamed so the deadline and length cap can end it early. The deadline
+            # timer cancels a token of its own, which closes the stream even while it
+            # waits for a stalled model; the read timeout covers the wait for headers.
+            started = time.monotonic()
+            vision_cancel = cancel.child() if cancel is not None else CancelToken()
+            deadline_timer = threading.Timer(self.vision_deadline, vision_cancel.cancel)
+            deadline_timer.daemon = True
+            deadline_timer.start()
+            parts = []
+            length = 0
+            done = False
+            try:
+                stream = self.ollama.generate_stream(
+                    self.vision_model,
+                    vision_prompt,
+                    images=[self.current_screenshot] + self.current_screenshot_tiles,
+                    keep_alive=self.model_residency.keep_alive_for(self.vision_model),
+                    options={"num_predict": self.vision_max_chars // 3},  # Server-side cap, ~3 chars per token
+                    timeout=(3.05, self.vision_deadline),
+                    should_stop=lambda: length >= self.vision_max_chars,
+                    cancel=vision_cancel,
+                )
+                try:
+                    for chunk in stream:
+                        parts.append(chunk.get("response", ""))
+                        length += len(parts[-1])
+                        done = chunk.get("done", False)
+                except OllamaError as e:
+                    if not parts:
+                        raise
+                    print(f"⚠️ Vision stream ended early ({e}) - using the partial description")
+                finally:
+                    stream.close()
+            except OllamaCancelled:
+                if cancel is not None and cancel.cancelled:
+                    raise
+                # The deadline passed before the model answered at all
+            finally:
+                deadline_timer.cancel()
+            vision_description = "".join(parts)[:self.vision_max_chars]
+            if cancel is not None and cancel.cancelled:
+                print("🛑 Vision description cancelled")
                 return None
+            if done or length >= self.vision_max_chars:
+                if screen_hash is not None:
+                    self.vision_cache.put(screen_hash, vision_description)
+            elif vision_cancel.cancelled:
+                # Partial descriptions are used for this turn but not cached
+                print(f"⏱️ Vision deadline of {self.vision_deadline}s reached - using the partial description")
+            print(f"✅ Vision description received: {len(vision_description)} characters in {time.monotonic() - started:.1f}s")
+            print(f"📝 Preview: {vision_description[:100]}...")
+            return vision_description
                 
+        except OllamaCancelled:
+            print("🛑 Vision description cancelled")
+            return None
         except Exception as e:
             print(f"Error getting vision description: {e}")
             return None
 
-    def generate_response(self, prompt_override=None, use_vision=False):
+    def generate_response(self, prompt_override=None, use_vision=False, vision_description=None, cancel=None):
         try:
             # Check if required attributes are initialized
             if not hasattr(self, 'text_model') or self.text_model is None:
                 print("Error: text_model is not initialized")
                 return "Error: AI model not properly initialized. Please restart the assistant."
             
-            if not hasattr(self, 'ollama_url') or self.ollama_url is None:
-                print("Error: ollama_url is not initialized")
+            if not hasattr(self, 'ollama') or self.ollama is None:
+                print("Error: Ollama client is not initialized")
                 return "Error: Ollama service URL not properly initialized. Please restart the assistant."
             
-            prompt = prompt_override if prompt_override is not None else self.build_prompt()
+            if prompt_override is not None:
+                messages = [{"role": "user", "content": prompt_override}]
+            else:
+                messages = self.build_messages()
             
-            # If this is a vision query, first get vision description
-            if use_vision and self.current_screenshot:
-                print("Vision query detected - getting visual description first...")
-                vision_description = self.get_vision_description(self.conversation_history[-1]["content"])
+            # If this is a vision query, first get vision description (unless the turn pipeline already did)
+            if use_vision and (vision_description or self.current_screenshot):
+                if vision_description is None:
+                    print("Vision query detected - getting visual description first...")
+                    vision_description = self.get_vision_description(cancel=cancel)
                 
                 if vision_description:
-                    # Enhance the prompt with vision context
-                    enhanced_prompt = f"""{prompt}
+                    # Enhance the latest message with vision context
+                    messages[-1]["content"] = f"""{messages[-1]['content']}
 
 VISUAL CONTEXT: The user is asking about something visual. Here's what I can see in the current screenshot:
 
 {vision_description}
 
 Please answer the user's question using this visual information along with your knowledge."""
-                    prompt = enhanced_prompt
                     print("Enhanced prompt with vision context created")
                 else:
                     print("Vision description failed, proceeding with text-only")
             
             # Always use text model for final response
-            data = {
-                "model": self.text_model,
-                "prompt": prompt,
-                "think": False, # Set this to true if the model supports thinking on Ollama
-                "stream": True
-            }
             print(f"Using text model {self.text_model} for final response")
-            print(f"Ollama URL: {self.ollama_url}")
-            print(f"Prompt length: {len(prompt)} characters")
+            print(f"Ollama URL: {self.ollama.base_url}")
+            print(f"Prompt length: {sum(len(m['content']) for m in messages)} characters in {len(messages)} messages")
             
-            # Test Ollama connection first
-            try:
-                test_response = requests.get("http://localhost:11434/api/tags", timeout=5)
-                if test_response.status_code != 200:
-                    print(f"Ollama connection test failed: {test_response.status_code}")
-                    return "Error: Cannot connect to Ollama service. Please ensure Ollama is running and the command-r7b model is loaded."
-            except Exception as e:
-                print(f"Ollama connection test failed: {e}")
+            # Cached health state, kept current by normal requests
+            if not self.ollama.is_healthy():
+                print("Ollama connection test failed")
                 return "Error: Cannot connect to Ollama service. Please ensure Ollama is running and the command-r7b model is loaded."
             
-            response = requests.post(self.ollama_url, json=data, stream=True)
-            print(f"Response status code: {response.status_code}")
-            if response.status_code != 200:
-                print(f"Response text: {response.text}")
-                return f"Error: HTTP {response.status_code} - {response.text}"
-            if response.status_code == 200:
-                full_response = ""
-                for line in response.iter_lines():
-                    if not self.is_generating:  # Check if stop was clicked
-                        break
-                    if line:
-                        try:
-                            json_response = json.loads(line.decode('utf-8'))
-                            # Both text and vision models use the same response format
-                            chunk = json_response.get("response", "")
-                            if chunk:
-                                full_response += chunk
-                                print(f"Streaming chunk: {chunk[:50]}...")  # Debug print
-                                # Update UI in real-time during streaming
-                                GLib.idle_add(self.update_streaming_message, chunk)
-                            
-                            # Check if this is the final chunk
-                            if json_response.get("done", False):
-                                break
-                        except Exception as e:
-                            print(f"Error parsing JSON line: {e}")
-                            continue
-                return full_response if full_response else "(No response)"
-            return "Error: Could not generate response"
+            try:
+                stream = self.ollama.chat_stream(
+                    self.text_model,
+                    messages,
+                    think=False,  # Set this to true if the model supports thinking on Ollama
+                    keep_alive=self.model_residency.keep_alive_for(self.text_model),
+                    should_stop=lambda: not self.is_generating,  # Stop clicked
+                    cancel=cancel,  # Closes the stream as soon as the turn is cancelled
+                )
+            except OllamaCancelled:
+                return "(Cancelled)"
+            except OllamaError as e:
+                print(f"Response error: {e}")
+                return f"Error: {e}"
+            
+            full_response = ""
+            stream_chunks = self.stream_chunks  # This turn's buffer, drained by the UI timer
+            stream_guardrail = None
+            if self.guardrail_enabled and self.guardrail_response_check and self.guardrail_stream_check:
+                stream_guardrail = StreamingGuardrail(lambda text: self.check_guardrail(text, cancel=cancel))
+            for json_response in stream:
+                if stream_guardrail and stream_guardrail.flagged.is_set():
+                    print("⚠️ Streaming guardrail flagged the response - stopping generation")
+                    break
+                chunk = json_response.get("message", {}).get("content", "")
+                if chunk:
+                    full_response += chunk
+                    if DEBUG_STREAMING:
+                        print(f"Streaming chunk: {chunk[:50]}...")
+                    # Update UI in real-time during streaming
+                    stream_chunks.append(chunk)
+                    self.streamed_any = True
+                    if stream_guardrail:
+                        stream_guardrail.feed(full_response)
+            # Closing the stream makes Ollama stop generating if we broke out early
+            stream.close()
+            if stream_guardrail:
+                is_safe, risk_details = stream_guardrail.finish(full_response)
+                self.stream_guardrail_verdict = (full_response, is_safe, risk_details)
+            return full_response if full_response else "(No response)"
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def update_streaming_message(self, chunk):
-        """Update the streaming message with new chunk of text"""
-        print(f"update_streaming_message called with chunk: {chunk[:30]}...")
+    def _drain_stream_chunks(self):
+        """Main-loop timer: render whatever the worker streamed since the last tick"""
         if not self.is_generating:
-            print("Not generating, returning")
-            return
+            self.stream_chunks.clear()
+            self.stream_render_source = None
+            return False
+        self.flush_stream_chunks()
+        return True
+
+    def flush_stream_chunks(self):
+        """Append all buffered chunks to the streaming message in one render"""
+        chunks = []
+        while self.stream_chunks:
+            chunks.append(self.stream_chunks.popleft())
+        if not chunks or not self.is_generating:
+            return False
         
-        self.streaming_response += chunk
-        print(f"Total streaming response so far: {len(self.streaming_response)} chars")
+        self.streaming_response += "".join(chunks)
+        if DEBUG_STREAMING:
+            print(f"Rendering {len(chunks)} chunks, {len(self.streaming_response)} chars so far")
         # Update the UI with JavaScript injection for better performance
-        self.update_streaming_webview(self.streaming_response)
+        self.render_streaming_message(self.streaming_response)
         # Also update the messages list
         if self.messages and self.messages[-1][0] == "assistant":
             self.messages[-1] = ("assistant", self.streaming_response)
+        return False
 
-    def update_streaming_webview(self, full_text):
-        """Update the streaming WebView using JavaScript for better performance"""
-        if hasattr(self, 'streaming_webview') and self.streaming_webview:
+    def finish_streaming_message(self):
+        """
+        Flush the last chunks and render the complete response in one pass. Blocks
+        are rendered separately while streaming, so reference links and footnotes
+        defined in a later block only resolve here.
+        """
+        self.flush_stream_chunks()
+        if self.streamed_any and self.is_generating and self.streaming_message_id is not None:
+            self.transcript.update(self.streaming_message_id, "assistant", self.streaming_response)
+        return False
+
+    def render_streaming_message(self, full_text):
+        """
+        Update the streaming message in place. Completed markdown blocks are
+        rendered once and appended; only the unfinished tail is replaced.
+        """
+        if self.streaming_message_id is not None:
             try:
-                # Convert markdown to HTML
-                html_content = markdown.markdown(safe_decode(full_text))
-                # Properly escape for JavaScript string literal
-                escaped_html = html_content.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
-                # Update the content using JavaScript and then recalculate height
-                js_code = f'''
-                var textElement = document.querySelector(".text");
-                if (textElement) {{
-                    textElement.innerHTML = "{escaped_html}";
-                }}
-                document.body.scrollHeight;
-                '''
-                print(f"Executing JS: {js_code[:100]}...")  # Debug print
-                self.streaming_webview.run_javascript(
-                    js_code, 
-                    None, 
-                    lambda webview, result, user_data: self.update_streaming_height(webview, result),
-                    None
-                )
+                done_html, tail_html = self.stream_renderer.update(full_text)
+                if DEBUG_STREAMING:
+                    print(f"Streaming {len(done_html)} + {len(tail_html)} chars of HTML into {self.streaming_message_id}")
+                self.transcript.stream(self.streaming_message_id, done_html, tail_html)
             except Exception as e:
-                print(f"Error updating streaming webview: {e}")
+                print(f"Error updating streaming message: {e}")
 
-    def update_streaming_height(self, webview, result):
-        """Update the height of the streaming WebView after content change"""
-        try:
-            value = webview.run_javascript_finish(result)
-            js_result = value.get_js_value()
-            height = js_result.to_int32()
-            print(f"Updating streaming WebView height to: {height}")
-            webview.set_size_request(-1, height)
-            # Scroll to bottom to follow the streaming text
-            adj = self.chat_listbox.get_parent().get_vadjustment()
-            GLib.idle_add(adj.set_value, adj.get_upper())
-        except Exception as e:
-            print(f"Error updating streaming height: {e}")
-
-    def update_message(self, row, sender, message):
-        """Update an existing message row with new content"""
-        # Remove the old content
-        for child in row.get_children():
-            row.remove(child)
-        
-        # Add new content
-        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
-        
-        webview = WebKit2.WebView()
-        webview.set_background_color(Gdk.RGBA(1, 1, 1, 1))  # White background
-        webview.set_size_request(-1, 1)  # Let it shrink to fit
-        
-        # Add policy decision handler to open links in Firefox
-        def on_decide_policy(webview, decision, decision_type, user_data):
-            if decision_type == WebKit2.PolicyDecisionType.NAVIGATION_ACTION:
-                navigation_action = decision.get_navigation_action()
-                request = navigation_action.get_request()
-                uri = request.get_uri()
-                
-                # Only handle http/https links
-                if uri.startswith(('http://', 'https://')):
-                    try:
-                        # Launch Firefox with the URL
-                        subprocess.Popen(['firefox', uri], 
-                                       stdout=subprocess.DEVNULL, 
-                                       stderr=subprocess.DEVNULL)
-                        print(f"🌐 Opened link in Firefox: {uri}")
-                        decision.ignore()
-                        return True
-                    except Exception as e:
-                        print(f"❌ Failed to open link in Firefox: {e}")
-                        # Fall back to default behavior
-                        decision.use()
-                        return True
-                else:
-                    # For non-http links, use default behavior
-                    decision.use()
-                    return True
-            return False
-        
-        webview.connect('decide-policy', on_decide_policy)
-
-        html_content = markdown.markdown(safe_decode(message))
-        full_style = get_improved_css_styles()
-
-        if sender == 'user':
-            body_html = f"""
-              <div class="message-container user">
-                <div class="bubble bubble-user"><div class="text">{html_content}</div></div>
-                <div class="avatar">👤</div>
-              </div>
-            """
-        else: # assistant
-            body_html = f"""
-              <div class="message-container assistant">
-                <div class="bubble bubble-assistant">
-                  <div class="avatar">🧑‍🔬</div>
-                  <div class="text">{html_content}</div>
-                </div>
-              </div>
-            """
-        
-        html = f'<html><head><meta charset="UTF-8">{full_style}</head><body>{body_html}</body></html>'
-        
-        print("HTML being loaded into WebView:")
-        print(html)
-        webview.load_html(html, "file:///")
-        webview.set_hexpand(True)
-        webview.set_vexpand(False)
-
-        def on_load_changed(webview, load_event):
-            if load_event == WebKit2.LoadEvent.FINISHED:
-                # This JS returns the height of the body content
-                webview.run_javascript(
-                    "document.body.scrollHeight;",
-                    None,
-                    lambda webview, result, user_data: set_webview_height(webview, result),
-                    None
-                )
-
-        def set_webview_height(webview, result):
-            value = webview.run_javascript_finish(result)
-            js_result = value.get_js_value()
-            height = js_result.to_int32()
-            print(f"Setting WebView height to: {height}")
-            webview.set_size_request(-1, height)
-
-        webview.connect("load-changed", on_load_changed)
-
-        hbox.pack_start(webview, True, True, 0)
-        
-        row.add(hbox)
-        row.show_all()
-        adj = self.chat_listbox.get_parent().get_vadjustment()
-        GLib.idle_add(adj.set_value, adj.get_upper())
+    def update_message(self, message_id, sender, message):
+        """Update an existing message bubble with new content"""
+        self.transcript.update(message_id, sender, message)
 
     def on_settings_clicked(self, widget):
         """Handle the settings button click event."""
@@ -2688,6 +2786,10 @@ Please answer the user's question using this visual information along with your
         response_check.set_active(self.guardrail_response_check)
         guardrail_box.pack_start(response_check, False, False, 0)
         
+        single_pass_check = Gtk.CheckButton(label="Score all categories in a single model call")
+        single_pass_check.set_active(self.guardrail_single_pass)
+        guardrail_box.pack_start(single_pass_check, False, False, 0)
+        
         # Categories selection
         categories_label = Gtk.Label("Risk Categories to Check:")
         categories_label.set_halign(Gtk.Align.START)
@@ -2733,6 +2835,35 @@ Please answer the user's question using this visual information along with your
         vision_model_box.pack_start(vision_model_entry, True, True, 0)
         models_box.pack_start(vision_model_box, False, False, 0)
         
+        # Screenshot encoding for the vision model
+        encoding_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        encoding_label = Gtk.Label("Screenshot Format:")
+        encoding_label.set_halign(Gtk.Align.START)
+        format_combo = Gtk.ComboBoxText()
+        for image_format in ENCODING_FORMATS:
+            format_combo.append(image_format, image_format)
+        format_combo.set_active_id(self.vision_encoding.format)
+        quality_label = Gtk.Label("Quality:")
+        quality_spin = Gtk.SpinButton.new_with_range(10, 100, 5)
+        quality_spin.set_value(self.vision_encoding.quality)
+        encoding_box.pack_start(encoding_label, False, False, 0)
+        encoding_box.pack_start(format_combo, True, True, 0)
+        encoding_box.pack_start(quality_label, False, False, 0)
+        encoding_box.pack_start(quality_spin, False, False, 0)
+        models_box.pack_start(encoding_box, False, False, 0)
+        
+        reduce_colors_check = Gtk.CheckButton(label="Reduce PNG screenshots to 256 colors")
+        reduce_colors_check.set_active(bool(self.vision_encoding.colors))
+        models_box.pack_start(reduce_colors_check, False, False, 0)
+        
+        capture_window_check = Gtk.CheckButton(label="Capture only the window I'm working in")
+        capture_window_check.set_active(self.vision_capture_window)
+        models_box.pack_start(capture_window_check, False, False, 0)
+        
+        tiling_check = Gtk.CheckButton(label="Send full-resolution tiles of large captures")
+        tiling_check.set_active(self.vision_tiling)
+        models_box.pack_start(tiling_check, False, False, 0)
+        
         models_frame.add(models_box)
         content_area.pack_start(models_frame, False, False, 0)
         
@@ -2745,8 +2876,16 @@ Please answer the user's question using this visual information along with your
             self.guardrail_model = model_entry.get_text()
             self.guardrail_prompt_check = prompt_check.get_active()
             self.guardrail_response_check = response_check.get_active()
+            self.guardrail_single_pass = single_pass_check.get_active()
             self.text_model = text_model_entry.get_text()
             self.vision_model = vision_model_entry.get_text()
+            self.vision_encoding.format = format_combo.get_active_id() or self.vision_encoding.format
+            self.vision_encoding.quality = quality_spin.get_value_as_int()
+            self.vision_encoding.colors = 256 if reduce_colors_check.get_active() else 0
+            self.vision_capture_window = capture_window_check.get_active()
+            self.vision_tiling = tiling_check.get_active()
+            # Cached descriptions came from the previous model and capture settings
+            self.vision_cache.clear()
             
             # Update categories
             self.guardrail_categories = [
@@ -2754,6 +2893,8 @@ Please answer the user's question using this visual information along with your
                 if check.get_active()
             ]
             
+            self.preload_models()
+            
             print(f"Settings updated - Guardrail enabled: {self.guardrail_enabled}")
             print(f"Active categories: {self.guardrail_categories}")
             
@@ -2775,8 +2916,13 @@ Please answer the user's question using this visual information along with your
         if response == Gtk.ResponseType.YES:
             self.conversation_history.clear()
             self.messages.clear()
+            self.message_ids.clear()
+            self.transcript_store.clear()
             self.current_screenshot = None  # Clear the screenshot
-            self.chat_listbox.foreach(lambda widget: self.chat_listbox.remove(widget))
+            self.current_screenshot_hash = None
+            self.current_screenshot_tiles = []
+            self.vision_cache.clear()
+            self.transcript.clear()
             welcome_msg = ("Hello! I am AxonOS Assistant, your AI-powered guide to decentralized science. "
                           "I can help you navigate the comprehensive scientific computing environment of AxonOS. "
                           "Try one of the suggested prompts below, or ask me anything about research workflows, "
@@ -2908,6 +3054,7 @@ if __name__ == "__main__":
     def on_window_destroy(widget):
         """Handle window destruction with MCP cleanup"""
         widget.cleanup_mcp()
+        widget.transcript_store.close()
         Gtk.main_quit()
     
     win.connect("destroy", on_window_destroy)
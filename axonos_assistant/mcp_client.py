@@ -514,14 +514,101 @@ class MCPClientManager:
             logger.error(f"Error getting network info: {e}")
         return {}
     
+    async def _get_window_stacking(self) -> List[int]:
+        """Get managed window IDs in stacking order, bottom to top"""
+        try:
+            result = await asyncio.create_subprocess_exec(
+                'xprop', '-root', '_NET_CLIENT_LIST_STACKING',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await result.communicate()
+            if result.returncode == 0 and '#' in stdout.decode():
+                ids = stdout.decode().split('#', 1)[1]
+                return [int(window_id.strip(), 16) for window_id in ids.split(',') if window_id.strip()]
+        except Exception as e:
+            logger.debug(f"xprop not available or error: {e}")
+        return []
+    
+    async def _get_focus_state(self) -> Optional[str]:
+        """
+        The root window's active window, stacking order and current workspace in one
+        xprop call, or None. Changes whenever the user switches, raises or closes a
+        window or changes workspace, so it can key a cached focus window lookup.
+        """
+        try:
+            result = await asyncio.create_subprocess_exec(
+                'xprop', '-root', '_NET_ACTIVE_WINDOW', '_NET_CLIENT_LIST_STACKING', '_NET_CURRENT_DESKTOP',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await result.communicate()
+            if result.returncode == 0:
+                return stdout.decode()
+        except Exception as e:
+            logger.debug(f"xprop not available or error: {e}")
+        return None
+    
+    async def _get_current_desktop(self) -> Optional[str]:
+        """Index of the current workspace as wmctrl -l reports it, or None if unknown"""
+        try:
+            result = await asyncio.create_subprocess_exec(
+                'wmctrl', '-d',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await result.communicate()
+            if result.returncode == 0:
+                for line in stdout.decode().splitlines():
+                    parts = line.split()
+                    if len(parts) > 1 and parts[1] == '*':
+                        return parts[0]
+        except Exception as e:
+            logger.debug(f"wmctrl not available or error: {e}")
+        return None
+    
+    async def _get_active_window_id(self) -> Optional[int]:
+        """ID of the window with input focus (_NET_ACTIVE_WINDOW), or None"""
+        try:
+            result = await asyncio.create_subprocess_exec(
+                'xprop', '-root', '_NET_ACTIVE_WINDOW',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await result.communicate()
+            if result.returncode == 0 and '#' in stdout.decode():
+                window_id = int(stdout.decode().split('#', 1)[1].split(',')[0].strip(), 16)
+                return window_id or None
+        except Exception as e:
+            logger.debug(f"xprop not available or error: {e}")
+        return None
+    
+    async def _is_window_hidden(self, window_id: int) -> bool:
+        """Whether the window is minimized (_NET_WM_STATE_HIDDEN)"""
+        try:
+            result = await asyncio.create_subprocess_exec(
+                'xprop', '-id', hex(window_id), '_NET_WM_STATE',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await result.communicate()
+            return result.returncode == 0 and '_NET_WM_STATE_HIDDEN' in stdout.decode()
+        except Exception as e:
+            logger.debug(f"xprop not available or error: {e}")
+        return False
+    
     async def _get_active_windows(self) -> List[Dict[str, Any]]:
-        """Get active windows information"""
+        """
+        Get active windows information. wmctrl results include geometry (x, y,
+        width, height) and a stacking position (higher is closer to the top,
+        -1 if unknown) so callers can locate the window the user works in.
+        """
         logger.debug("Starting active windows detection...")
         
         # Method 1: Try wmctrl
         try:
             result = await asyncio.create_subprocess_exec(
-                'wmctrl', '-l',
+                'wmctrl', '-lpG',
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
@@ -535,16 +622,30 @@ class MCPClientManager:
                 lines = stdout.decode().strip().split('\n')
                 logger.debug(f"wmctrl output lines: {len(lines)}")
                 
+                stacking = {window_id: position for position, window_id in
+                            enumerate(await self._get_window_stacking())}
+                
                 windows = []
                 for line in lines:
                     if line.strip():
-                        parts = line.split(None, 3)
-                        if len(parts) >= 4:
+                        # id, desktop, pid, x, y, width, height, host, title
+                        parts = line.split(None, 8)
+                        if len(parts) >= 8:
+                            try:
+                                x, y, width, height = (int(value) for value in parts[3:7])
+                                position = stacking.get(int(parts[0], 16), -1)
+                            except ValueError:
+                                continue
                             windows.append({
                                 'id': parts[0],
                                 'desktop': parts[1],
                                 'pid': parts[2],
-                                'title': parts[3]
+                                'title': parts[8] if len(parts) > 8 else '',
+                                'x': x,
+                                'y': y,
+                                'width': width,
+                                'height': height,
+                                'stacking': position
                             })
                 
                 logger.debug(f"✅ Found {len(windows)} windows via wmctrl")
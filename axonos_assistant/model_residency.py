@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Model residency manager for AxonOS Assistant
+
+The assistant uses three Ollama models per turn (guardrail, vision, text). On
+a CPU-only machine Ollama unloads and reloads them between stages unless told
+otherwise, and model load time dominates turn latency. This module preloads
+the models in the background, hands out a keep_alive per model based on how
+often it is used, and reports which models are currently resident so callers
+can order independent stages to avoid thrashing.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set
+
+from ollama_client import OllamaClient, OllamaError
+
+logger = logging.getLogger(__name__)
+
+# keep_alive tiers: a model used several times recently stays loaded longest,
+# one that has not been used for a while falls back to Ollama's default.
+HOT_KEEP_ALIVE = "60m"
+WARM_KEEP_ALIVE = "20m"
+COLD_KEEP_ALIVE = "5m"
+HOT_USES = 3  # Uses within USE_WINDOW that make a model hot
+USE_WINDOW = 30 * 60.0  # seconds
+
+
+def model_key(name: str) -> str:
+    """Ollama reports "model" and "model:latest" interchangeably"""
+    return name if ":" in name else f"{name}:latest"
+
+
+class ModelResidencyManager:
+    """Tracks model use and residency for one Ollama server"""
+
+    def __init__(self, client: OllamaClient, ps_ttl: float = 2.0):
+        self.client = client
+        self.ps_ttl = ps_ttl
+        self.uses: Dict[str, Deque[float]] = {}
+        self.pinned: Set[str] = set()
+        self._resident: Set[str] = set()  # model keys, as of the last /api/ps
+        self._resident_checked = 0.0
+        self.lock = threading.Lock()
+
+    def set_pinned(self, models: Iterable[str]):
+        """Models that are used on every turn and always get the hot keep_alive"""
+        with self.lock:
+            self.pinned = {model_key(model) for model in models}
+
+    def keep_alive_for(self, model: str, record_use: bool = True) -> str:
+        """Return the keep_alive to send with a request for model (and count the use)"""
+        key = model_key(model)
+        now = time.time()
+        with self.lock:
+            uses = self.uses.setdefault(key, deque(maxlen=HOT_USES))
+            recent = sum(1 for t in uses if now - t < USE_WINDOW)
+            if record_use:
+                uses.append(now)
+                recent += 1
+            # A request that reaches Ollama loads the model if needed; assume it is resident
+            self._resident.add(key)
+            if key in self.pinned or recent >= HOT_USES:
+                return HOT_KEEP_ALIVE
+            if recent > 1:
+                return WARM_KEEP_ALIVE
+            return COLD_KEEP_ALIVE
+
+    def resident_models(self, refresh: bool = False) -> Set[str]:
+        """Model keys currently loaded by Ollama (cached for ps_ttl seconds)"""
+        with self.lock:
+            fresh = time.monotonic() - self._resident_checked < self.ps_ttl
+            if fresh and not refresh:
+                return set(self._resident)
+        try:
+            running = self.client.running_models()
+        except OllamaError as e:
+            logger.warning(f"Could not list resident models: {e}")
+            with self.lock:
+                return set(self._resident)
+        resident = {model_key(entry.get("name") or entry.get("model", "")) for entry in running}
+        with self.lock:
+            self._resident = resident
+            self._resident_checked = time.monotonic()
+            return set(resident)
+
+    def is_resident(self, model: str) -> bool:
+        return model_key(model) in self.resident_models()
+
+    def preload(self, models: List[str], background: bool = True) -> Optional[threading.Thread]:
+        """Load models one by one (in the given order) with their keep_alive"""
+        def run():
+            for model in models:
+                if self.is_resident(model):
+                    continue
+                started = time.monotonic()
+                try:
+                    self.client.load(model, keep_alive=self.keep_alive_for(model, record_use=False))
+                    logger.info(f"Preloaded model {model} in {time.monotonic() - started:.1f}s")
+                except OllamaError as e:
+                    logger.warning(f"Could not preload model {model}: {e}")
+            self.resident_models(refresh=True)
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        thread.start()
+        return thread
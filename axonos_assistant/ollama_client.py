@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Shared Ollama client for AxonOS Assistant and Talk to K
+
+One pooled keep-alive HTTP session per Ollama server, a cached health state
+instead of a probe before every request, and thin wrappers around
+/api/generate and /api/chat (streaming and non-streaming) with per-call
+timeouts, cancellation and keep_alive control.
+
+A CancelToken groups the requests of one user turn: cancelling it closes
+every response still open under it, which makes Ollama stop generating and
+frees the model for the next request.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+# (connect, read) seconds. The read timeout is the longest silence tolerated
+# between streamed chunks, or the whole wait for a non-streaming answer.
+DEFAULT_TIMEOUT = (3.05, 300)
+
+Timeout = Union[float, tuple]
+
+
+class OllamaError(Exception):
+    """Ollama could not be reached or answered with an error status"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OllamaCancelled(OllamaError):
+    """The request was abandoned because its CancelToken was cancelled"""
+
+    def __init__(self, message: str = "Request cancelled"):
+        super().__init__(message)
+
+
+def _abort_response(response: requests.Response):
+    """
+    Close a response from another thread. close() alone does not wake a read
+    already blocked on the socket, so shut the connection's socket down first.
+    """
+    try:
+        connection = getattr(response.raw, "_connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is None:
+            # http.client drops the connection's socket once a close-delimited body starts
+            fp = getattr(getattr(response.raw, "_fp", None), "fp", None)
+            sock = getattr(getattr(fp, "raw", None), "_sock", None)
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # Already closed
+    try:
+        response.close()
+    except Exception as e:
+        logger.debug(f"Error closing cancelled response: {e}")
+
+
+class CancelToken:
+    """Cancellation shared by all requests made on behalf of one turn"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._responses: Set[requests.Response] = set()
+        self._children: Set["CancelToken"] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the turn and close every response still streaming under it"""
+        with self._lock:
+            self._event.set()
+            responses = list(self._responses)
+            self._responses.clear()
+            children = list(self._children)
+            self._children.clear()
+        for response in responses:
+            _abort_response(response)
+        for child in children:
+            child.cancel()
+
+    def child(self) -> "CancelToken":
+        """A token cancelled along with this one that can also be cancelled on its own (e.g. a stage deadline)"""
+        token = CancelToken()
+        with self._lock:
+            if not self._event.is_set():
+                self._children.add(token)
+                return token
+        token.cancel()
+        return token
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OllamaCancelled()
+
+    def _track(self, response: requests.Response):
+        with self._lock:
+            if not self._event.is_set():
+                self._responses.add(response)
+                return
+        response.close()
+        raise OllamaCancelled()
+
+    def _untrack(self, response: requests.Response):
+        with self._lock:
+            self._responses.discard(response)
+
+
+class OllamaClient:
+    """Client for one Ollama server, safe to share between threads"""
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, health_ttl: float = 30.0,
+                 unhealthy_ttl: float = 2.0, pool_size: int = 16):
+        self.base_url = base_url.rstrip("/")
+        self.health_ttl = health_ttl
+        self.unhealthy_ttl = unhealthy_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._healthy: Optional[bool] = None
+        self._health_checked = 0.0
+        self._health_lock = threading.Lock()
+
+    # Health
+
+    def _set_health(self, healthy: bool):
+        self._healthy = healthy
+        self._health_checked = time.monotonic()
+
+    def is_healthy(self, force: bool = False) -> bool:
+        """
+        Whether the server answered recently. Refreshed at most every health_ttl
+        seconds (unhealthy_ttl after a failure); every request also updates it.
+        """
+        with self._health_lock:
+            age = time.monotonic() - self._health_checked
+            ttl = self.health_ttl if self._healthy else self.unhealthy_ttl
+            if not force and self._healthy is not None and age < ttl:
+                return self._healthy
+            try:
+                response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
+                self._set_health(response.status_code == 200)
+            except requests.RequestException as e:
+                logger.warning(f"Ollama health check failed: {e}")
+                self._set_health(False)
+            return self._healthy
+
+    # Requests
+
+    def _post(self, path: str, payload: Dict[str, Any], stream: bool,
+              timeout: Optional[Timeout], cancel: Optional[CancelToken] = None) -> requests.Response:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, stream=stream,
+                                         timeout=timeout or DEFAULT_TIMEOUT)
+        except requests.ReadTimeout as e:
+            # The server accepted the request but is slow (e.g. still loading the model)
+            raise OllamaError(f"Ollama did not answer in time: {e}") from e
+        except requests.RequestException as e:
+            self._set_health(False)
+            raise OllamaError(f"Cannot reach Ollama at {self.base_url}: {e}") from e
+        self._set_health(True)
+        if response.status_code != 200:
+            text = response.text
+            response.close()
+            raise OllamaError(f"HTTP {response.status_code} - {text}", response.status_code)
+        if cancel is not None:
+            # Headers arrive with the first token; anything before that cannot be interrupted
+            cancel._track(response)
+        return response
+
+    @staticmethod
+    def _payload(model: str, stream: bool, keep_alive: Optional[Union[str, int]],
+                 options: Optional[Dict[str, Any]], extra: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {"model": model, "stream": stream}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+        payload.update({key: value for key, value in extra.items() if value is not None})
+        return payload
+
+    def _iter_stream(self, response: requests.Response, should_stop: Optional[Callable[[], bool]],
+                     cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield parsed stream lines; closing the response stops generation server-side.
+        Stops quietly when should_stop() returns True or cancel is cancelled.
+        """
+        lines = response.iter_lines()
+        try:
+            while True:
+                try:
+                    line = next(lines)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    if cancel is not None and cancel.cancelled:
+                        break  # The token closed the response under us
+                    if isinstance(e, requests.RequestException):
+                        raise OllamaError(f"Ollama stream interrupted: {e}") from e
+                    raise
+                if should_stop is not None and should_stop():
+                    break
+                if cancel is not None and cancel.cancelled:
+                    break
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"Skipping unparseable Ollama stream line: {e}")
+                    continue
+                if "error" in chunk:
+                    raise OllamaError(chunk["error"])
+                yield chunk
+                if chunk.get("done", False):
+                    break
+        finally:
+            if cancel is not None:
+                cancel._untrack(response)
+            response.close()
+
+    def _collect(self, response: requests.Response, cancel: CancelToken, chat: bool) -> Dict[str, Any]:
+        """Read a stream to the end and return its final chunk carrying the whole text"""
+        text = []
+        final: Dict[str, Any] = {}
+        for chunk in self._iter_stream(response, None, cancel):
+            text.append(chunk.get("message", {}).get("content", "") if chat else chunk.get("response", ""))
+            final = chunk
+        if cancel.cancelled:
+            raise OllamaCancelled()
+        if not final.get("done", False):
+            raise OllamaError("Ollama stream ended before the answer was complete")
+        if chat:
+            final["message"] = dict(final.get("message", {}), content="".join(text))
+        else:
+            final["response"] = "".join(text)
+        return final
+
+    def generate(self, model: str, prompt: str, system: Optional[str] = None,
+                 images: Optional[List[str]] = None, options: Optional[Dict[str, Any]] = None,
+                 keep_alive: Optional[Union[str, int]] = None, timeout: Optional[Timeout] = None,
+                 cancel: Optional[CancelToken] = None, **extra) -> Dict[str, Any]:
+        """
+        Non-streaming /api/generate; returns the response object ("response" holds the text).
+        With a cancel token the answer is streamed internally so cancelling can abort it;
+        a cancelled call raises OllamaCancelled.
+        """
+        stream = cancel is not None
+        payload = self._payload(model, stream, keep_alive, options,
+                                dict(extra, prompt=prompt, system=system, images=images))
+        response = self._post("/api/generate", payload, stream=stream, timeout=timeout, cancel=cancel)
+        if not stream:
+            return response.json()
+        return self._collect(response, cancel, chat=False)
+
+    def generate_stream(self, model: str, prompt: str, system: Optional[str] = None,
+                        images: Optional[List[str]] = None, options: Optional[Dict[str, Any]] = None,
+                        keep_alive: Optional[Union[str, int]] = None, timeout: Optional[Timeout] = None,
+                        should_stop: Optional[Callable[[], bool]] = None, cancel: Optional[CancelToken] = None,
+                        **extra) -> Iterator[Dict[str, Any]]:
+        """Streaming /api/generate; yields chunks until done, should_stop() returns True or cancel fires"""
+        payload = self._payload(model, True, keep_alive, options,
+                                dict(extra, prompt=prompt, system=system, images=images))
+        response = self._post("/api/generate", payload, stream=True, timeout=timeout, cancel=cancel)
+        return self._iter_stream(response, should_stop, cancel)
+
+    def chat(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None,
+             keep_alive: Optional[Union[str, int]] = None, timeout: Optional[Timeout] = None,
+             cancel: Optional[CancelToken] = None, **extra) -> Dict[str, Any]:
+        """Non-streaming /api/chat; the reply text is in ["message"]["content"] (cancel as for generate)"""
+        stream = cancel is not None
+        payload = self._payload(model, stream, keep_alive, options, dict(extra, messages=messages))
+        response = self._post("/api/chat", payload, stream=stream, timeout=timeout, cancel=cancel)
+        if not stream:
+            return response.json()
+        return self._collect(response, cancel, chat=True)
+
+    def chat_stream(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None,
+                    keep_alive: Optional[Union[str, int]] = None, timeout: Optional[Timeout] = None,
+                    should_stop: Optional[Callable[[], bool]] = None, cancel: Optional[CancelToken] = None,
+                    **extra) -> Iterator[Dict[str, Any]]:
+        """Streaming /api/chat; yields chunks until done, should_stop() returns True or cancel fires"""
+        payload = self._payload(model, True, keep_alive, options, dict(extra, messages=messages))
+        response = self._post("/api/chat", payload, stream=True, timeout=timeout, cancel=cancel)
+        return self._iter_stream(response, should_stop, cancel)
+
+    def load(self, model: str, keep_alive: Optional[Union[str, int]] = None,
+             timeout: Optional[Timeout] = None) -> Dict[str, Any]:
+        """Load a model into memory without generating anything (keep_alive=0 unloads it)"""
+        payload = self._payload(model, False, keep_alive, None, {})
+        response = self._post("/api/generate", payload, stream=False, timeout=timeout)
+        return response.json()
+
+    def running_models(self, timeout: Optional[Timeout] = 5) -> List[Dict[str, Any]]:
+        """Models currently loaded by the server (/api/ps)"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/ps", timeout=timeout)
+        except requests.RequestException as e:
+            self._set_health(False)
+            raise OllamaError(f"Cannot reach Ollama at {self.base_url}: {e}") from e
+        self._set_health(True)
+        if response.status_code != 200:
+            raise OllamaError(f"HTTP {response.status_code} - {response.text}", response.status_code)
+        return response.json().get("models", [])
+
+
+_clients: Dict[str, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_ollama_client(base_url: str = DEFAULT_OLLAMA_URL) -> OllamaClient:
+    """Get the process-wide client for base_url"""
+    base_url = base_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = OllamaClient(base_url)
+            _clients[base_url] = client
+        return client
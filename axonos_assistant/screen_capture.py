@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Screen capture for AxonOS Assistant vision queries
+
+Grabs the X root window in-process (mss over XShm/XGetImage, or Pillow's XCB
+grabber) straight into memory, and only falls back to the external
+xwd/scrot/gnome-screenshot tools, which go through temp files, when neither
+in-process backend works. A capture can be limited to a region of interest,
+normally the window the user is working in, so the vision model gets the
+pixels that matter at a higher effective resolution. Captures are then
+scaled and encoded for the vision model according to a VisionEncoding
+(resampling filter, JPEG/WebP/PNG, quality, optional palette reduction),
+optionally with full-resolution tiles of large regions.
+
+Run this module directly to benchmark every backend's capture-to-base64
+latency on the current display, and the encodings on one capture:
+
+    python3 screen_capture.py --runs 10
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import base64
+import io
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+try:
+    import mss
+except ImportError:  # Optional; the other backends still work without it
+    mss = None
+
+logger = logging.getLogger(__name__)
+
+SUBPROCESS_TIMEOUT = 10  # seconds, per external tool
+VISION_MAX_SIDE = 1344  # Largest image side the vision model takes
+MIN_REGION_SIDE = 64  # Smaller regions are not worth sending on their own
+MAX_TILES_PER_SIDE = 2
+# Seconds a focus window lookup is reused while the window manager's focus state is
+# unchanged; short, so a window moved or resized in place is picked up again soon
+FOCUS_REGION_TTL = 5.0
+
+Region = Tuple[int, int, int, int]  # left, top, width, height in root window coordinates
+
+
+class CaptureError(Exception):
+    """A capture backend is unavailable or failed"""
+
+
+def _clamp_region(region: Region, screen_width: int, screen_height: int) -> Region:
+    """Intersect region with the screen; raises CaptureError if little is left"""
+    left, top, width, height = region
+    right = min(screen_width, left + width)
+    bottom = min(screen_height, top + height)
+    left, top = max(0, left), max(0, top)
+    if right - left < MIN_REGION_SIDE or bottom - top < MIN_REGION_SIDE:
+        raise CaptureError(f"Region {region} is (mostly) off screen")
+    return left, top, right - left, bottom - top
+
+
+def _crop(image: Image.Image, region: Optional[Region]) -> Image.Image:
+    if region is None:
+        return image
+    left, top, width, height = _clamp_region(region, image.width, image.height)
+    return image.crop((left, top, left + width, top + height))
+
+
+def _capture_mss(region: Optional[Region] = None) -> Image.Image:
+    """
+    Root window or region via mss (XShm when available). The X connection is
+    opened and closed per capture: turn stages run on short-lived pool threads,
+    so a cached per-thread instance would leak a connection every turn.
+    """
+    if mss is None:
+        raise CaptureError("mss is not installed")
+    with mss.mss() as sct:
+        area = sct.monitors[0]  # Monitor 0 spans the whole root window
+        if region is not None:
+            left, top, width, height = _clamp_region(region, area["width"], area["height"])
+            area = {"left": area["left"] + left, "top": area["top"] + top, "width": width, "height": height}
+        shot = sct.grab(area)
+    # Decode the BGRX buffer into a new RGB image (one copy), dropping the padding byte
+    return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+
+def _capture_xcb(region: Optional[Region] = None) -> Image.Image:
+    """Root window via Pillow's built-in XCB grabber"""
+    try:
+        from PIL import ImageGrab
+        image = ImageGrab.grab(xdisplay=os.environ.get("DISPLAY"))
+    except (ImportError, OSError) as e:
+        raise CaptureError(f"XCB capture unavailable: {e}") from e
+    return _crop(image, region)
+
+
+def _run_tool(args: List[str], suffix: str, convert: bool = False) -> Image.Image:
+    """Run an external screenshot tool that writes to a temp file and load the result"""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+        temp_path = tmp_file.name
+    paths = [temp_path]
+    try:
+        result = subprocess.run(args + [temp_path], capture_output=True, timeout=SUBPROCESS_TIMEOUT)
+        if result.returncode != 0 or not os.path.exists(temp_path):
+            raise CaptureError(f"{args[0]} exited with {result.returncode}")
+        if convert:
+            # XWD to PNG using ImageMagick; Pillow cannot read every XWD variant
+            paths.append(temp_path + ".png")
+            result = subprocess.run(["convert", temp_path, paths[-1]],
+                                    capture_output=True, timeout=SUBPROCESS_TIMEOUT)
+            if result.returncode != 0:
+                raise CaptureError(f"convert exited with {result.returncode}")
+        with Image.open(paths[-1]) as image:
+            image.load()
+            return image
+    except (OSError, subprocess.SubprocessError) as e:
+        raise CaptureError(f"{args[0]} failed: {e}") from e
+    finally:
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _capture_xwd(region: Optional[Region] = None) -> Image.Image:
+    return _crop(_run_tool(["xwd", "-root", "-silent", "-out"], ".xwd", convert=True), region)
+
+
+def _capture_scrot(region: Optional[Region] = None) -> Image.Image:
+    return _crop(_run_tool(["scrot", "-o"], ".png"), region)
+
+
+def _capture_gnome_screenshot(region: Optional[Region] = None) -> Image.Image:
+    return _crop(_run_tool(["gnome-screenshot", "-f"], ".png"), region)
+
+
+# In-process backends first; the external tools stay as fallbacks
+CAPTURE_BACKENDS: List[Tuple[str, Callable[[Optional[Region]], Image.Image]]] = [
+    ("mss", _capture_mss),
+    ("xcb", _capture_xcb),
+    ("xwd", _capture_xwd),
+    ("scrot", _capture_scrot),
+    ("gnome-screenshot", _capture_gnome_screenshot),
+]
+
+_preferred_backend: Optional[str] = None
+
+
+def capture_screen(region: Optional[Region] = None) -> Tuple[Image.Image, str]:
+    """
+    Capture the whole screen, or only region. Returns (image, backend name);
+    raises CaptureError if every backend fails. The backend that worked last
+    time is tried first.
+    """
+    global _preferred_backend
+    if region is not None:
+        # Fails fast (before any capture) for regions that cannot be on screen
+        _clamp_region(region, region[0] + region[2], region[1] + region[3])
+    backends = sorted(CAPTURE_BACKENDS, key=lambda backend: backend[0] != _preferred_backend)
+    errors = []
+    for name, capture in backends:
+        try:
+            image = capture(region)
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            continue
+        _preferred_backend = name
+        return image, name
+    raise CaptureError("All screenshot methods failed (" + "; ".join(errors) + ")")
+
+
+def pick_focus_window(windows: Iterable[Dict[str, Any]], exclude_titles: Iterable[str] = (),
+                      desktop: Optional[str] = None, active_id: Optional[int] = None,
+                      is_hidden: Optional[Callable[[int], bool]] = None) -> Optional[Dict[str, Any]]:
+    """
+    The window the user is most likely asking about, from the windows reported
+    by MCPClientManager._get_active_windows: the active window if it qualifies,
+    otherwise the topmost one. Windows whose title is excluded (e.g. the
+    assistant's own always-on-top window), sticky windows such as panels and
+    the desktop, windows on another workspace than desktop, and windows for
+    which is_hidden(id) is true (minimized) are skipped.
+    """
+    excluded = set(exclude_titles)
+    candidates = [
+        window for window in windows
+        if window.get("width", 0) >= MIN_REGION_SIDE and window.get("height", 0) >= MIN_REGION_SIDE
+        and window.get("desktop") != "-1" and window.get("title", "") not in excluded
+        and (desktop is None or window.get("desktop") == desktop)
+    ]
+
+    def window_id(window: Dict[str, Any]) -> int:
+        try:
+            return int(window.get("id", ""), 16)
+        except ValueError:
+            return 0
+
+    # Active window first, then top to bottom
+    candidates.sort(key=lambda window: (active_id is not None and window_id(window) == active_id,
+                                        window.get("stacking", -1)), reverse=True)
+    for window in candidates:
+        if is_hidden is None or not is_hidden(window_id(window)):
+            return window
+    return None
+
+
+def window_region(window: Dict[str, Any]) -> Region:
+    return window["x"], window["y"], window["width"], window["height"]
+
+
+class FocusRegionCache:
+    """
+    The last focus window lookup, reused while the focus state (the active window,
+    stacking order and workspace, see MCPClientManager._get_focus_state) is the
+    same and the lookup is younger than ttl_seconds, so consecutive captures don't
+    list and probe every window again.
+    """
+
+    def __init__(self, ttl_seconds: float = FOCUS_REGION_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._entry: Optional[Tuple[str, float, Optional[Region]]] = None
+
+    def lookup(self, state: Optional[str], find: Callable[[], Optional[Region]]) -> Optional[Region]:
+        """The region for state, from find() unless cached; an unknown state (None) is never cached"""
+        now = time.monotonic()
+        if state is not None and self._entry is not None:
+            cached_state, expires, region = self._entry
+            if cached_state == state and now < expires:
+                return region
+        region = find()
+        self._entry = (state, now + self.ttl_seconds, region) if state is not None else None
+        return region
+
+    def clear(self):
+        self._entry = None
+
+
+RESAMPLING_FILTERS = {
+    "nearest": Image.Resampling.NEAREST,
+    "bilinear": Image.Resampling.BILINEAR,
+    "bicubic": Image.Resampling.BICUBIC,
+    "lanczos": Image.Resampling.LANCZOS,
+}
+
+ENCODING_FORMATS = ["JPEG", "WEBP", "PNG"]
+
+
+@dataclass
+class VisionEncoding:
+    """How screenshots are scaled and encoded before they are sent to the vision model"""
+    max_side: int = VISION_MAX_SIDE
+    resample: str = "bilinear"  # Key of RESAMPLING_FILTERS
+    format: str = "JPEG"  # One of ENCODING_FORMATS
+    quality: int = 85  # JPEG/WebP quality, 1-100
+    colors: int = 0  # PNG only: quantize to this many palette colors (0 keeps full color)
+
+
+def encode_for_vision(image: Image.Image, encoding: Optional[VisionEncoding] = None) -> Tuple[str, int, int]:
+    """Scale image to fit encoding.max_side and return (base64 image, width, height)"""
+    if encoding is None:
+        encoding = VisionEncoding()
+    scale_factor = min(1.0, encoding.max_side / image.width, encoding.max_side / image.height)
+    new_width = int(image.width * scale_factor)
+    new_height = int(image.height * scale_factor)
+    if scale_factor < 1.0:
+        # reducing_gap first shrinks by an integer factor with a cheap box filter,
+        # so the chosen filter only runs over the last 2x of the reduction
+        resample = RESAMPLING_FILTERS.get(encoding.resample, Image.Resampling.BILINEAR)
+        image = image.resize((new_width, new_height), resample, reducing_gap=2.0)
+    
+    image_format = encoding.format.upper()
+    if image_format not in ENCODING_FORMATS:
+        raise ValueError(f"Unsupported vision encoding format: {encoding.format}")
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if image_format == "PNG":
+        if encoding.colors:
+            # UI screenshots have few distinct colors; a palette PNG is a fraction of the size
+            image = image.quantize(colors=max(2, min(256, encoding.colors)), method=Image.Quantize.FASTOCTREE)
+        save_options = {"compress_level": 1}
+    elif image_format == "WEBP":
+        save_options = {"quality": encoding.quality, "method": 1}
+    else:
+        save_options = {"quality": encoding.quality}
+    
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **save_options)
+    # Encode straight from the buffer instead of copying it out with getvalue()
+    with buffer.getbuffer() as view:
+        return base64.b64encode(view).decode("ascii"), new_width, new_height
+
+
+def tile_for_vision(image: Image.Image, encoding: Optional[VisionEncoding] = None) -> List[str]:
+    """
+    Base64 tiles of image at (close to) full resolution, for images too large to
+    send whole without losing small text; empty if image already fits max_side.
+    At most MAX_TILES_PER_SIDE tiles per side are made; larger tiles are scaled.
+    """
+    if encoding is None:
+        encoding = VisionEncoding()
+    if max(image.width, image.height) <= encoding.max_side:
+        return []
+    columns = min(MAX_TILES_PER_SIDE, -(-image.width // encoding.max_side))
+    rows = min(MAX_TILES_PER_SIDE, -(-image.height // encoding.max_side))
+    tiles = []
+    for row in range(rows):
+        for column in range(columns):
+            box = (image.width * column // columns, image.height * row // rows,
+                   image.width * (column + 1) // columns, image.height * (row + 1) // rows)
+            tiles.append(encode_for_vision(image.crop(box), encoding)[0])
+    return tiles
+
+
+def benchmark(runs: int = 5):
+    """Print capture and capture-to-base64 latency for every working backend"""
+    print(f"{'backend':<18}{'capture ms':>12}{'to base64 ms':>14}{'payload KB':>12}")
+    image = None
+    for name, capture in CAPTURE_BACKENDS:
+        capture_times, total_times = [], []
+        payload = ""
+        try:
+            for _ in range(runs):
+                started = time.perf_counter()
+                image = capture(None)
+                captured = time.perf_counter()
+                payload, _, _ = encode_for_vision(image)
+                capture_times.append(captured - started)
+                total_times.append(time.perf_counter() - started)
+        except Exception as e:
+            print(f"{name:<18}unavailable: {e}")
+            continue
+        print(f"{name:<18}{1000 * min(capture_times):>12.1f}{1000 * min(total_times):>14.1f}"
+              f"{len(payload) / 1024:>12.0f}")
+    if image is None:
+        return
+    
+    encodings = [
+        ("png lanczos (old)", VisionEncoding(resample="lanczos", format="PNG")),
+        ("png 256 colors", VisionEncoding(format="PNG", colors=256)),
+        ("jpeg q85", VisionEncoding()),
+        ("jpeg q70", VisionEncoding(quality=70)),
+        ("webp q80", VisionEncoding(format="WEBP", quality=80)),
+    ]
+    print(f"\n{'encoding':<18}{'encode ms':>12}{'payload KB':>14}")
+    for name, encoding in encodings:
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            payload, _, _ = encode_for_vision(image, encoding)
+            times.append(time.perf_counter() - started)
+        print(f"{name:<18}{1000 * min(times):>12.1f}{len(payload) / 1024:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark screen capture backends")
+    parser.add_argument("--runs", type=int, default=5, help="captures per backend (best run is shown)")
+    benchmark(parser.parse_args().runs)
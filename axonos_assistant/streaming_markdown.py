@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Incremental markdown rendering for streamed responses
+
+Re-rendering the whole accumulated response on every chunk costs O(N^2) over
+an answer. This renderer splits the text at block boundaries that can no
+longer change (a blank line outside a code fence, followed by a line that
+does not continue a list or indented block), renders each completed block
+exactly once, and only re-renders the trailing unfinished block.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+from typing import Callable, Optional, Tuple
+
+import markdown
+
+FENCE_RE = re.compile(r"^\s{0,3}(```|~~~)")
+# Lines that may belong to the block before a blank line (list items, indented continuations)
+CONTINUATION_RE = re.compile(r"^(\s|[-*+]\s|\d+[.)]\s)")
+
+
+class IncrementalMarkdownRenderer:
+    """Renders a growing markdown text as (newly completed blocks, unfinished tail)"""
+
+    def __init__(self, render: Optional[Callable[[str], str]] = None):
+        self.render = render or markdown.markdown
+        self.reset()
+
+    def reset(self):
+        self.rendered_upto = 0  # Text before this offset is in completed blocks already rendered
+        self.scanned_upto = 0  # Complete lines before this offset have been scanned
+        self.in_fence = False
+        self.pending_boundary = None  # Offset after a blank line, committed by the next line
+
+    def _scan(self, text: str) -> int:
+        """Scan newly completed lines and return the last committed block boundary"""
+        boundary = self.rendered_upto
+        end = text.rfind("\n") + 1
+        position = self.scanned_upto
+        while position < end:
+            line_end = text.index("\n", position) + 1
+            line = text[position:line_end]
+            if FENCE_RE.match(line):
+                if not self.in_fence and self.pending_boundary is not None and not line[0].isspace():
+                    boundary = max(boundary, self.pending_boundary)
+                self.in_fence = not self.in_fence
+                self.pending_boundary = None
+            elif not self.in_fence:
+                if not line.strip():
+                    if self.pending_boundary is None:
+                        self.pending_boundary = line_end
+                elif self.pending_boundary is not None:
+                    if not CONTINUATION_RE.match(line):
+                        boundary = max(boundary, self.pending_boundary)
+                    self.pending_boundary = None
+            position = line_end
+        self.scanned_upto = max(self.scanned_upto, end)
+        return boundary
+
+    def update(self, text: str) -> Tuple[str, str]:
+        """
+        Render text, the whole response so far. Returns (html of blocks completed
+        since the last call, to append; html of the unfinished tail, to replace).
+        """
+        if len(text) < self.rendered_upto:
+            self.reset()  # Text was replaced rather than extended
+        boundary = self._scan(text)
+        done_html = ""
+        if boundary > self.rendered_upto:
+            done_html = self.render(text[self.rendered_upto:boundary])
+            self.rendered_upto = boundary
+        tail = text[self.rendered_upto:]
+        tail_html = self.render(tail) if tail.strip() else ""
+        return done_html, tail_html
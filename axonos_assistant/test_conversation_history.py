@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded conversation history of AxonOS Assistant
+
+Turns added on any route must keep the history bounded, and the history must
+be trimmed in jumps so consecutive chat requests share their prefix. Needs the
+assistant's desktop dependencies to import main.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import types
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+main = pytest.importorskip("main")
+
+
+def make_widget():
+    widget = types.SimpleNamespace(conversation_history=[], history_max_turns=4, history_min_turns=2,
+                                   system_prompt="system", mcp_context_enabled=False, mcp_manager=None)
+    widget.append_history = types.MethodType(main.AxonOSChatWidget.append_history, widget)
+    widget.build_messages = types.MethodType(main.AxonOSChatWidget.build_messages, widget)
+    return widget
+
+
+def test_history_stays_bounded_without_building_prompts():
+    widget = make_widget()
+    for turn in range(200):
+        widget.append_history("user", f"question {turn}")
+        widget.append_history("assistant", f"answer {turn}")
+        assert len(widget.conversation_history) <= 2 * widget.history_max_turns
+    assert widget.conversation_history[-1] == {"role": "assistant", "content": "answer 199"}
+
+
+def test_history_is_trimmed_in_jumps_to_keep_a_stable_prefix():
+    widget = make_widget()
+    firsts = []
+    for turn in range(10):
+        widget.append_history("user", f"question {turn}")
+        firsts.append(widget.build_messages()[1]["content"])
+        widget.append_history("assistant", f"answer {turn}")
+    # Grows to four user turns, then drops back to the last two and grows again
+    assert firsts == ["question 0"] * 4 + ["question 3"] * 3 + ["question 6"] * 3
+
+
+def test_build_messages_leaves_history_alone():
+    widget = make_widget()
+    for turn in range(3):
+        widget.append_history("user", f"question {turn}")
+    history = list(widget.conversation_history)
+    messages = widget.build_messages()
+    assert widget.conversation_history == history
+    assert [m["content"] for m in messages] == ["system", "question 0", "question 1", "question 2"]
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the guardrail verdict cache of AxonOS Assistant
+
+Verdicts are keyed by model, category and normalized text, survive a restart
+through SQLite, expire after the TTL and are evicted least recently used first.
+Incomplete checks must never be cached.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import guardrail_cache
+from guardrail_cache import GuardrailVerdictCache, normalize_text
+
+SAFE = {"risky": False, "response": "no", "description": "harm"}
+RISKY = {"risky": True, "response": "yes", "description": "harm"}
+
+
+def test_normalize_text_ignores_case_and_whitespace():
+    assert normalize_text("  Hello\n  WORLD\t") == "hello world"
+
+
+def test_get_matches_model_category_and_normalized_text():
+    cache = GuardrailVerdictCache(path=None)
+    cache.put("granite", "harm", "Is this  SAFE?", RISKY)
+    hit = cache.get("granite", "harm", "is this safe?")
+    assert hit == {"risky": True, "response": "yes", "description": "harm", "cached": True}
+    assert cache.get("granite", "violence", "is this safe?") is None
+    assert cache.get("other-model", "harm", "is this safe?") is None
+    assert cache.get("granite", "harm", "is this safe") is None
+
+
+def test_incomplete_and_cached_verdicts_are_not_stored():
+    cache = GuardrailVerdictCache(path=None)
+    for response in ("check_failed", "check_error", "check_timeout"):
+        cache.put("granite", "harm", response, {"risky": False, "response": response, "description": ""})
+        assert cache.get("granite", "harm", response) is None
+    cache.put("granite", "harm", "text", dict(SAFE, cached=True))
+    assert cache.get("granite", "harm", "text") is None
+
+
+def test_verdicts_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache" / "verdicts.sqlite3")
+    cache = GuardrailVerdictCache(path=path)
+    cache.put("granite", "harm", "first", SAFE)
+    cache.put("granite", "harm", "second", RISKY)
+    reloaded = GuardrailVerdictCache(path=path)
+    assert reloaded.get("granite", "harm", "first")["risky"] is False
+    assert reloaded.get("granite", "harm", "second")["risky"] is True
+    reloaded.clear()
+    assert GuardrailVerdictCache(path=path).get("granite", "harm", "first") is None
+
+
+def test_verdicts_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(guardrail_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "verdicts.sqlite3")
+    cache = GuardrailVerdictCache(path=path, ttl_seconds=60)
+    cache.put("granite", "harm", "text", SAFE)
+    now[0] += 60
+    assert cache.get("granite", "harm", "text") is not None
+    now[0] += 1
+    assert GuardrailVerdictCache(path=path, ttl_seconds=60).get("granite", "harm", "text") is None
+    assert cache.get("granite", "harm", "text") is None
+
+
+def test_least_recently_used_verdicts_are_evicted(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite3")
+    cache = GuardrailVerdictCache(path=path, max_entries=2)
+    cache.put("granite", "harm", "a", SAFE)
+    cache.put("granite", "harm", "b", SAFE)
+    assert cache.get("granite", "harm", "a") is not None
+    cache.put("granite", "harm", "c", SAFE)
+    assert cache.get("granite", "harm", "b") is None
+    reloaded = GuardrailVerdictCache(path=path, max_entries=2)
+    assert reloaded.get("granite", "harm", "a") is not None
+    assert reloaded.get("granite", "harm", "b") is None
+    assert reloaded.get("granite", "harm", "c") is not None
+
+
+def test_unusable_store_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = GuardrailVerdictCache(path=str(blocker / "verdicts.sqlite3"))
+    assert cache.conn is None
+    cache.put("granite", "harm", "text", SAFE)
+    assert cache.get("granite", "harm", "text") is not None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-category guardrail checks of AxonOS Assistant
+
+Checks still running when the verdict is decided, the deadline passes or the
+turn is cancelled must be aborted, and a cancelled turn must get a neutral
+verdict instead of an exception. Needs the assistant's desktop dependencies
+to import main.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+import types
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+main = pytest.importorskip("main")
+
+from ollama_client import CancelToken, OllamaCancelled
+
+CATEGORIES = ["harm", "violence", "jailbreak"]
+
+
+class FakeOllama:
+    """Answers each category after its delay; blocks until cancelled if it has none"""
+
+    def __init__(self, answers):
+        self.answers = answers  # category -> (delay or None, response)
+        self.started = []
+        self.aborted = []
+
+    def generate(self, model, text, system=None, cancel=None, **kwargs):
+        delay, response = self.answers[system]
+        self.started.append(system)
+        started = time.monotonic()
+        while delay is None or time.monotonic() - started < delay:
+            if cancel is not None and cancel.cancelled:
+                self.aborted.append(system)
+                raise OllamaCancelled()
+            time.sleep(0.01)
+        return {"response": response}
+
+
+def make_widget(answers):
+    widget = types.SimpleNamespace(
+        guardrail_single_pass=False,
+        guardrail_model="granite3-guardian",
+        model_residency=types.SimpleNamespace(keep_alive_for=lambda model: None),
+        guardrail_executor=concurrent.futures.ThreadPoolExecutor(max_workers=len(CATEGORIES)),
+        ollama=FakeOllama(answers),
+    )
+    widget._check_guardrail_category = types.MethodType(main.AxonOSChatWidget._check_guardrail_category, widget)
+    return widget
+
+
+def evaluate(widget, deadline=5, cancel=None):
+    return main.AxonOSChatWidget._evaluate_guardrail(widget, "some text", CATEGORIES, 5, deadline, cancel)
+
+
+def test_cancelling_the_turn_returns_a_neutral_verdict():
+    widget = make_widget({"harm": (0, "no"), "violence": (None, "no"), "jailbreak": (None, "no")})
+    cancel = CancelToken()
+    threading.Timer(0.2, cancel.cancel).start()
+    started = time.monotonic()
+    is_safe, risk_details = evaluate(widget, cancel=cancel)
+    assert time.monotonic() - started < 2
+    assert is_safe
+    assert risk_details["harm"]["response"] == "no"
+    assert risk_details["violence"]["response"] == "check_cancelled"
+    assert risk_details["jailbreak"]["response"] == "check_cancelled"
+    widget.guardrail_executor.shutdown(wait=True)
+    assert sorted(widget.ollama.aborted) == ["jailbreak", "violence"]
+
+
+def test_deadline_aborts_unfinished_checks():
+    widget = make_widget({"harm": (0, "no"), "violence": (0, "no"), "jailbreak": (None, "no")})
+    is_safe, risk_details = evaluate(widget, deadline=0.3)
+    assert is_safe
+    assert risk_details["jailbreak"]["response"] == "check_timeout"
+    widget.guardrail_executor.shutdown(wait=True)
+    assert widget.ollama.aborted == ["jailbreak"]
+
+
+def test_risky_category_aborts_the_rest():
+    widget = make_widget({"harm": (0, "yes"), "violence": (None, "no"), "jailbreak": (None, "no")})
+    is_safe, risk_details = evaluate(widget, cancel=CancelToken())
+    assert not is_safe
+    assert risk_details == {"harm": risk_details["harm"]}
+    widget.guardrail_executor.shutdown(wait=True)
+    # Checks still queued are dropped; the ones already running are aborted
+    assert sorted(widget.ollama.aborted) == sorted(set(widget.ollama.started) - {"harm"})
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for parsing the single-pass guardrail answer of AxonOS Assistant
+
+Every requested category must get a verdict; anything the parser cannot read
+with confidence returns None so the caller falls back to per-category checks.
+Needs the assistant's desktop dependencies to import main.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+main = pytest.importorskip("main")
+
+CATEGORIES = ["harm", "social_bias", "violence"]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"harm": "no", "social_bias": "no", "violence": "yes"}', {"harm": False, "social_bias": False, "violence": True}),
+    ('Sure! {"Harm": "No", "Social Bias": "NO", "violence": "unsafe"} Done.', {"harm": False, "social_bias": False, "violence": True}),
+    ('{"harm": false, "social_bias": 0.9, "violence": 0}', {"harm": False, "social_bias": True, "violence": False}),
+    ('{"harm": {"risk": "yes"}, "social_bias": "safe", "violence": "false"}', {"harm": True, "social_bias": False, "violence": False}),
+])
+def test_parses_every_category(raw, expected):
+    assert main.parse_guardrail_verdicts(raw, CATEGORIES) == expected
+
+
+@pytest.mark.parametrize("raw", [
+    "",
+    "no",
+    "{not json}",
+    '["harm", "no"]',
+    '{"harm": "no", "violence": "no"}',
+    '{"harm": "no", "social_bias": "maybe", "violence": "no"}',
+    '{"harm": "no", "social_bias": null, "violence": "no"}',
+])
+def test_unreadable_answers_return_none(raw):
+    assert main.parse_guardrail_verdicts(raw, CATEGORIES) is None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the keyword intent router of AxonOS Assistant
+
+The automaton must find exactly the intents a plain substring scan over the
+keyword lists finds, including keywords that overlap or sit inside other words.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import random
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from intent_router import DEFAULT_ROUTE, INTENT_KEYWORDS, IntentRouter
+
+SAMPLE_PROMPTS = [
+    "",
+    "Hello there",
+    "Can you help me with this plot?",
+    "What do you see on my screen right now?",
+    "Tell me about CRISPR",
+    "Show me the latest news on fusion",
+    "What tools are available? list apps please",
+    "Check system status and top processes",
+    "How much RAM do I have?",
+    "Launch JupyterLab",
+    "Open the program I was using",  # "ram" inside "program"
+    "HELP ME, I'M STUCK",
+    "problematic issue with the gui",
+    "step by step walkthrough of the memory status",
+]
+
+
+def substring_intents(text, intents=INTENT_KEYWORDS):
+    """The classification the router replaced: any keyword as a substring"""
+    lowered = text.lower()
+    return {intent for intent, keywords in intents.items() if any(k.lower() in lowered for k in keywords)}
+
+
+def test_classify_matches_substring_scan():
+    router = IntentRouter()
+    for text in SAMPLE_PROMPTS:
+        assert router.classify(text) == substring_intents(text), text
+
+
+def test_classify_matches_substring_scan_on_random_keyword_mixes():
+    router = IntentRouter()
+    rng = random.Random(40)
+    keywords = [k for ks in INTENT_KEYWORDS.values() for k in ks]
+    for _ in range(300):
+        words = rng.sample(keywords, rng.randint(0, 4))
+        # Slice keywords apart so partial and overlapping matches come up too
+        text = " ".join(w[rng.randint(0, len(w) // 2):] for w in words)
+        assert router.classify(text) == substring_intents(text), text
+
+
+def test_overlapping_keywords_report_every_intent():
+    intents = {"a": ["he", "hers"], "b": ["she"], "c": ["his"], "d": ["r"]}
+    router = IntentRouter(intents, route_order=["b", "a"])
+    assert router.classify("ushers") == {"a", "b", "d"}
+    assert router.classify("this") == {"c"}
+    assert router.classify("xyz") == set()
+
+
+def test_empty_keywords_are_ignored():
+    router = IntentRouter({"a": ["", "x"]})
+    assert router.classify("yyy") == set()
+    assert router.classify("yxy") == {"a"}
+
+
+def test_route_follows_route_order():
+    router = IntentRouter()
+    assert router.route({"memory", "help"}) == "help"
+    assert router.route({"launch", "system"}) == "system"
+    assert router.route({"vision"}) == DEFAULT_ROUTE
+    assert router.route(set()) == DEFAULT_ROUTE
+    assert router.route(router.classify("How much RAM do I have?")) == "memory"
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for cancellation in the shared Ollama client
+
+Cancelling a CancelToken must cancel every child token made from it, close the
+responses tracked under it and wake a request blocked mid-stream, while
+cancelling a child leaves its parent and siblings alone.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ollama_client import CancelToken, OllamaCancelled, OllamaClient
+
+
+class FakeResponse:
+    raw = None
+
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture(params=["HTTP/1.1", "HTTP/1.0"])
+def stalled_server(request):
+    """
+    An Ollama stand-in that streams one chunk and then stalls until released,
+    either chunked like Ollama itself or as a body delimited by closing the connection
+    """
+    release = threading.Event()
+    first_chunk_sent = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = request.param
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            chunked = self.protocol_version == "HTTP/1.1"
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            line = json.dumps({"response": "Hi", "done": False}).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line) if chunked else line)
+            self.wfile.flush()
+            first_chunk_sent.set()
+            release.wait(10)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", first_chunk_sent
+    finally:
+        release.set()
+        server.shutdown()
+        server.server_close()
+
+
+def test_cancel_propagates_to_children_and_grandchildren():
+    parent = CancelToken()
+    child, sibling = parent.child(), parent.child()
+    grandchild = child.child()
+    assert not any(token.cancelled for token in (parent, child, sibling, grandchild))
+    parent.cancel()
+    assert all(token.cancelled for token in (parent, child, sibling, grandchild))
+
+
+def test_cancelling_a_child_leaves_parent_and_siblings_running():
+    parent = CancelToken()
+    child, sibling = parent.child(), parent.child()
+    grandchild = child.child()
+    child.cancel()
+    assert child.cancelled and grandchild.cancelled
+    assert not parent.cancelled and not sibling.cancelled
+    parent.raise_if_cancelled()
+    with pytest.raises(OllamaCancelled):
+        child.raise_if_cancelled()
+
+
+def test_child_of_a_cancelled_token_starts_cancelled():
+    parent = CancelToken()
+    parent.cancel()
+    assert parent.child().cancelled
+
+
+def test_cancel_closes_tracked_responses_once():
+    parent = CancelToken()
+    child = parent.child()
+    finished, streaming, child_streaming = FakeResponse(), FakeResponse(), FakeResponse()
+    parent._track(finished)
+    parent._track(streaming)
+    child._track(child_streaming)
+    parent._untrack(finished)
+    parent.cancel()
+    parent.cancel()
+    assert (finished.closed, streaming.closed, child_streaming.closed) == (0, 1, 1)
+
+
+def test_tracking_after_cancel_closes_the_response_and_raises():
+    token = CancelToken()
+    token.cancel()
+    response = FakeResponse()
+    with pytest.raises(OllamaCancelled):
+        token._track(response)
+    assert response.closed == 1
+
+
+def test_cancelled_token_stops_a_request_before_it_is_sent():
+    token = CancelToken()
+    token.cancel()
+    # Nothing listens here; reaching the network would raise OllamaError instead
+    with pytest.raises(OllamaCancelled):
+        OllamaClient("http://127.0.0.1:9").generate("model", "prompt", cancel=token)
+
+
+def test_cancel_wakes_a_request_blocked_mid_stream(stalled_server):
+    base_url, first_chunk_sent = stalled_server
+    client = OllamaClient(base_url)
+    turn = CancelToken()
+    outcome = []
+
+    def run():
+        try:
+            outcome.append(client.generate("model", "prompt", cancel=turn.child(), timeout=(5, 30)))
+        except Exception as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert first_chunk_sent.wait(5)
+    time.sleep(0.1)  # Let the client block reading the next line
+    started = time.monotonic()
+    turn.cancel()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - started < 2
+    assert len(outcome) == 1 and isinstance(outcome[0], OllamaCancelled)
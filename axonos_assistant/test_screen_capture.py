@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for screenshot scaling and encoding in AxonOS Assistant
+
+The encoded image must decode to the reported size, in the requested format
+and at the requested quality. The focus window lookup is only reused while
+the focus state is known and unchanged.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import base64
+import io
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+import screen_capture
+from screen_capture import VISION_MAX_SIDE, FocusRegionCache, VisionEncoding, encode_for_vision
+
+
+def screen(size=(1920, 1080)):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, size[0], 24), fill="navy")
+    for row in range(40):
+        draw.text((20, 40 + 20 * row), f"line {row}: some terminal output", fill="black")
+    draw.ellipse((1200, 300, 1700, 800), fill="darkgreen")
+    return image
+
+
+def decode(encoded):
+    return Image.open(io.BytesIO(base64.b64decode(encoded)))
+
+
+def test_large_screens_are_scaled_to_max_side():
+    encoded, width, height = encode_for_vision(screen())
+    assert (width, height) == (VISION_MAX_SIDE, 756)
+    image = decode(encoded)
+    assert image.format == "JPEG" and image.size == (width, height)
+
+
+def test_small_images_keep_their_size():
+    encoded, width, height = encode_for_vision(screen((640, 400)))
+    assert (width, height) == (640, 400)
+    assert decode(encoded).size == (640, 400)
+
+
+@pytest.mark.parametrize("quality", [40, 85, 95])
+def test_jpeg_uses_the_requested_quality(quality):
+    image = screen((800, 600))
+    encoded, _, _ = encode_for_vision(image, VisionEncoding(format="jpeg", quality=quality))
+    reference = io.BytesIO()
+    image.save(reference, format="JPEG", quality=quality)
+    reference.seek(0)
+    decoded = decode(encoded)
+    assert decoded.format == "JPEG"
+    assert decoded.quantization == Image.open(reference).quantization
+    # No trailing bytes after the image data
+    assert base64.b64decode(encoded) == reference.getvalue()
+
+
+def test_webp_matches_a_direct_encode():
+    image = screen((800, 600))
+    encoded, _, _ = encode_for_vision(image, VisionEncoding(format="WEBP", quality=60))
+    reference = io.BytesIO()
+    image.save(reference, format="WEBP", quality=60, method=1)
+    assert decode(encoded).format == "WEBP"
+    assert base64.b64decode(encoded) == reference.getvalue()
+
+
+def test_png_is_lossless_or_palette():
+    image = screen((800, 600))
+    encoded, _, _ = encode_for_vision(image, VisionEncoding(format="PNG"))
+    decoded = decode(encoded)
+    assert decoded.format == "PNG" and decoded.mode == "RGB"
+    assert decoded.tobytes() == image.tobytes()
+    encoded, _, _ = encode_for_vision(image, VisionEncoding(format="PNG", colors=16))
+    decoded = decode(encoded)
+    assert decoded.mode == "P" and len(decoded.getcolors()) <= 16
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        encode_for_vision(screen((100, 100)), VisionEncoding(format="GIF"))
+
+
+class Finder:
+    def __init__(self, *regions):
+        self.regions = list(regions)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.regions.pop(0)
+
+
+def test_focus_region_is_reused_while_focus_state_is_unchanged(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(screen_capture.time, "monotonic", lambda: now[0])
+    cache = FocusRegionCache(ttl_seconds=5)
+    find = Finder((0, 0, 800, 600), (10, 10, 640, 480), None, (0, 0, 800, 600))
+    assert cache.lookup("active A", find) == (0, 0, 800, 600)
+    now[0] += 4.9
+    assert cache.lookup("active A", find) == (0, 0, 800, 600)
+    assert find.calls == 1
+    # Focus moved: look again at once
+    assert cache.lookup("active B", find) == (10, 10, 640, 480)
+    assert find.calls == 2
+    # No focus window is remembered too, until the entry expires
+    now[0] += 5
+    assert cache.lookup("active B", find) is None
+    assert cache.lookup("active B", find) is None
+    now[0] += 5
+    assert cache.lookup("active B", find) == (0, 0, 800, 600)
+    assert find.calls == 4
+
+
+def test_focus_region_is_not_cached_without_a_focus_state():
+    cache = FocusRegionCache()
+    find = Finder((0, 0, 800, 600), (10, 10, 640, 480), (20, 20, 320, 240))
+    assert cache.lookup(None, find) == (0, 0, 800, 600)
+    assert cache.lookup(None, find) == (10, 10, 640, 480)
+    cache.lookup("active A", find)
+    cache.clear()
+    assert find.regions == [] and find.calls == 3
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming response guardrail of AxonOS Assistant
+
+A streamed response is checked in windows ending on paragraph breaks (or at
+max_chars), each overlapping the previous one, with text that arrives during a
+check folded into the next window. Needs the assistant's desktop dependencies
+to import main.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import threading
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+main = pytest.importorskip("main")
+
+
+class RecordingCheck:
+    """Records every window it is asked about; flags windows containing a marker"""
+
+    def __init__(self, marker="UNSAFE", gate=None):
+        self.marker = marker
+        self.gate = gate
+        self.windows = []
+
+    def __call__(self, text):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.windows.append(text)
+        if self.marker in text:
+            return False, {"harm": {"risky": True, "response": "yes", "description": "Harmful content"}}
+        return True, {"harm": {"risky": False, "response": "no", "description": "Harmful content"}}
+
+
+def feed(guardrail, text):
+    guardrail.feed(text)
+    if guardrail.pending is not None:
+        guardrail.pending.result(5)
+
+
+def test_windows_end_on_paragraph_breaks_and_overlap():
+    check = RecordingCheck()
+    guardrail = main.StreamingGuardrail(check, min_chars=20, max_chars=80, overlap_chars=10)
+    first = "a" * 30 + "\n\n"
+    second = "b" * 25 + "\n\n"
+    tail = "c" * 5
+
+    feed(guardrail, first[:15])
+    assert check.windows == []
+    feed(guardrail, first + "b" * 10)
+    assert check.windows == ["a" * 30]
+    feed(guardrail, first + second + tail)
+    # The next window starts overlap_chars before the previous one ended
+    assert check.windows[1] == "a" * 10 + "\n\n" + "b" * 25
+
+    is_safe, details = guardrail.finish(first + second + tail)
+    assert is_safe and details["harm"]["response"] == "no"
+    assert check.windows[2] == "b" * 10 + "\n\n" + tail
+
+
+def test_long_text_without_breaks_is_split_at_max_chars():
+    check = RecordingCheck()
+    guardrail = main.StreamingGuardrail(check, min_chars=20, max_chars=50, overlap_chars=10)
+    feed(guardrail, "x" * 49)
+    assert check.windows == []
+    feed(guardrail, "x" * 50)
+    assert check.windows == ["x" * 50]
+    # A break too close to the start of the unchecked text doesn't end a window
+    feed(guardrail, "x" * 50 + "y" * 5 + "\n\n" + "z" * 30)
+    assert len(check.windows) == 1
+    guardrail.finish("x" * 50 + "y" * 5 + "\n\n" + "z" * 30)
+    assert check.windows[1] == "x" * 10 + "y" * 5 + "\n\n" + "z" * 30
+
+
+def test_trailing_whitespace_is_not_checked_again():
+    check = RecordingCheck()
+    guardrail = main.StreamingGuardrail(check, min_chars=5, max_chars=50, overlap_chars=2)
+    text = "a" * 10 + "\n\n"
+    feed(guardrail, text)
+    assert check.windows == ["a" * 10]
+    assert guardrail.finish(text)[0]
+    assert check.windows == ["a" * 10]
+
+
+def test_text_arriving_during_a_check_is_folded_into_the_next_window():
+    gate = threading.Event()
+    check = RecordingCheck(gate=gate)
+    guardrail = main.StreamingGuardrail(check, min_chars=10, max_chars=30, overlap_chars=0)
+    guardrail.feed("a" * 30)
+    guardrail.feed("a" * 30 + "b" * 30)
+    guardrail.feed("a" * 30 + "b" * 60)
+    gate.set()
+    guardrail.pending.result(5)
+    assert check.windows == ["a" * 30]
+    feed(guardrail, "a" * 30 + "b" * 60)
+    assert check.windows == ["a" * 30, "b" * 60]
+
+
+def test_flagged_window_stops_further_checks():
+    check = RecordingCheck()
+    guardrail = main.StreamingGuardrail(check, min_chars=10, max_chars=20, overlap_chars=5)
+    text = "UNSAFE" + "a" * 20
+    feed(guardrail, text)
+    assert guardrail.flagged.is_set()
+    feed(guardrail, text + "b" * 40)
+    is_safe, details = guardrail.finish(text + "b" * 40)
+    assert not is_safe and details["harm"]["risky"]
+    assert check.windows == [text]
+
+
+def test_marker_split_across_windows_is_seen_in_the_overlap():
+    check = RecordingCheck()
+    guardrail = main.StreamingGuardrail(check, min_chars=10, max_chars=20, overlap_chars=8)
+    text = "a" * 17 + "UNSAFE" + "b" * 10
+    feed(guardrail, text[:20])
+    assert not guardrail.flagged.is_set()
+    is_safe, _ = guardrail.finish(text)
+    assert not is_safe
+    assert "UNSAFE" in check.windows[1] and "UNSAFE" not in check.windows[0]
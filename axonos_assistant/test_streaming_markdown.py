@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental markdown renderer of AxonOS Assistant
+
+Completed blocks must be rendered exactly once and never change afterwards;
+only the unfinished tail is re-rendered. Blank lines inside an unclosed code
+fence or between list items must not end a block.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import re
+import sys
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+markdown = pytest.importorskip("markdown")
+
+from streaming_markdown import IncrementalMarkdownRenderer
+
+SAMPLE = """# Title
+
+First paragraph with **bold**
+text over two lines.
+
+- item one
+- item two
+
+- item three after a blank line
+  continued
+
+```python
+def f():
+
+    return 1
+```
+
+1. first
+2. second
+
+Closing paragraph.
+"""
+
+
+class RecordingRender:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return f"<{text}>"
+
+
+def stream(renderer, text, step=1):
+    """Feed text in chunks of step characters; return the appended html and the last tail"""
+    done = []
+    tail_html = ""
+    for end in range(step, len(text) + step, step):
+        done_html, tail_html = renderer.update(text[:end])
+        if done_html:
+            done.append(done_html)
+    return done, tail_html
+
+
+def normalize(html):
+    return re.sub(r">\s+<", "><", html.strip())
+
+
+def test_completed_blocks_are_rendered_once():
+    render = RecordingRender()
+    renderer = IncrementalMarkdownRenderer(render)
+    assert renderer.update("Hello") == ("", "<Hello>")
+    assert renderer.update("Hello\n\nWor") == ("", "<Hello\n\nWor>")
+    # The blank line only ends the block once the next line shows it isn't a continuation
+    assert renderer.update("Hello\n\nWorld\n") == ("<Hello\n\n>", "<World\n>")
+    assert renderer.update("Hello\n\nWorld\nagain") == ("", "<World\nagain>")
+    assert [call for call in render.calls if call.startswith("Hello")] == [
+        "Hello", "Hello\n\nWor", "Hello\n\n"]
+
+
+def test_stable_prefix_and_tail_cover_the_text():
+    render = RecordingRender()
+    renderer = IncrementalMarkdownRenderer(render)
+    blocks = []
+    for end in range(1, len(SAMPLE) + 1):
+        calls = len(render.calls)
+        done_html, tail_html = renderer.update(SAMPLE[:end])
+        # Newly completed blocks are rendered once, together, and the tail once
+        assert len(render.calls) - calls == bool(done_html) + bool(tail_html)
+        if done_html:
+            blocks.append(done_html[1:-1])
+    assert "".join(blocks) + tail_html[1:-1] == SAMPLE
+    assert blocks[0] == "# Title\n\n"
+    # A blank line followed by a list item might still continue the block above
+    assert blocks[1].startswith("First paragraph") and blocks[1].endswith("  continued\n\n")
+
+
+def test_unclosed_code_fence_stays_in_the_tail():
+    renderer = IncrementalMarkdownRenderer(RecordingRender())
+    text = "Intro\n\n```\nline one\n\nline two\n\nstill code\n"
+    done, tail_html = stream(renderer, text)
+    assert done == ["<Intro\n\n>"]
+    assert tail_html == "<```\nline one\n\nline two\n\nstill code\n>"
+
+    done_html, tail_html = renderer.update(text + "```\n\nAfter\n")
+    assert done_html == "<```\nline one\n\nline two\n\nstill code\n```\n\n>"
+    assert tail_html == "<After\n>"
+
+
+def test_list_items_after_blank_lines_stay_in_one_block():
+    renderer = IncrementalMarkdownRenderer(RecordingRender())
+    text = "- a\n\n- b\n\n    indented\n\n1. c\n"
+    done, tail_html = stream(renderer, text)
+    assert done == []
+    assert tail_html == f"<{text}>"
+
+
+def test_replaced_text_starts_over():
+    renderer = IncrementalMarkdownRenderer(RecordingRender())
+    stream(renderer, "One\n\nTwo\n\nThree\n")
+    assert renderer.update("New") == ("", "<New>")
+    assert renderer.update("New\n\nText\n") == ("<New\n\n>", "<Text\n>")
+
+
+@pytest.mark.parametrize("step", [1, 7, 64])
+def test_matches_rendering_the_whole_text(step):
+    renderer = IncrementalMarkdownRenderer()
+    done, tail_html = stream(renderer, SAMPLE, step)
+    assert normalize("".join(done) + tail_html) == normalize(markdown.markdown(SAMPLE))
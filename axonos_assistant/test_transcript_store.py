@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the paged transcript log of AxonOS Assistant
+
+Archived messages must read back by position, oldest first, and positions must
+stay aligned even when the log cannot be written.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transcript_store import UNAVAILABLE_MESSAGE, TranscriptStore
+
+
+def test_archived_messages_read_back_by_position(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    messages = [("user", "Hello"), ("assistant", "Hi! ünïcödé and\nnewlines 🧪"), ("user", '{"json": true}')]
+    for sender, message in messages:
+        store.archive(sender, message)
+    assert store.available and store.count == 3
+    assert store.read(0, 3) == messages
+    assert store.read(1, 2) == messages[1:2]
+    assert store.read(-5, 99) == messages
+    assert store.read(2, 1) == []
+    store.close()
+
+
+def test_log_is_anonymous(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    store.archive("user", "secret")
+    assert os.listdir(tmp_path) == []
+    store.close()
+
+
+def test_clear_starts_over(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    store.archive("user", "old")
+    store.clear()
+    assert store.count == 0 and store.read(0, 1) == []
+    store.archive("assistant", "new")
+    assert store.read(0, 1) == [("assistant", "new")]
+    store.close()
+
+
+def test_unavailable_log_keeps_positions_aligned(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    store = TranscriptStore(str(blocker / "logs"))
+    assert not store.available
+    store.archive("user", "lost")
+    store.archive("assistant", "also lost")
+    assert store.count == 2
+    assert store.read(0, 2) == [UNAVAILABLE_MESSAGE, UNAVAILABLE_MESSAGE]
+
+
+def test_closed_log_reads_placeholders(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    store.archive("user", "hello")
+    store.close()
+    assert store.read(0, 1) == [UNAVAILABLE_MESSAGE]
+    store.archive("user", "after close")
+    assert store.count == 2
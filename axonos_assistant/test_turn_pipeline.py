@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the turn pipeline of AxonOS Assistant
+
+Stages must start as soon as their dependencies finish, overlap when they are
+independent, and be skipped once a dependency fails or the turn is cancelled.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import threading
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ollama_client import CancelToken
+from turn_pipeline import TurnPipeline
+
+
+def test_dependencies_pass_results_in_order():
+    pipeline = TurnPipeline()
+    pipeline.add("a", lambda inputs: 1)
+    pipeline.add("b", lambda inputs: inputs["a"] + 1, after=["a"])
+    pipeline.add("c", lambda inputs: inputs["a"] + inputs["b"], after=["a", "b"])
+    pipeline.start()
+    assert pipeline.result("c") == 3
+    pipeline.wait()
+    assert set(pipeline.timings) == {"a", "b", "c"}
+
+
+def test_independent_stages_overlap():
+    both_running = threading.Barrier(2, timeout=2)
+    pipeline = TurnPipeline()
+    # Each stage waits for the other, so this only finishes if they run concurrently
+    pipeline.add("a", lambda inputs: both_running.wait())
+    pipeline.add("b", lambda inputs: both_running.wait())
+    pipeline.start()
+    pipeline.wait()
+    assert pipeline.result("a") is not None and pipeline.result("b") is not None
+
+
+def test_unknown_dependencies_are_dropped():
+    pipeline = TurnPipeline()
+    pipeline.add("a", lambda inputs: inputs, after=["missing"])
+    assert pipeline.has("a") and not pipeline.has("missing")
+    pipeline.start()
+    assert pipeline.result("a") == {}
+    assert pipeline.result("missing", "default") == "default"
+
+
+def test_failed_stage_skips_dependents(caplog):
+    def fail(inputs):
+        raise ValueError("boom")
+
+    ran = []
+    pipeline = TurnPipeline()
+    pipeline.add("a", fail)
+    pipeline.add("b", lambda inputs: ran.append("b"), after=["a"])
+    pipeline.add("c", lambda inputs: "independent")
+    pipeline.start()
+    pipeline.wait()
+    assert pipeline.result("b", "skipped") == "skipped"
+    assert pipeline.result("c") == "independent"
+    assert ran == []
+    assert pipeline.result("a", "failed") == "failed"
+    assert pipeline.result("a") is None
+    # Logged once with its traceback, however often the result is read
+    failures = [record for record in caplog.records if "stage 'a' failed" in record.getMessage()]
+    assert len(failures) == 1 and failures[0].exc_info[0] is ValueError
+    assert "b skipped" in pipeline.timing_summary()
+
+
+def test_cancel_from_a_stage_skips_later_stages_and_cancels_the_token():
+    token = CancelToken()
+    ran = []
+    pipeline = TurnPipeline(cancel_token=token)
+
+    def guardrail(inputs):
+        pipeline.cancel()
+        return False
+
+    pipeline.add("guardrail", guardrail)
+    pipeline.add("response", lambda inputs: ran.append("response"), after=["guardrail"])
+    pipeline.start()
+    pipeline.wait()
+    assert pipeline.result("guardrail") is False
+    assert pipeline.result("response", "skipped") == "skipped"
+    assert ran == []
+    assert token.cancelled
+
+
+def test_cancelled_token_skips_stages_not_yet_started():
+    token = CancelToken()
+    release = threading.Event()
+    ran = []
+    pipeline = TurnPipeline(cancel_token=token)
+    pipeline.add("slow", lambda inputs: release.wait(2))
+    pipeline.add("after", lambda inputs: ran.append("after"), after=["slow"])
+    pipeline.start()
+    token.cancel()
+    release.set()
+    pipeline.wait()
+    assert pipeline.result("after", "skipped") == "skipped"
+    assert ran == []
+
+
+def test_stage_starts_when_its_own_dependency_finishes():
+    release = threading.Event()
+    pipeline = TurnPipeline()
+    pipeline.add("fast", lambda inputs: None)
+    pipeline.add("slow", lambda inputs: release.wait(2))
+    pipeline.add("after_fast", lambda inputs: "done", after=["fast"])
+    pipeline.start()
+    # after_fast must not wait for the unrelated slow stage
+    assert pipeline.result("after_fast") == "done"
+    assert not pipeline.futures["slow"].done()
+    release.set()
+    pipeline.wait()
+    assert pipeline.result("slow") is True
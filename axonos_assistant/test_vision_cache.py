@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the vision description cache of AxonOS Assistant
+
+Only an identical capture may reuse a description: a one-word edit in a
+terminal or a new line of output must miss, and entries expire quickly.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+import vision_cache
+from vision_cache import VisionDescriptionCache, screen_fingerprint
+
+OUTPUT = [f"$ ls -la /data/run{i}  total {i * 37} files" for i in range(40)]
+
+
+def terminal(lines, size=(1920, 1080)):
+    image = Image.new("RGB", size, (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    for row, line in enumerate(lines):
+        draw.text((10, 10 + 14 * row), line, fill=(220, 220, 220))
+    return image
+
+
+def test_identical_captures_share_a_fingerprint():
+    assert screen_fingerprint(terminal(OUTPUT)) == screen_fingerprint(terminal(OUTPUT))
+
+
+def test_small_text_changes_miss_the_cache():
+    cache = VisionDescriptionCache()
+    cache.put(screen_fingerprint(terminal(OUTPUT)), "A terminal listing 40 runs")
+    edited = OUTPUT[:-1] + [OUTPUT[-1].replace("files", "filez")]
+    more_output = OUTPUT + ["$ make test  -> 3 failed"]
+    assert cache.get(screen_fingerprint(terminal(edited))) is None
+    assert cache.get(screen_fingerprint(terminal(more_output))) is None
+    assert cache.get(screen_fingerprint(terminal(OUTPUT))) == "A terminal listing 40 runs"
+
+
+def test_regions_of_different_sizes_do_not_collide():
+    blank = Image.new("RGB", (200, 100), "white")
+    assert screen_fingerprint(blank) != screen_fingerprint(blank.resize((200, 101)))
+    # Small windows are fingerprinted at their own resolution
+    window = terminal(OUTPUT[:5], size=(300, 90))
+    changed = window.copy()
+    changed.putpixel((299, 89), (220, 220, 220))
+    assert screen_fingerprint(window) != screen_fingerprint(changed)
+
+
+def test_entries_expire_and_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(vision_cache.time, "time", lambda: now[0])
+    cache = VisionDescriptionCache(max_entries=2, ttl_seconds=30)
+    cache.put(b"one", "one")
+    cache.put(b"two", "two")
+    assert cache.get(b"one") == "one"
+    cache.put(b"three", "three")
+    assert cache.get(b"two") is None
+    assert cache.get(b"one") == "one"
+    now[0] += 31
+    assert cache.get(b"one") is None and cache.get(b"three") is None
+
+
+def test_empty_descriptions_are_not_cached_and_clear_empties():
+    cache = VisionDescriptionCache()
+    cache.put(b"blank", "")
+    assert cache.get(b"blank") is None
+    cache.put(b"screen", "description")
+    cache.clear()
+    assert cache.get(b"screen") is None
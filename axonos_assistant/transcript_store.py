@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Paged chat transcript log for AxonOS Assistant
+
+Only the most recent messages are kept in memory and in the rendered
+transcript. Older messages are appended to a JSONL log in the cache directory
+and read back by position when the user scrolls back, so memory stays flat
+over long sessions. The log is an anonymous temporary file: it lasts for the
+session and disappears when the assistant exits.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from array import array
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "axonos_assistant",
+)
+
+# Stands in for a message whose log write failed, so positions stay aligned
+UNAVAILABLE_MESSAGE = ("assistant", "*(This message could not be restored.)*")
+
+
+class TranscriptStore:
+    """Append-only JSONL log of (sender, message) pairs paged out of the chat"""
+
+    def __init__(self, directory: Optional[str] = DEFAULT_LOG_DIR):
+        self.offsets = array("q")  # Byte offset of each archived message in the log
+        self.lock = threading.Lock()
+        self.log = None
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.log = tempfile.TemporaryFile(prefix="transcript-", suffix=".jsonl", dir=directory or None)
+        except OSError as e:
+            logger.warning(f"Transcript log unavailable, older messages will not be kept: {e}")
+
+    @property
+    def count(self) -> int:
+        """Number of messages archived so far (they come before every in-memory message)"""
+        return len(self.offsets)
+
+    def archive(self, sender: str, message: str):
+        """Page one message out to the log"""
+        line = json.dumps({"sender": sender, "message": message}, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self.lock:
+            if self.log is None:
+                self.offsets.append(-1)  # Keeps positions aligned; the message itself is dropped
+                return
+            try:
+                offset = self.log.seek(0, os.SEEK_END)
+                self.log.write(line)
+                self.offsets.append(offset)
+            except OSError as e:
+                logger.warning(f"Transcript log write failed: {e}")
+                self.offsets.append(-1)
+
+    @property
+    def available(self) -> bool:
+        return self.log is not None
+
+    def read(self, start: int, end: int) -> List[Tuple[str, str]]:
+        """Archived messages with positions in [start, end), oldest first"""
+        start, end = max(0, start), min(end, len(self.offsets))
+        messages = []
+        with self.lock:
+            for position in range(start, end):
+                offset = self.offsets[position]
+                entry = None
+                if self.log is not None and offset >= 0:
+                    try:
+                        self.log.seek(offset)
+                        entry = json.loads(self.log.readline())
+                        entry = (entry["sender"], entry["message"])
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning(f"Transcript log read failed: {e}")
+                        entry = None
+                messages.append(entry or UNAVAILABLE_MESSAGE)
+        return messages
+
+    def clear(self):
+        with self.lock:
+            del self.offsets[:]
+            if self.log is not None:
+                try:
+                    self.log.seek(0)
+                    self.log.truncate()
+                except OSError as e:
+                    logger.warning(f"Transcript log reset failed: {e}")
+
+    def close(self):
+        with self.lock:
+            if self.log is not None:
+                self.log.close()
+                self.log = None
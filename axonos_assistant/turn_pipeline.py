@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Turn pipeline for AxonOS Assistant
+
+Runs the stages of one chat turn (guardrail, screenshot, MCP refresh, vision,
+response) as a small dependency graph: every stage starts as soon as the
+stages it depends on have finished, so independent stages overlap. Any stage
+can cancel the turn (e.g. the prompt guardrail rejecting it); stages that
+have not started yet are then skipped, and the turn's cancel token (if any)
+is cancelled so requests already in flight are aborted too. Per-stage
+timings are recorded.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineCancelled(Exception):
+    """Raised for stages that were skipped because the turn was cancelled"""
+
+
+class TurnPipeline:
+    """
+    Dependency-ordered stages of one turn.
+
+    Stage functions take a dict of their dependencies' results. A stage whose
+    dependency failed or was skipped is skipped as well. Add stages in
+    dependency order, then call start() and wait on result(), which logs a
+    failed stage and returns the default for it.
+    """
+
+    def __init__(self, name: str = "turn", cancel_token: Optional[Any] = None):
+        self.name = name
+        self.cancel_token = cancel_token  # Anything with cancel() and a cancelled property
+        self.stages: List[Tuple[str, Callable[[Dict[str, Any]], Any], Tuple[str, ...]]] = []
+        self.futures: Dict[str, concurrent.futures.Future] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}  # stage -> (start offset, duration)
+        self.cancelled = threading.Event()
+        self.failures_logged: Set[str] = set()
+        self.executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.started = 0.0
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], after: Iterable[str] = ()):
+        after = tuple(dep for dep in after if dep in {stage[0] for stage in self.stages})
+        self.stages.append((name, fn, after))
+
+    def has(self, name: str) -> bool:
+        return any(stage[0] == name for stage in self.stages)
+
+    def cancel(self):
+        """Skip every stage that has not started yet and abort the turn's requests"""
+        self.cancelled.set()
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        for future in list(self.futures.values()):
+            future.cancel()
+
+    def _run_stage(self, name: str, fn: Callable[[Dict[str, Any]], Any], after: Tuple[str, ...]):
+        try:
+            inputs = {dep: self.futures[dep].result() for dep in after}
+        except Exception:
+            raise PipelineCancelled(name)
+        if self.cancelled.is_set() or (self.cancel_token is not None and self.cancel_token.cancelled):
+            raise PipelineCancelled(name)
+        begin = time.monotonic()
+        try:
+            return fn(inputs)
+        finally:
+            self.timings[name] = (begin - self.started, time.monotonic() - begin)
+
+    def start(self):
+        # One thread per stage: a stage blocks on its dependencies, never on a free worker
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, len(self.stages)), thread_name_prefix=self.name
+        )
+        self.started = time.monotonic()
+        for name, fn, after in self.stages:
+            self.futures[name] = self.executor.submit(self._run_stage, name, fn, after)
+        self.executor.shutdown(wait=False)
+
+    def result(self, name: str, default: Any = None) -> Any:
+        """Result of a stage, or default if it failed, was skipped or is not part of this turn"""
+        future = self.futures.get(name)
+        if future is None:
+            return default
+        try:
+            return future.result()
+        except (PipelineCancelled, concurrent.futures.CancelledError):
+            return default
+        except Exception as e:
+            if name not in self.failures_logged:
+                self.failures_logged.add(name)
+                logger.error(f"{self.name} stage '{name}' failed: {e}", exc_info=e)
+            return default
+
+    def wait(self):
+        concurrent.futures.wait(self.futures.values())
+
+    def timing_summary(self) -> str:
+        parts = []
+        for name, _, _ in self.stages:
+            if name in self.timings:
+                offset, duration = self.timings[name]
+                parts.append(f"{name} {duration:.2f}s (+{offset:.2f}s)")
+            else:
+                parts.append(f"{name} skipped")
+        total = time.monotonic() - self.started
+        return f"{', '.join(parts)}; total {total:.2f}s"
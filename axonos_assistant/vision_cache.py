@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Screenshot description cache for AxonOS Assistant
+
+Describing a screenshot is the slowest model call of a vision turn, and
+follow-up questions are usually asked about a screen that has not changed.
+Each capture gets a fingerprint: a digest of the captured region shrunk to
+FINGERPRINT_WIDTH pixels wide in grayscale. The description produced for a
+capture is reused only while the fingerprint matches exactly and for a short
+time, since a perceptual hash of the whole screen barely moves when terminal
+output, edited text or plotted values change.
+"""
+
+# MIT License
+#
+# Copyright (c) 2025 Avimanyu Bandyopadhyay
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# About 4x4 screen pixels per sample on a 1920-wide capture, so a changed glyph changes the digest
+FINGERPRINT_WIDTH = 480
+
+
+def screen_fingerprint(image: Image.Image, width: int = FINGERPRINT_WIDTH) -> bytes:
+    """Digest of the image shrunk to at most width pixels wide (BOX-averaged grayscale)"""
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.BOX)
+    small = image.convert("L")
+    digest = hashlib.blake2b(f"{small.width}x{small.height}".encode(), digest_size=16)
+    digest.update(small.tobytes())
+    return digest.digest()
+
+
+class VisionDescriptionCache:
+    """Recent (screen fingerprint -> vision description) pairs"""
+
+    def __init__(self, max_entries: int = 16, ttl_seconds: float = 30.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl_seconds
+        self.entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, fingerprint: bytes) -> Optional[str]:
+        """Description of an identical recent screen, or None"""
+        with self.lock:
+            entry = self.entries.get(fingerprint)
+            if entry is None:
+                return None
+            description, created = entry
+            if time.time() - created > self.ttl:
+                del self.entries[fingerprint]
+                return None
+            self.entries.move_to_end(fingerprint)
+            logger.info(f"Reusing vision description of a screen captured {time.time() - created:.0f}s ago")
+            return description
+
+    def put(self, fingerprint: bytes, description: str):
+        if not description:
+            return
+        with self.lock:
+            self.entries[fingerprint] = (description, time.time())
+            self.entries.move_to_end(fingerprint)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
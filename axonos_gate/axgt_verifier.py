@@ -8,17 +8,24 @@ Checks if a wallet address holds AXGT tokens or has an active 7-day trial.
 import os
 import re
 import logging
+import sqlite3
 import time
 import json
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, Set
 import requests
 from threading import Lock
 
+try:
+    from shared_state import TrialStore, get_access_cache_from_env, get_shared_state_db
+except ImportError:
+    from axonos_gate.shared_state import TrialStore, get_access_cache_from_env, get_shared_state_db
+
 logger = logging.getLogger(__name__)
 
-# Trial tracking (in-memory, per-process)
-# In production, this should be stored in a database. For now we persist to disk
-# to prevent trivial trial resets on container restart.
+# Trial tracking. With AXGT_SHARED_STATE_DB set (always in pool mode) trials live
+# in the shared SQLite database, so every gate process sees the same trial starts.
+# Otherwise they are kept in memory per process and persisted to disk to prevent
+# trivial trial resets on container restart.
 _trial_registry: Dict[str, float] = {}  # wallet_address (lowercase) -> trial_start_timestamp
 _trial_lock = Lock()
 TRIAL_DURATION_SECONDS = 7 * 24 * 60 * 60  # 7 days in seconds
@@ -47,7 +54,7 @@ def _ensure_trial_db_loaded() -> None:
                     if isinstance(k, str) and isinstance(v, (int, float)):
                         _trial_registry[k.lower()] = float(v)
     except Exception as e:
-        logger.warning(f"Failed to load trial registry from disk: {e}")
+        logger.warning("Failed to load trial registry from disk: %s", e)
     finally:
         _trial_db_loaded = True
 
@@ -61,7 +68,29 @@ def _persist_trials_best_effort() -> None:
             json.dump(_trial_registry, f)
         os.replace(tmp, path)
     except Exception as e:
-        logger.warning(f"Failed to persist trial registry to disk: {e}")
+        logger.warning("Failed to persist trial registry to disk: %s", e)
+
+# Shared databases the JSON registry has already been imported into (per process)
+_trial_imports: Set[str] = set()
+
+def _shared_trial_store() -> Optional[TrialStore]:
+    """The shared trial store, seeded once from the JSON registry; None without a shared DB."""
+    db = get_shared_state_db()
+    if db is None:
+        return None
+    store = TrialStore(db, TRIAL_DURATION_SECONDS)
+    with _trial_lock:
+        if db.path in _trial_imports:
+            return store
+        _trial_imports.add(db.path)
+        _ensure_trial_db_loaded()
+        starts = dict(_trial_registry)
+    if starts:
+        try:
+            store.import_starts(starts)
+        except sqlite3.Error as e:
+            logger.warning("Failed to import trial registry into shared state: %s", e)
+    return store
 
 # ERC-20 balanceOf function signature hash (first 4 bytes of keccak256)
 BALANCE_OF_SIGNATURE = "0x70a08231"
@@ -72,13 +101,25 @@ def mask_wallet_address(address: str) -> str:
         return "***"
     return f"{address[:6]}...{address[-4:]}"
 
+class LazyMaskedAddress:
+    """Defers mask_wallet_address until a log record is actually formatted."""
+
+    __slots__ = ("address",)
+
+    def __init__(self, address: str):
+        self.address = address
+
+    def __str__(self) -> str:
+        return mask_wallet_address(self.address)
+
+# Must start with 0x and have exactly 40 hex characters (fullmatch: no trailing newline)
+_WALLET_ADDRESS_RE = re.compile(r'0x[a-fA-F0-9]{40}')
+
 def validate_wallet_address(address: str) -> bool:
     """Validate Ethereum wallet address format."""
-    if not address:
+    if not address or len(address) != 42:
         return False
-    # Must start with 0x and have exactly 40 hex characters
-    pattern = r'^0x[a-fA-F0-9]{40}$'
-    return bool(re.match(pattern, address))
+    return _WALLET_ADDRESS_RE.fullmatch(address) is not None
 
 def start_trial(wallet_address: str) -> bool:
     """
@@ -95,6 +136,19 @@ def start_trial(wallet_address: str) -> bool:
     
     wallet_key = wallet_address.lower()
     
+    store = _shared_trial_store()
+    if store is not None:
+        try:
+            started = store.start(wallet_key)
+        except sqlite3.Error as e:
+            logger.warning("Shared trial registry unavailable, using the local one: %s", e)
+        else:
+            if started:
+                logger.info("Started 7-day trial for %s", LazyMaskedAddress(wallet_address))
+            else:
+                logger.info("Trial already active for %s", LazyMaskedAddress(wallet_address))
+            return started
+    
     with _trial_lock:
         _ensure_trial_db_loaded()
         # Check if trial already exists and is still valid
@@ -102,13 +156,14 @@ def start_trial(wallet_address: str) -> bool:
             trial_start = _trial_registry[wallet_key]
             elapsed = time.time() - trial_start
             if elapsed < TRIAL_DURATION_SECONDS:
-                logger.info(f"Trial already active for {mask_wallet_address(wallet_address)} ({elapsed/86400:.1f} days remaining)")
+                logger.info("Trial already active for %s (%.1f days remaining)",
+                            LazyMaskedAddress(wallet_address), elapsed / 86400)
                 return False
         
         # Start new trial
         _trial_registry[wallet_key] = time.time()
         _persist_trials_best_effort()
-        logger.info(f"Started 7-day trial for {mask_wallet_address(wallet_address)}")
+        logger.info("Started 7-day trial for %s", LazyMaskedAddress(wallet_address))
         return True
 
 def is_trial_active(wallet_address: str) -> Tuple[bool, Optional[float]]:
@@ -126,6 +181,17 @@ def is_trial_active(wallet_address: str) -> Tuple[bool, Optional[float]]:
     
     wallet_key = wallet_address.lower()
     
+    store = _shared_trial_store()
+    if store is not None:
+        try:
+            trial_start = store.started(wallet_key)
+        except sqlite3.Error as e:
+            logger.warning("Shared trial registry unavailable, using the local one: %s", e)
+        else:
+            if trial_start is None:
+                return False, None
+            return True, (TRIAL_DURATION_SECONDS - (time.time() - trial_start)) / 86400
+    
     with _trial_lock:
         _ensure_trial_db_loaded()
         if wallet_key not in _trial_registry:
@@ -155,7 +221,7 @@ def has_axgt_balance(wallet_address: str) -> bool:
     """
     # Validate address format
     if not validate_wallet_address(wallet_address):
-        logger.warning(f"Invalid wallet address format: {mask_wallet_address(wallet_address)}")
+        logger.warning("Invalid wallet address format: %s", LazyMaskedAddress(wallet_address))
         return False
     
     # Get configuration from environment (no hardcoded defaults)
@@ -172,7 +238,7 @@ def has_axgt_balance(wallet_address: str) -> bool:
     # Optional safety check: if an expected contract is provided, enforce it.
     expected_contract = (os.getenv('AXGT_EXPECTED_CONTRACT_ADDRESS') or '').strip()
     if expected_contract and contract_address.lower() != expected_contract.lower():
-        logger.error(f"Contract address mismatch. Expected: {expected_contract}, Got: {contract_address}")
+        logger.error("Contract address mismatch. Expected: %s, Got: %s", expected_contract, contract_address)
         return False
     
     try:
@@ -195,7 +261,7 @@ def has_axgt_balance(wallet_address: str) -> bool:
             "id": 1
         }
         
-        logger.info(f"Checking AXGT balance for {mask_wallet_address(wallet_address)}")
+        logger.info("Checking AXGT balance for %s", LazyMaskedAddress(wallet_address), extra={"sampled": True})
         
         # Make RPC call
         response = requests.post(
@@ -209,7 +275,7 @@ def has_axgt_balance(wallet_address: str) -> bool:
         result = response.json()
         
         if 'error' in result:
-            logger.error(f"RPC error checking balance: {result['error']}")
+            logger.error("RPC error checking balance: %s", result['error'])
             return False
         
         if 'result' not in result:
@@ -219,26 +285,27 @@ def has_axgt_balance(wallet_address: str) -> bool:
         # Parse the result (hex string representing uint256)
         balance_hex = result['result']
         if balance_hex == '0x':
-            logger.warning(f"Empty result from RPC for {mask_wallet_address(wallet_address)}")
+            logger.warning("Empty result from RPC for %s", LazyMaskedAddress(wallet_address))
             return False
         
         # Convert hex to integer
         balance = int(balance_hex, 16)
         
-        logger.info(f"Balance check for {mask_wallet_address(wallet_address)}: {balance} (wei)")
+        logger.info("Balance check for %s: %d (wei)", LazyMaskedAddress(wallet_address), balance,
+                    extra={"sampled": True})
         
         # Return True if balance > 0
         return balance > 0
         
     except requests.exceptions.RequestException as e:
-        logger.error(f"RPC request failed for {mask_wallet_address(wallet_address)}: {e}")
+        logger.error("RPC request failed for %s: %s", LazyMaskedAddress(wallet_address), e)
         # Fail closed - if RPC is unavailable, deny access
         return False
     except (ValueError, KeyError) as e:
-        logger.error(f"Error parsing RPC response for {mask_wallet_address(wallet_address)}: {e}")
+        logger.error("Error parsing RPC response for %s: %s", LazyMaskedAddress(wallet_address), e)
         return False
     except Exception as e:
-        logger.error(f"Unexpected error checking balance for {mask_wallet_address(wallet_address)}: {e}")
+        logger.error("Unexpected error checking balance for %s: %s", LazyMaskedAddress(wallet_address), e)
         return False
 
 def has_access(wallet_address: str) -> Tuple[bool, Optional[str], Optional[float]]:
@@ -256,19 +323,28 @@ def has_access(wallet_address: str) -> Tuple[bool, Optional[str], Optional[float
     if not validate_wallet_address(wallet_address):
         return False, None, None
     
-    # First check if wallet has AXGT balance
+    # First check if wallet has AXGT balance (a recent positive check may be cached
+    # across gate processes, see AXGT_ACCESS_CACHE_TTL)
+    access_cache = get_access_cache_from_env()
+    if access_cache is not None and access_cache.get(wallet_address) == 'balance':
+        logger.info("Wallet %s has AXGT balance (cached)", LazyMaskedAddress(wallet_address), extra={"sampled": True})
+        return True, 'balance', None
+
     if has_axgt_balance(wallet_address):
-        logger.info(f"Wallet {mask_wallet_address(wallet_address)} has AXGT balance")
+        if access_cache is not None:
+            access_cache.put(wallet_address, 'balance')
+        logger.info("Wallet %s has AXGT balance", LazyMaskedAddress(wallet_address), extra={"sampled": True})
         return True, 'balance', None
     
     # Check if wallet has active trial
     trial_active, days_remaining = is_trial_active(wallet_address)
     if trial_active:
-        logger.info(f"Wallet {mask_wallet_address(wallet_address)} has active trial ({days_remaining:.1f} days remaining)")
+        logger.info("Wallet %s has active trial (%.1f days remaining)", LazyMaskedAddress(wallet_address),
+                    days_remaining, extra={"sampled": True})
         return True, 'trial', days_remaining
     
     # No balance and no trial - start trial if this is first verification
-    logger.info(f"Wallet {mask_wallet_address(wallet_address)} has no balance, starting trial")
+    logger.info("Wallet %s has no balance, starting trial", LazyMaskedAddress(wallet_address))
     if start_trial(wallet_address):
         return True, 'trial', 7.0
     
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+AXGT Gate Benchmark
+
+Self-contained load test for the gate hot path. Starts a stand-in JSON-RPC
+server (configurable latency, error rate and balances) and a dummy VNC target,
+launches websockify_gate.py or gate_server.py against them, and drives
+/api/auth/verify-wallet, WebSocket upgrades, or upgrade + relayed traffic
+(echoed by the VNC target) at a configurable concurrency.
+
+Reports throughput, p50/p95/p99 latency and RPC calls per verification.
+
+Examples:
+    python3 bench_gate.py --target websockify --mode verify --requests 2000 --concurrency 32
+    python3 bench_gate.py --target websockify --mode upgrade --rpc-latency-ms 50
+    python3 bench_gate.py --target gate_server --mode verify --max-p95-ms 250 --max-failures 0
+    python3 bench_gate.py --mode relay --relay-bytes 4000000 --workers 4
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Contract address used by the stand-in chain; any valid address works.
+BENCH_CONTRACT = "0x" + "ab" * 20
+
+
+class StubRPCState:
+    """Configuration and counters shared by the stand-in RPC handler threads."""
+
+    def __init__(self, latency_ms: float, error_rate: float, holder_ratio: float, seed: int):
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self.error_rate = min(1.0, max(0.0, error_rate))
+        self.holder_ratio = min(1.0, max(0.0, holder_ratio))
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def balance_for(self, padded_address: str) -> int:
+        # Deterministic per wallet so repeat verifications see the same balance.
+        bucket = int(padded_address[-8:] or "0", 16) % 1000
+        return 10 ** 18 if bucket < self.holder_ratio * 1000 else 0
+
+
+def _make_rpc_handler(state: StubRPCState):
+    class StubRPCHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or "0")
+            try:
+                req = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                req = {}
+            with state.lock:
+                state.calls += 1
+                fail = state.rng.random() < state.error_rate
+            if state.latency:
+                time.sleep(state.latency)
+
+            if fail:
+                resp = {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32000, "message": "stub failure"}}
+            else:
+                try:
+                    data = req["params"][0]["data"]
+                except (KeyError, IndexError, TypeError):
+                    data = ""
+                resp = {"jsonrpc": "2.0", "id": req.get("id"), "result": hex(state.balance_for(data))}
+
+            body = json.dumps(resp).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StubRPCHandler
+
+
+def _start_vnc_sink() -> socket.socket:
+    """Accept TCP connections and echo until the peer disconnects (stand-in VNC server)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(512)
+
+    def drain(conn: socket.socket):
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                conn.sendall(data)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def accept_loop():
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=drain, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return sock
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, proc: subprocess.Popen, timeout: float = 15.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gate process exited early with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gate did not start listening on port {port}")
+
+
+def _wallets(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return ["0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40)) for _ in range(count)]
+
+
+def _verify_once(port: int, wallet: str) -> bool:
+    """True only for a 200 response that actually grants access ("verified": true)."""
+    body = json.dumps({"wallet_address": wallet})
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("POST", "/api/auth/verify-wallet", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = resp.read()
+        if resp.status != 200:
+            return False
+        return json.loads(data or b"{}").get("verified") is True
+    finally:
+        conn.close()
+
+
+def _open_websocket(port: int, wallet: str) -> tuple[socket.socket, bytes]:
+    """Send the upgrade request; return the socket and the status line (+ any bytes after it)."""
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    request = (
+        f"GET /websockify?wallet={wallet} HTTP/1.1\r\n"
+        f"Host: 127.0.0.1:{port}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n"
+        "Sec-WebSocket-Protocol: binary\r\n"
+        "\r\n"
+    ).encode("ascii")
+    sock = socket.create_connection(("127.0.0.1", port), timeout=30)
+    sock.sendall(request)
+    head = b""
+    while b"\r\n\r\n" not in head:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        head += chunk
+    return sock, head
+
+
+def _upgraded(head: bytes) -> bool:
+    parts = head.split(b" ", 2)
+    return len(parts) > 1 and parts[1] == b"101"
+
+
+def _upgrade_once(port: int, wallet: str) -> bool:
+    sock, head = _open_websocket(port, wallet)
+    sock.close()
+    return _upgraded(head)
+
+
+def _ws_frame(payload: bytes) -> bytes:
+    """Masked binary client frame."""
+    mask = os.urandom(4)
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x82, 0x80 | n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x82, 0x80 | 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x82, 0x80 | 127, n)
+    repeated = (mask * (n // 4 + 1))[:n]
+    masked = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(n, "big")
+    return header + mask + masked
+
+
+def _recv_exact(sock: socket.socket, buf: bytearray, n: int) -> bytes:
+    while len(buf) < n:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    out = bytes(buf[:n])
+    del buf[:n]
+    return out
+
+
+def _relay_once(port: int, wallet: str, total_bytes: int, frame_bytes: int = 16384) -> bool:
+    """Upgrade, push total_bytes through the gate to the echoing target, and read it all back."""
+    sock, head = _open_websocket(port, wallet)
+    try:
+        if not _upgraded(head):
+            return False
+        buf = bytearray(head.split(b"\r\n\r\n", 1)[1])
+        frame = _ws_frame(os.urandom(frame_bytes))
+        received = 0
+        for i in range(max(1, total_bytes // frame_bytes)):
+            sock.sendall(frame)
+            # Read echoes as they arrive to keep socket buffers from filling up.
+            while received < frame_bytes * (i + 1):
+                b0, b1 = _recv_exact(sock, buf, 2)
+                n = b1 & 0x7F
+                if n == 126:
+                    n = struct.unpack("!H", _recv_exact(sock, buf, 2))[0]
+                elif n == 127:
+                    n = struct.unpack("!Q", _recv_exact(sock, buf, 8))[0]
+                payload = _recv_exact(sock, buf, n)
+                if b0 & 0x0F == 0x2:
+                    received += len(payload)
+        return True
+    finally:
+        sock.close()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def run_load(port: int, mode: str, wallets: List[str], total: int, concurrency: int,
+             relay_bytes: int = 0) -> Dict[str, float]:
+    """Issue `total` requests with `concurrency` workers and return latency/throughput stats."""
+    if mode == "relay":
+        op = lambda p, w: _relay_once(p, w, relay_bytes)
+    else:
+        op = _upgrade_once if mode == "upgrade" else _verify_once
+    latencies: List[float] = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one(i: int):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            ok = op(port, wallets[i % len(wallets)])
+        except (OSError, ValueError):
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                failures += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    stats = {
+        "requests": total,
+        "failures": failures,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(total / wall, 1) if wall > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+    if mode == "relay" and wall > 0:
+        # Bytes make a round trip through the gate (client -> VNC target -> client).
+        stats["relay_mb_per_s"] = round((total - failures) * relay_bytes * 2 / wall / 1e6, 1)
+    return stats
+
+
+def _gate_command(target: str, port: int, vnc_port: int) -> tuple[List[str], Dict[str, str]]:
+    env: Dict[str, str] = {}
+    if target == "websockify":
+        script = "websockify_gate.py"
+        env.update({
+            "WEBSOCKIFY_PORT": str(port),
+            "VNC_HOST": "127.0.0.1",
+            "VNC_PORT": str(vnc_port),
+            "NOVNC_WEB_DIR": tempfile.gettempdir(),
+        })
+    else:
+        script = "gate_server.py"
+        env.update({"GATE_HOST": "127.0.0.1", "GATE_PORT": str(port)})
+    return [sys.executable, os.path.join(_script_dir, script)], env
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test and latency benchmark for the AXGT gate")
+    parser.add_argument("--target", choices=["websockify", "gate_server"], default="websockify")
+    parser.add_argument("--mode", choices=["verify", "upgrade", "relay"], default="verify")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--wallets", type=int, default=200, help="Distinct wallets to cycle through")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--relay-bytes", type=int, default=1_000_000,
+                        help="Bytes echoed through each connection in relay mode")
+    parser.add_argument("--workers", type=int, default=1, help="AXGT_WORKERS for the gate under test")
+    parser.add_argument("--rpc-latency-ms", type=float, default=5.0)
+    parser.add_argument("--rpc-error-rate", type=float, default=0.0)
+    parser.add_argument("--holder-ratio", type=float, default=0.5, help="Fraction of wallets with a balance")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=0, help="Gate port (default: pick a free one)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--gate-logs", action="store_true", help="Pass the gate's stderr through")
+    parser.add_argument("--max-p95-ms", type=float, default=0.0, help="Exit non-zero if p95 exceeds this")
+    parser.add_argument("--max-rpc-per-verify", type=float, default=0.0,
+                        help="Exit non-zero if RPC calls per verification exceed this")
+    parser.add_argument("--max-failures", type=int, default=-1,
+                        help="Exit non-zero if more requests than this fail or are denied (-1 = no limit)")
+    args = parser.parse_args()
+
+    if args.target == "gate_server" and args.mode != "verify":
+        parser.error("gate_server.py does not gate WebSocket upgrades; use --target websockify")
+
+    state = StubRPCState(args.rpc_latency_ms, args.rpc_error_rate, args.holder_ratio, args.seed)
+    rpc_server = ThreadingHTTPServer(("127.0.0.1", 0), _make_rpc_handler(state))
+    rpc_server.daemon_threads = True
+    threading.Thread(target=rpc_server.serve_forever, daemon=True).start()
+    vnc_sink = _start_vnc_sink()
+
+    port = args.port or _free_port()
+    cmd, gate_env = _gate_command(args.target, port, vnc_sink.getsockname()[1])
+    tmpdir = tempfile.mkdtemp(prefix="axgt-bench-")
+    env = dict(os.environ)
+    env.update(gate_env)
+    env.update({
+        "AXGT_CONTRACT_ADDRESS": BENCH_CONTRACT,
+        "AXGT_CHAIN_ID": "1",
+        "AXGT_RPC_URL": f"http://127.0.0.1:{rpc_server.server_address[1]}",
+        "AXGT_RATE_LIMIT_PER_MIN": "0",
+        "AXGT_TRIAL_DB_PATH": os.path.join(tmpdir, "trials.json"),
+        "AXGT_LOG_LEVEL": env.get("AXGT_LOG_LEVEL", "WARNING"),
+        "AXGT_WORKERS": str(args.workers),
+        "AXGT_SHARED_STATE_DB": os.path.join(tmpdir, "state.sqlite3"),
+    })
+    env.pop("AXGT_EXPECTED_CONTRACT_ADDRESS", None)
+
+    proc = subprocess.Popen(cmd, env=env, cwd=_script_dir, stdout=subprocess.DEVNULL,
+                            stderr=None if args.gate_logs else subprocess.DEVNULL)
+    try:
+        _wait_for_port(port, proc)
+        if args.workers > 1:
+            # The port answers once the first worker is up; give the rest a moment to bind.
+            time.sleep(2.0)
+        wallets = _wallets(args.wallets, args.seed)
+        if args.warmup:
+            run_load(port, args.mode, wallets, args.warmup, min(args.concurrency, args.warmup), args.relay_bytes)
+        with state.lock:
+            state.calls = 0
+        results = run_load(port, args.mode, wallets, args.requests, args.concurrency, args.relay_bytes)
+        with state.lock:
+            rpc_calls = state.calls
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        rpc_server.shutdown()
+        vnc_sink.close()
+
+    results.update({
+        "target": args.target,
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "rpc_calls": rpc_calls,
+        "rpc_calls_per_verify": round(rpc_calls / args.requests, 3) if args.requests else 0.0,
+    })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.target} {args.mode}: {results['requests']} requests @ concurrency {args.concurrency}, "
+              f"{args.workers} worker(s)")
+        print(f"  throughput: {results['throughput_rps']} req/s ({results['failures']} failed or denied)")
+        print(f"  latency:    p50 {results['p50_ms']} ms, p95 {results['p95_ms']} ms, p99 {results['p99_ms']} ms")
+        if "relay_mb_per_s" in results:
+            print(f"  relay:      {results['relay_mb_per_s']} MB/s")
+        print(f"  rpc:        {results['rpc_calls']} calls, {results['rpc_calls_per_verify']} per verification")
+
+    exit_code = 0
+    if args.max_failures >= 0 and results["failures"] > args.max_failures:
+        print(f"FAIL: {results['failures']} of {results['requests']} requests failed or were denied "
+              f"(limit {args.max_failures})", file=sys.stderr)
+        exit_code = 1
+    if args.max_p95_ms and results["p95_ms"] > args.max_p95_ms:
+        print(f"FAIL: p95 {results['p95_ms']} ms exceeds {args.max_p95_ms} ms", file=sys.stderr)
+        exit_code = 1
+    if args.max_rpc_per_verify and results["rpc_calls_per_verify"] > args.max_rpc_per_verify:
+        print(f"FAIL: {results['rpc_calls_per_verify']} RPC calls per verification exceeds "
+              f"{args.max_rpc_per_verify}", file=sys.stderr)
+        exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
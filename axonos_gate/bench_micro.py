@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+AXGT Gate Micro-benchmarks
+
+Per-call CPU cost of the request-parsing helpers on the gate hot path, next to
+the implementations they replaced. No network or gate process involved.
+
+    python3 bench_micro.py [--number 200000]
+"""
+
+import argparse
+import io
+import json
+import re
+import timeit
+from urllib.parse import parse_qs, urlparse
+
+from axgt_verifier import validate_wallet_address
+from security_utils import extract_query_param, read_bounded_body
+
+WALLET = "0x6112C3509A8a787df576028450FebB3786A2274d"
+UPGRADE_PATH = f"/websockify?token=abc&wallet={WALLET}"
+BODY = json.dumps({"wallet_address": WALLET}).encode("utf-8")
+
+
+def _legacy_validate(address: str) -> bool:
+    if not address:
+        return False
+    pattern = r'^0x[a-fA-F0-9]{40}$'
+    return bool(re.match(pattern, address))
+
+
+def _legacy_extract(path: str):
+    parsed = urlparse(path if path else '/')
+    return parse_qs(parsed.query).get('wallet', [None])[0]
+
+
+def _legacy_parse_body(raw: bytes):
+    stream = io.BytesIO(raw)
+    length = int(str(len(raw)) or '0')
+    return json.loads(stream.read(length).decode('utf-8') or '{}')
+
+
+def _parse_body(raw: bytes):
+    return json.loads(read_bounded_body(io.BytesIO(raw), str(len(raw)), 4096).decode('utf-8') or '{}')
+
+
+CASES = [
+    ("validate_wallet_address", lambda: _legacy_validate(WALLET), lambda: validate_wallet_address(WALLET)),
+    ("validate (bad length)", lambda: _legacy_validate(WALLET + "00"), lambda: validate_wallet_address(WALLET + "00")),
+    ("wallet from upgrade path", lambda: _legacy_extract(UPGRADE_PATH), lambda: extract_query_param(UPGRADE_PATH, "wallet")),
+    ("bounded body read + parse", lambda: _legacy_parse_body(BODY), lambda: _parse_body(BODY)),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for gate request parsing")
+    parser.add_argument("--number", type=int, default=200000, help="Calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':28} {'before (ns)':>12} {'after (ns)':>12} {'speedup':>8}")
+    for name, before, after in CASES:
+        t_before = min(timeit.repeat(before, number=args.number, repeat=args.repeat)) / args.number * 1e9
+        t_after = min(timeit.repeat(after, number=args.number, repeat=args.repeat)) / args.number * 1e9
+        print(f"{name:28} {t_before:12.0f} {t_after:12.0f} {t_before / t_after:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import logging
+import os
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Values the process environment had for keys the config file has overridden,
+# so a key removed from the file falls back to its original value.
+_base_env: Dict[str, Optional[str]] = {}
+
+
+def load_env_file(path: str) -> Dict[str, str]:
+    """
+    Parse a KEY=VALUE file (blank lines and '#' comments ignored, optional quotes
+    around values). Only AXGT_* keys are returned; anything else is skipped so the
+    file can't repoint ports or paths of a running gate.
+    """
+    values: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, _, value = line.partition("=")
+            key = key.strip()
+            if key.startswith("export "):
+                key = key[len("export "):].strip()
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+                value = value[1:-1]
+            if key.startswith("AXGT_"):
+                values[key] = value
+    return values
+
+
+def reload_config_from_file() -> Optional[Dict[str, str]]:
+    """
+    Re-read AXGT_GATE_CONFIG (if set) into os.environ.
+
+    Settings that the verifier reads per call (RPC URL, contract, chain) take
+    effect immediately; callers re-derive anything they cache (CORS allowlist,
+    rate limiter). Returns the applied values, or None if no file is configured
+    or it could not be read (the previous settings stay in effect).
+    """
+    path = (os.getenv("AXGT_GATE_CONFIG") or "").strip()
+    if not path:
+        return None
+    try:
+        values = load_env_file(path)
+    except OSError as e:
+        logger.error("Failed to read gate config %s: %s", path, e)
+        return None
+    for key in list(_base_env):
+        if key not in values:
+            original = _base_env.pop(key)
+            if original is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = original
+    for key, value in values.items():
+        _base_env.setdefault(key, os.environ.get(key))
+        os.environ[key] = value
+    logger.info("Loaded gate config from %s (%d settings)", path, len(values))
+    return values
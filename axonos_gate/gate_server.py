@@ -8,14 +8,23 @@ Serves HTTP (HTML/API) and gates WebSocket connections to websockify.
 import os
 import sys
 import logging
+import signal
 import threading
 from pathlib import Path
-from urllib.parse import parse_qs, urlparse
 
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
-
-from security_utils import cors_origin_for_request, get_rate_limiter_from_env, parse_cors_allowlist
+from werkzeug.serving import make_server
+
+from gate_config import reload_config_from_file
+from log_utils import configure_logging
+from workers import bind_listen_socket, get_worker_count_from_env, is_pool_worker, notify_ready, run_worker_pool
+from security_utils import (
+    cors_origin_for_request,
+    get_max_body_bytes_from_env,
+    get_rate_limiter_from_env,
+    parse_cors_allowlist,
+)
 
 # Add /axonos_gate to path for imports
 _script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,22 +33,23 @@ if '/axonos_gate' not in sys.path:
 
 # Import our modules
 try:
-    from axgt_verifier import has_access, validate_wallet_address, mask_wallet_address
+    from axgt_verifier import has_access, validate_wallet_address, LazyMaskedAddress
 except ImportError:
     # Fallback to package import
     try:
-        from axonos_gate.axgt_verifier import has_access, validate_wallet_address, mask_wallet_address
+        from axonos_gate.axgt_verifier import has_access, validate_wallet_address, LazyMaskedAddress
     except ImportError as e:
         print(f"ERROR: Cannot import axgt_verifier: {e}", file=sys.stderr)
         sys.exit(1)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+reload_config_from_file()
+
 app = Flask(__name__)
+# Oversized bodies are rejected with 413 before the JSON is read.
+app.config['MAX_CONTENT_LENGTH'] = get_max_body_bytes_from_env()
 # CORS: default is same-origin (no wildcard). For unusual deployments, set AXGT_CORS_ORIGINS
 # to "*" or a comma-separated list of allowed origins.
 _allow_any, _allowlist = parse_cors_allowlist(os.getenv("AXGT_CORS_ORIGINS"))
@@ -48,6 +58,15 @@ CORS(app, resources={r"/api/*": {"origins": []}})
 
 _rate_limiter = get_rate_limiter_from_env()
 
+def _reload_settings(sig=None, stack=None):
+    """SIGHUP: re-read AXGT_GATE_CONFIG and rebuild CORS, rate limit and body cap."""
+    global _allow_any, _allowlist, _rate_limiter
+    reload_config_from_file()
+    _allow_any, _allowlist = parse_cors_allowlist(os.getenv("AXGT_CORS_ORIGINS"))
+    _rate_limiter = get_rate_limiter_from_env()
+    app.config['MAX_CONTENT_LENGTH'] = get_max_body_bytes_from_env()
+    logger.info("Gate settings reloaded")
+
 NOVNC_WEB_DIR = Path('/usr/share/novnc')
 
 @app.after_request
@@ -78,8 +97,11 @@ def verify_wallet():
             if not _rate_limiter.allow(client_ip):
                 return jsonify({"verified": False, "error": "Rate limit exceeded"}), 429
 
-        data = request.get_json()
-        if not data:
+        if (request.content_length or 0) > app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'verified': False, 'error': 'Request body too large'}), 413
+
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'verified': False, 'error': 'No JSON data provided'}), 400
         
         wallet_address = data.get('wallet_address', '').strip()
@@ -106,17 +128,18 @@ def verify_wallet():
             elif access_type == 'balance':
                 response_data['message'] = 'Wallet verified - AXGT holder'
             
-            logger.info(f"Wallet verified: {mask_wallet_address(wallet_address)} (access_type: {access_type})")
+            logger.info("Wallet verified: %s (access_type: %s)", LazyMaskedAddress(wallet_address), access_type,
+                        extra={"sampled": True})
             return jsonify(response_data)
         else:
-            logger.info(f"Wallet verification failed: {mask_wallet_address(wallet_address)}")
+            logger.info("Wallet verification failed: %s", LazyMaskedAddress(wallet_address))
             return jsonify({
                 'verified': False,
                 'error': 'No access available for this wallet'
             })
             
     except Exception as e:
-        logger.error(f"Error in verify_wallet: {e}", exc_info=True)
+        logger.error("Error in verify_wallet: %s", e, exc_info=True)
         return jsonify({'verified': False, 'error': 'Internal server error'}), 500
 
 @app.route('/')
@@ -140,7 +163,23 @@ def main():
     logger.info(f"AXGT Contract: {(os.getenv('AXGT_CONTRACT_ADDRESS') or '<unset>').strip()}")
     logger.info(f"RPC URL: {(os.getenv('AXGT_RPC_URL') or '<unset>').strip()}")
     
-    app.run(host=host, port=port, debug=False, use_reloader=False)
+    workers = get_worker_count_from_env()
+    if workers > 1 and not is_pool_worker():
+        return run_worker_pool(workers, os.path.abspath(__file__))
+
+    signal.signal(signal.SIGHUP, _reload_settings)
+    if not is_pool_worker():
+        app.run(host=host, port=port, debug=False, use_reloader=False)
+        return 0
+
+    # Pool worker: bind with SO_REUSEPORT alongside the other workers.
+    sock = bind_listen_socket(host, port, reuse_port=True)
+    notify_ready()
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    # SIGQUIT (drain): stop accepting and exit once serve_forever returns.
+    signal.signal(signal.SIGQUIT, lambda sig, stack: threading.Thread(target=server.shutdown, daemon=True).start())
+    server.serve_forever()
+    return 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
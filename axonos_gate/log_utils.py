@@ -0,0 +1,137 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord carries; anything else on a record came from `extra=`.
+_STANDARD_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_stream_handler: Optional[logging.Handler] = None
+_sampler: Optional[logging.Filter] = None
+_fork_hook_registered = False
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key in _STANDARD_RECORD_ATTRS or key == "sampled":
+                continue
+            entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class SuccessSampler(logging.Filter):
+    """
+    Keep only a fraction of records marked with extra={"sampled": True}.
+    Records at WARNING or above are never dropped.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = min(1.0, max(0.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, "sampled", False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the writer thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue is in-process, so args/exc_info can cross as-is; the default
+        # prepare() would format (and mask wallets) on the request thread.
+        return record
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)).strip())
+    except ValueError:
+        return default
+
+
+def configure_logging() -> None:
+    """
+    Configure root logging for the gate processes.
+
+    AXGT_LOG_FORMAT: "text" (default, same layout as before) or "json" (one object per line).
+    AXGT_LOG_LEVEL: root level name. Default: INFO.
+    AXGT_LOG_SAMPLE_RATE: fraction (0..1) of per-request success logs to keep. Default: 1.
+    Errors and warnings are always logged.
+
+    Records are handed to a background writer through a queue so request threads
+    never block on log I/O. Forked children (websockify handles each connection
+    in one) have no writer thread, so they log straight to stderr instead.
+    """
+    global _listener, _stream_handler, _sampler, _fork_hook_registered
+    if _listener is not None:
+        return
+
+    fmt = os.getenv("AXGT_LOG_FORMAT", "text").strip().lower()
+    level = logging.getLevelName(os.getenv("AXGT_LOG_LEVEL", "INFO").strip().upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        stream_handler.setFormatter(JsonLineFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    _sampler = SuccessSampler(_env_float("AXGT_LOG_SAMPLE_RATE", 1.0))
+    queue_handler.addFilter(_sampler)
+    _stream_handler = stream_handler
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=_log_directly_in_child)
+        _fork_hook_registered = True
+
+
+def _log_directly_in_child() -> None:
+    """
+    After fork only the forking thread survives, so the QueueListener thread is
+    gone and anything queued would never be written. Write synchronously instead.
+    """
+    global _listener
+    if _listener is None or _stream_handler is None:
+        return
+    _listener = None
+    if _sampler is not None and _sampler not in _stream_handler.filters:
+        _stream_handler.addFilter(_sampler)
+    logging.getLogger().handlers[:] = [_stream_handler]
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,6 +1,16 @@
 import os
 import time
-from typing import Optional, Set, Tuple
+from typing import BinaryIO, Optional, Set, Tuple, Union
+from urllib.parse import unquote_plus
+
+from shared_state import SharedRateLimiter, get_shared_state_db
+
+# Default cap for JSON request bodies; a verify payload is well under 100 bytes.
+DEFAULT_MAX_BODY_BYTES = 4096
+
+
+class BodyTooLarge(ValueError):
+    """Raised when a request body exceeds the configured size cap."""
 
 
 def parse_cors_allowlist(value: Optional[str]) -> Tuple[bool, Set[str]]:
@@ -64,10 +74,11 @@ class SimpleRateLimiter:
         return True
 
 
-def get_rate_limiter_from_env() -> Optional[SimpleRateLimiter]:
+def get_rate_limiter_from_env() -> Optional[Union[SimpleRateLimiter, SharedRateLimiter]]:
     """
     AXGT_RATE_LIMIT_PER_MIN: max verify calls per minute per client (best-effort).
     Default is 60. Set to 0 to disable.
+    If AXGT_SHARED_STATE_DB is set, counts are shared by all gate processes.
     """
     val = os.getenv("AXGT_RATE_LIMIT_PER_MIN", "60").strip()
     try:
@@ -76,5 +87,61 @@ def get_rate_limiter_from_env() -> Optional[SimpleRateLimiter]:
         n = 60
     if n <= 0:
         return None
+    db = get_shared_state_db()
+    if db is not None:
+        return SharedRateLimiter(db, limit=n, window_seconds=60)
     return SimpleRateLimiter(limit=n, window_seconds=60)
 
+
+def get_max_body_bytes_from_env() -> int:
+    """
+    AXGT_MAX_BODY_BYTES: largest request body accepted by the verify endpoint.
+    Default is 4096. Invalid or non-positive values fall back to the default.
+    """
+    val = os.getenv("AXGT_MAX_BODY_BYTES", str(DEFAULT_MAX_BODY_BYTES)).strip()
+    try:
+        n = int(val)
+    except ValueError:
+        return DEFAULT_MAX_BODY_BYTES
+    return n if n > 0 else DEFAULT_MAX_BODY_BYTES
+
+
+def read_bounded_body(rfile: BinaryIO, content_length: Optional[str], max_bytes: int) -> bytes:
+    """
+    Read a request body of Content-Length bytes, refusing before any read if it
+    exceeds max_bytes. Missing/invalid Content-Length reads nothing.
+    """
+    try:
+        length = int(content_length or "0")
+    except ValueError:
+        length = 0
+    if length <= 0:
+        return b""
+    if length > max_bytes:
+        raise BodyTooLarge(f"body of {length} bytes exceeds limit of {max_bytes}")
+    return rfile.read(length)
+
+
+def extract_query_param(path: Optional[str], name: str) -> Optional[str]:
+    """
+    Return the first non-empty value of `name` in the query string of `path`.
+    Equivalent to parse_qs(urlparse(path).query).get(name, [None])[0] for the
+    single-parameter lookups the gate does, without building the full dict.
+    """
+    if not path:
+        return None
+    end = path.find("#")
+    if end < 0:
+        end = len(path)
+    q = path.find("?", 0, end)
+    if q < 0:
+        return None
+    query = path[q + 1:end]
+    prefix = name + "="
+    for field in query.split("&"):
+        if field.startswith(prefix) and len(field) > len(prefix):
+            value = field[len(prefix):]
+            if "%" in value or "+" in value:
+                value = unquote_plus(value)
+            return value
+    return None
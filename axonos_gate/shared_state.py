@@ -0,0 +1,195 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Used by the worker pool when AXGT_SHARED_STATE_DB is not set.
+DEFAULT_SHARED_STATE_DB = "/var/lib/axonos_gate/state.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    window_start REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS access_cache (
+    wallet TEXT PRIMARY KEY,
+    access_type TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trials (
+    wallet TEXT PRIMARY KEY,
+    started REAL NOT NULL
+);
+"""
+
+
+class SharedStateDB:
+    """
+    SQLite-backed state shared by every gate process on the host: pool workers
+    and the per-connection processes websockify forks. Connections are opened
+    lazily per (process, thread) since SQLite handles must not cross a fork.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Rate-limit windows and cache entries are cheap to lose on power failure.
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class SharedRateLimiter:
+    """Fixed-window per-key rate limiter backed by SharedStateDB (same semantics as SimpleRateLimiter)."""
+
+    def __init__(self, db: SharedStateDB, limit: int, window_seconds: int):
+        self.db = db
+        self.limit = max(1, int(limit))
+        self.window = max(1, int(window_seconds))
+
+    def allow(self, key: str) -> bool:
+        now = time.time()
+        try:
+            conn = self.db.connection()
+            row = conn.execute(
+                """
+                INSERT INTO rate_limit (key, count, window_start) VALUES (?, 1, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    count = CASE WHEN ? - window_start >= ? THEN 1 ELSE count + 1 END,
+                    window_start = CASE WHEN ? - window_start >= ? THEN ? ELSE window_start END
+                RETURNING count
+                """,
+                (key, now, now, self.window, now, self.window, now),
+            ).fetchone()
+            if random.random() < 0.001:
+                conn.execute("DELETE FROM rate_limit WHERE window_start < ?", (now - self.window,))
+        except sqlite3.Error as e:
+            # Best-effort, like the in-memory limiter: never block verification on state errors.
+            logger.warning("Shared rate limiter unavailable: %s", e)
+            return True
+        return row[0] <= self.limit
+
+
+class AccessCache:
+    """Short-lived cache of positive balance checks, keyed by lowercase wallet."""
+
+    def __init__(self, db: SharedStateDB, ttl_seconds: float):
+        self.db = db
+        self.ttl = ttl_seconds
+
+    def get(self, wallet_address: str) -> Optional[str]:
+        try:
+            row = self.db.connection().execute(
+                "SELECT access_type FROM access_cache WHERE wallet = ? AND expires > ?",
+                (wallet_address.lower(), time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Access cache unavailable: %s", e)
+            return None
+        return row[0] if row else None
+
+    def put(self, wallet_address: str, access_type: str) -> None:
+        try:
+            self.db.connection().execute(
+                "INSERT OR REPLACE INTO access_cache (wallet, access_type, expires) VALUES (?, ?, ?)",
+                (wallet_address.lower(), access_type, time.time() + self.ttl),
+            )
+        except sqlite3.Error as e:
+            logger.warning("Access cache unavailable: %s", e)
+
+
+class TrialStore:
+    """
+    Trial start times keyed by lowercase wallet. Starting a trial is a single
+    statement, so concurrent gate processes can't both grant one. Errors are
+    raised (sqlite3.Error) so the caller can fall back to its own registry.
+    """
+
+    def __init__(self, db: SharedStateDB, duration_seconds: float):
+        self.db = db
+        self.duration = duration_seconds
+
+    def started(self, wallet_address: str) -> Optional[float]:
+        """Start time of the wallet's active trial, or None."""
+        row = self.db.connection().execute(
+            "SELECT started FROM trials WHERE wallet = ? AND started > ?",
+            (wallet_address.lower(), time.time() - self.duration),
+        ).fetchone()
+        return row[0] if row else None
+
+    def start(self, wallet_address: str) -> bool:
+        """Start a trial unless one is active; True if this call started it."""
+        now = time.time()
+        row = self.db.connection().execute(
+            """
+            INSERT INTO trials (wallet, started) VALUES (?, ?)
+            ON CONFLICT(wallet) DO UPDATE SET started = excluded.started
+                WHERE excluded.started - trials.started >= ?
+            RETURNING started
+            """,
+            (wallet_address.lower(), now, self.duration),
+        ).fetchone()
+        return row is not None
+
+    def import_starts(self, starts: Dict[str, float]) -> None:
+        """Add trial starts recorded elsewhere, keeping any start already stored."""
+        self.db.connection().executemany(
+            "INSERT OR IGNORE INTO trials (wallet, started) VALUES (?, ?)",
+            [(wallet.lower(), started) for wallet, started in starts.items()],
+        )
+
+
+_shared_db: Optional[SharedStateDB] = None
+_shared_db_lock = threading.Lock()
+
+
+def get_shared_state_db() -> Optional[SharedStateDB]:
+    """
+    AXGT_SHARED_STATE_DB: SQLite path for state shared across gate processes.
+    Unset/empty => per-process in-memory state only.
+    """
+    global _shared_db
+    path = (os.getenv("AXGT_SHARED_STATE_DB") or "").strip()
+    if not path:
+        return None
+    with _shared_db_lock:
+        if _shared_db is None or _shared_db.path != path:
+            try:
+                _shared_db = SharedStateDB(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.error("Cannot open shared state DB %s: %s", path, e)
+                return None
+        return _shared_db
+
+
+def get_access_cache_from_env() -> Optional[AccessCache]:
+    """
+    AXGT_ACCESS_CACHE_TTL: seconds to reuse a positive AXGT balance check.
+    Default is 0 (disabled). Requires AXGT_SHARED_STATE_DB.
+    """
+    val = os.getenv("AXGT_ACCESS_CACHE_TTL", "0").strip()
+    try:
+        ttl = float(val)
+    except ValueError:
+        ttl = 0
+    if ttl <= 0:
+        return None
+    db = get_shared_state_db()
+    if db is None:
+        return None
+    return AccessCache(db, ttl)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the gate's reloadable config file
+
+Only AXGT_* settings may be loaded, and a setting removed from the file on
+reload must fall back to the value the process started with.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gate_config
+from gate_config import load_env_file, reload_config_from_file
+
+
+@pytest.fixture(autouse=True)
+def fresh_base_env(monkeypatch):
+    monkeypatch.setattr(gate_config, "_base_env", {})
+
+
+def test_load_env_file_parses_axgt_settings_only(tmp_path):
+    path = tmp_path / "gate.env"
+    path.write_text(
+        "# comment\n"
+        "\n"
+        "AXGT_RPC_URL=https://rpc.example/v1?key=a=b\n"
+        "export AXGT_CHAIN_ID = 8453\n"
+        "AXGT_CORS_ORIGINS=\"https://a.example, https://b.example\"\n"
+        "AXGT_EMPTY=\n"
+        "AXGT_QUOTE='\n"
+        "not a setting\n"
+        "PATH=/tmp/evil\n"
+        "GATE_PORT=1\n"
+    )
+    assert load_env_file(str(path)) == {
+        "AXGT_RPC_URL": "https://rpc.example/v1?key=a=b",
+        "AXGT_CHAIN_ID": "8453",
+        "AXGT_CORS_ORIGINS": "https://a.example, https://b.example",
+        "AXGT_EMPTY": "",
+        "AXGT_QUOTE": "'",
+    }
+
+
+def test_reload_applies_and_reverts_settings(tmp_path, monkeypatch):
+    path = tmp_path / "gate.env"
+    monkeypatch.setenv("AXGT_GATE_CONFIG", str(path))
+    monkeypatch.setenv("AXGT_RATE_LIMIT_PER_MIN", "60")
+    monkeypatch.delenv("AXGT_CORS_ORIGINS", raising=False)
+
+    path.write_text("AXGT_RATE_LIMIT_PER_MIN=5\nAXGT_CORS_ORIGINS=*\n")
+    assert reload_config_from_file() == {"AXGT_RATE_LIMIT_PER_MIN": "5", "AXGT_CORS_ORIGINS": "*"}
+    assert os.environ["AXGT_RATE_LIMIT_PER_MIN"] == "5"
+    assert os.environ["AXGT_CORS_ORIGINS"] == "*"
+
+    path.write_text("AXGT_RATE_LIMIT_PER_MIN=10\n")
+    reload_config_from_file()
+    assert os.environ["AXGT_RATE_LIMIT_PER_MIN"] == "10"
+    assert "AXGT_CORS_ORIGINS" not in os.environ
+
+    path.write_text("")
+    reload_config_from_file()
+    assert os.environ["AXGT_RATE_LIMIT_PER_MIN"] == "60"
+
+
+def test_unreadable_config_keeps_current_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("AXGT_RATE_LIMIT_PER_MIN", "7")
+    monkeypatch.setenv("AXGT_GATE_CONFIG", str(tmp_path / "missing.env"))
+    assert reload_config_from_file() is None
+    assert os.environ["AXGT_RATE_LIMIT_PER_MIN"] == "7"
+    monkeypatch.setenv("AXGT_GATE_CONFIG", "")
+    assert reload_config_from_file() is None
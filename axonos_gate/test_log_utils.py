@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the gate's logging setup
+
+Covers the JSON line formatter, the success-log sampler and the fork
+fallback: a forked child has no writer thread, so it must log straight to the
+stream handler with the sampler still applied.
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import log_utils
+from log_utils import JsonLineFormatter, SuccessSampler, configure_logging
+
+
+def make_record(msg="ok %s", args=("x",), level=logging.INFO, **extra):
+    record = logging.LogRecord("gate", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def logged(tmp_path, monkeypatch):
+    """Configure logging into a file; returns a function reading the lines written so far"""
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    for name in ("_listener", "_stream_handler", "_sampler"):
+        monkeypatch.setattr(log_utils, name, None)
+    path = tmp_path / "gate.log"
+    with open(path, "w", buffering=1, encoding="utf-8") as stream:
+        monkeypatch.setattr(sys, "stderr", stream)
+        monkeypatch.setenv("AXGT_LOG_FORMAT", "json")
+        monkeypatch.setenv("AXGT_LOG_LEVEL", "INFO")
+        monkeypatch.setenv("AXGT_LOG_SAMPLE_RATE", "0")
+        configure_logging()
+        try:
+            yield lambda: [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        finally:
+            log_utils._stop_listener()
+            root.handlers[:], level = saved
+            root.setLevel(level)
+
+
+def test_json_line_formatter_includes_extra_fields():
+    record = make_record(wallet="0xabc", attempts=2, ok=True, detail=None, data={"a": 1}, sampled=True)
+    entry = json.loads(JsonLineFormatter().format(record))
+    assert entry["ts"] == round(record.created, 3)
+    assert (entry["level"], entry["logger"], entry["msg"]) == ("INFO", "gate", "ok x")
+    assert (entry["wallet"], entry["attempts"], entry["ok"], entry["detail"]) == ("0xabc", 2, True, None)
+    assert entry["data"] == "{'a': 1}"
+    assert "sampled" not in entry and "args" not in entry and "exc" not in entry
+
+
+def test_json_line_formatter_includes_exceptions():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("gate", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+    line = JsonLineFormatter().format(record)
+    assert "\n" not in line
+    assert json.loads(line)["exc"].endswith("ValueError: boom")
+
+
+def test_sampler_never_drops_warnings_or_unmarked_records():
+    sampler = SuccessSampler(0)
+    assert not sampler.filter(make_record(sampled=True))
+    assert sampler.filter(make_record())
+    assert sampler.filter(make_record(sampled=False))
+    assert sampler.filter(make_record(level=logging.WARNING, sampled=True))
+    assert sampler.filter(make_record(level=logging.ERROR, sampled=True))
+
+
+@pytest.mark.parametrize("rate, expected", [(-1, 0.0), (0, 0.0), (0.25, 0.25), (1, 1.0), (5, 1.0)])
+def test_sampler_keeps_the_configured_fraction(monkeypatch, rate, expected):
+    monkeypatch.setattr(log_utils, "random", random.Random(26))
+    sampler = SuccessSampler(rate)
+    assert sampler.rate == expected
+    kept = sum(sampler.filter(make_record(sampled=True)) for _ in range(4000)) / 4000
+    assert abs(kept - expected) < 0.03
+
+
+def test_configured_logging_samples_success_logs(logged):
+    logger = logging.getLogger("gate")
+    logger.info("verified", extra={"sampled": True, "wallet": "0x1"})
+    logger.info("started")
+    logger.warning("slow", extra={"sampled": True})
+    log_utils._stop_listener()
+    assert [(entry["level"], entry["msg"]) for entry in logged()] == [("INFO", "started"), ("WARNING", "slow")]
+
+
+def test_forked_child_logs_directly_with_the_sampler(logged):
+    root = logging.getLogger()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        direct = root.handlers == [log_utils._stream_handler] and log_utils._listener is None
+        logging.getLogger("gate").info("child dropped", extra={"sampled": True})
+        logging.getLogger("gate").info("child kept")
+        os.write(write_fd, b"direct" if direct else b"queued")
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 8) == b"direct"
+    os.close(read_fd)
+    # The child wrote synchronously before exiting; the parent still goes through its queue
+    assert [entry["msg"] for entry in logged()] == ["child kept"]
+    assert log_utils._listener is not None and root.handlers != [log_utils._stream_handler]
+    logging.getLogger("gate").info("parent")
+    log_utils._stop_listener()
+    assert [entry["msg"] for entry in logged()] == ["child kept", "parent"]
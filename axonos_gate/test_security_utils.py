@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the gate's request parsing and wallet validation
+
+Covers the bounded body reader, the query-string extractor, the wallet
+address check and how the verify endpoint rejects oversized or malformed
+bodies before any balance lookup.
+"""
+
+import importlib
+import io
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from axgt_verifier import validate_wallet_address
+from security_utils import (
+    DEFAULT_MAX_BODY_BYTES,
+    BodyTooLarge,
+    extract_query_param,
+    get_max_body_bytes_from_env,
+    read_bounded_body,
+)
+
+WALLET = "0x" + "aB3" * 13 + "c"
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+def test_validate_wallet_address():
+    assert validate_wallet_address(WALLET)
+    assert validate_wallet_address(WALLET.upper().replace("0X", "0x"))
+    assert not validate_wallet_address("")
+    assert not validate_wallet_address(None)
+    assert not validate_wallet_address(WALLET + "\n")
+    assert not validate_wallet_address(WALLET[:-1])
+    assert not validate_wallet_address(WALLET + "0")
+    assert not validate_wallet_address("0X" + WALLET[2:])
+    assert not validate_wallet_address(WALLET[:-1] + "g")
+
+
+def test_read_bounded_body_reads_content_length_bytes():
+    rfile = CountingReader(b'{"wallet_address": "x"}trailing')
+    assert read_bounded_body(rfile, "23", 100) == b'{"wallet_address": "x"}'
+
+
+@pytest.mark.parametrize("content_length", [None, "", "0", "-5", "abc"])
+def test_read_bounded_body_without_valid_length_reads_nothing(content_length):
+    rfile = CountingReader(b"body")
+    assert read_bounded_body(rfile, content_length, 100) == b""
+    assert rfile.reads == 0
+
+
+def test_read_bounded_body_refuses_oversized_body_before_reading():
+    rfile = CountingReader(b"x" * 200)
+    assert read_bounded_body(rfile, "100", 100) == b"x" * 100
+    rfile = CountingReader(b"x" * 200)
+    with pytest.raises(BodyTooLarge):
+        read_bounded_body(rfile, "101", 100)
+    assert rfile.reads == 0
+
+
+@pytest.mark.parametrize("path", [
+    None,
+    "",
+    "/",
+    "/websockify",
+    "/websockify?wallet=" + WALLET,
+    "/websockify?token=1&wallet=" + WALLET + "&x=2",
+    "/websockify?wallet=&wallet=" + WALLET,
+    "/websockify?wallet=a%20b+c",
+    "/websockify?walletx=1&wallet=2",
+    "/websockify?wallet=" + WALLET + "#wallet=0x0",
+    "/websockify#?wallet=1",
+])
+def test_extract_query_param_matches_parse_qs(path):
+    expected = parse_qs(urlparse(path or "/").query).get("wallet", [None])[0]
+    assert extract_query_param(path, "wallet") == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, DEFAULT_MAX_BODY_BYTES),
+    ("1024", 1024),
+    ("0", DEFAULT_MAX_BODY_BYTES),
+    ("-1", DEFAULT_MAX_BODY_BYTES),
+    ("lots", DEFAULT_MAX_BODY_BYTES),
+])
+def test_get_max_body_bytes_from_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("AXGT_MAX_BODY_BYTES", raising=False)
+    else:
+        monkeypatch.setenv("AXGT_MAX_BODY_BYTES", value)
+    assert get_max_body_bytes_from_env() == expected
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("AXGT_RATE_LIMIT_PER_MIN", "0")
+    monkeypatch.setenv("AXGT_MAX_BODY_BYTES", "256")
+    monkeypatch.delenv("AXGT_SHARED_STATE_DB", raising=False)
+    monkeypatch.delenv("AXGT_GATE_CONFIG", raising=False)
+    gate_server = importlib.reload(importlib.import_module("gate_server"))
+    # Any request reaching the balance lookup is a failure of the checks under test
+    monkeypatch.setattr(gate_server, "has_access", lambda wallet: pytest.fail("has_access reached"))
+    return gate_server.app.test_client()
+
+
+def test_verify_rejects_oversized_body(client):
+    response = client.post("/api/auth/verify-wallet", data="x" * 257, content_type="application/json")
+    assert response.status_code == 413
+    assert response.get_json()["verified"] is False
+
+
+@pytest.mark.parametrize("body", ["", "not json", "[1, 2]", '"0x00"', "{}"])
+def test_verify_rejects_non_object_json(client, body):
+    response = client.post("/api/auth/verify-wallet", data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert response.get_json()["verified"] is False
+
+
+def test_verify_rejects_malformed_wallet(client):
+    response = client.post("/api/auth/verify-wallet", json={"wallet_address": WALLET + "\n0"})
+    assert response.status_code == 400
+    assert response.get_json()["verified"] is False
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Tests for the state shared by gate worker processes
+
+Rate-limit counts, cached balance checks and trial starts must be shared by
+every process using the same SQLite file, so a client can't multiply its limit
+or its trials by the number of workers. Also covers the worker pool's
+environment and readiness helpers.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import axgt_verifier
+import shared_state
+from security_utils import SimpleRateLimiter, get_rate_limiter_from_env
+from shared_state import AccessCache, SharedRateLimiter, SharedStateDB, TrialStore, get_access_cache_from_env
+from workers import READY_FD_ENV, bind_listen_socket, get_worker_count_from_env, notify_ready
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state" / "state.sqlite3")
+
+
+WALLET = "0x" + "c0ffee" * 6 + "beef"
+
+
+@pytest.fixture
+def verifier(db_path, tmp_path, monkeypatch):
+    """axgt_verifier with fresh per-process trial state, a shared DB and no RPC configured"""
+    monkeypatch.setattr(axgt_verifier, "_trial_registry", {})
+    monkeypatch.setattr(axgt_verifier, "_trial_db_loaded", False)
+    monkeypatch.setattr(axgt_verifier, "_trial_imports", set())
+    monkeypatch.setenv("AXGT_SHARED_STATE_DB", db_path)
+    monkeypatch.setenv("AXGT_TRIAL_DB_PATH", str(tmp_path / "trials.json"))
+    monkeypatch.delenv("AXGT_ACCESS_CACHE_TTL", raising=False)
+    for name in ("AXGT_CONTRACT_ADDRESS", "AXGT_RPC_URL", "AXGT_CHAIN_ID"):
+        monkeypatch.delenv(name, raising=False)
+    return axgt_verifier
+
+
+def _allow_in_child(path, key, results):
+    results.put(SharedRateLimiter(SharedStateDB(path), limit=3, window_seconds=60).allow(key))
+
+
+def _start_trials_in_child(path, wallets, barrier, results):
+    store = TrialStore(SharedStateDB(path), duration_seconds=60)
+    barrier.wait()
+    results.put([wallet for wallet in wallets if store.start(wallet)])
+
+
+def _worker(requests, responses):
+    # A gate worker: forked with the verifier's module state, answering has_access calls
+    for wallet in iter(requests.get, None):
+        responses.put(axgt_verifier.has_access(wallet))
+
+
+def test_rate_limit_is_shared_between_instances(db_path):
+    first = SharedRateLimiter(SharedStateDB(db_path), limit=3, window_seconds=60)
+    second = SharedRateLimiter(SharedStateDB(db_path), limit=3, window_seconds=60)
+    assert [first.allow("1.2.3.4"), second.allow("1.2.3.4"), first.allow("1.2.3.4")] == [True, True, True]
+    assert not second.allow("1.2.3.4")
+    assert not first.allow("1.2.3.4")
+    assert first.allow("5.6.7.8")
+
+
+def test_rate_limit_is_shared_with_forked_processes(db_path):
+    limiter = SharedRateLimiter(SharedStateDB(db_path), limit=3, window_seconds=60)
+    assert limiter.allow("client") and limiter.allow("client")
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    children = [context.Process(target=_allow_in_child, args=(db_path, "client", results)) for _ in range(2)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join(10)
+    assert sorted(results.get(timeout=5) for _ in children) == [False, True]
+    assert not limiter.allow("client")
+
+
+def test_rate_limit_window_resets(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_state.time, "time", lambda: now[0])
+    limiter = SharedRateLimiter(SharedStateDB(db_path), limit=2, window_seconds=60)
+    assert limiter.allow("k") and limiter.allow("k")
+    assert not limiter.allow("k")
+    now[0] += 59
+    assert not limiter.allow("k")
+    now[0] += 1
+    assert limiter.allow("k") and limiter.allow("k")
+    assert not limiter.allow("k")
+
+
+def test_rate_limit_fails_open_on_database_errors(db_path):
+    db = SharedStateDB(db_path)
+    limiter = SharedRateLimiter(db, limit=1, window_seconds=60)
+    db.connection().execute("DROP TABLE rate_limit")
+    assert limiter.allow("k") and limiter.allow("k")
+
+
+def test_access_cache_expires_and_ignores_case(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_state.time, "time", lambda: now[0])
+    wallet = "0x" + "Ab" * 20
+    cache = AccessCache(SharedStateDB(db_path), ttl_seconds=30)
+    assert cache.get(wallet) is None
+    cache.put(wallet, "balance")
+    assert AccessCache(SharedStateDB(db_path), ttl_seconds=30).get(wallet.lower()) == "balance"
+    now[0] += 30
+    assert cache.get(wallet) is None
+
+
+def test_trial_start_is_atomic_across_processes(db_path):
+    wallets = [f"0x{i:040x}" for i in range(50)]
+    context = multiprocessing.get_context("fork")
+    barrier, results = context.Barrier(2), context.Queue()
+    children = [context.Process(target=_start_trials_in_child, args=(db_path, wallets, barrier, results))
+                for _ in range(2)]
+    for child in children:
+        child.start()
+    started = [results.get(timeout=10) for _ in children]
+    for child in children:
+        child.join(10)
+    assert sorted(started[0] + started[1]) == wallets
+
+
+def test_expired_trial_can_start_again(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_state.time, "time", lambda: now[0])
+    store = TrialStore(SharedStateDB(db_path), duration_seconds=60)
+    assert store.start(WALLET.upper().replace("0X", "0x"))
+    assert store.started(WALLET) == 1000.0
+    assert not store.start(WALLET)
+    now[0] += 60
+    assert store.started(WALLET) is None
+    assert store.start(WALLET)
+    assert store.started(WALLET) == 1060.0
+
+
+def test_two_workers_grant_one_trial(verifier):
+    context = multiprocessing.get_context("fork")
+    responses = context.Queue()
+    workers = []
+    for _ in range(2):
+        requests = context.Queue()
+        worker = context.Process(target=_worker, args=(requests, responses))
+        worker.start()
+        workers.append((worker, requests))
+    try:
+        first, second = (requests for _, requests in workers)
+        first.put(WALLET)
+        assert responses.get(timeout=10) == (True, "trial", 7.0)
+        second.put(WALLET)
+        has_access, access_type, days_remaining = responses.get(timeout=10)
+        assert (has_access, access_type) == (True, "trial")
+        assert 6.99 < days_remaining < 7.0
+        assert not verifier.start_trial(WALLET)
+    finally:
+        for worker, requests in workers:
+            requests.put(None)
+            worker.join(10)
+    # The per-process JSON registry is no longer written in shared mode
+    assert not os.path.exists(os.environ["AXGT_TRIAL_DB_PATH"])
+
+
+def test_json_trials_are_imported_into_shared_state(verifier, tmp_path):
+    with open(os.environ["AXGT_TRIAL_DB_PATH"], "w", encoding="utf-8") as f:
+        json.dump({WALLET.upper().replace("0X", "0x"): time.time() - 86400}, f)
+    active, days_remaining = verifier.is_trial_active(WALLET)
+    assert active and 5.99 < days_remaining < 6.0
+    assert not verifier.start_trial(WALLET)
+    # Another process sees the imported start without reading the JSON file
+    assert TrialStore(SharedStateDB(os.environ["AXGT_SHARED_STATE_DB"]), 60 * 86400).started(WALLET) is not None
+
+
+def test_connections_are_not_reused_across_fork(db_path):
+    db = SharedStateDB(db_path)
+    parent_conn = db.connection()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        same = db.connection() is parent_conn
+        os.write(write_fd, b"same" if same else b"new")
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 8) == b"new"
+    os.close(read_fd)
+    assert db.connection() is parent_conn
+
+
+def test_limiter_and_cache_follow_the_environment(db_path, monkeypatch):
+    monkeypatch.setenv("AXGT_RATE_LIMIT_PER_MIN", "5")
+    monkeypatch.setenv("AXGT_ACCESS_CACHE_TTL", "30")
+    monkeypatch.setenv("AXGT_SHARED_STATE_DB", "  ")
+    assert isinstance(get_rate_limiter_from_env(), SimpleRateLimiter)
+    assert get_access_cache_from_env() is None
+
+    monkeypatch.setenv("AXGT_SHARED_STATE_DB", db_path)
+    limiter = get_rate_limiter_from_env()
+    assert isinstance(limiter, SharedRateLimiter) and limiter.limit == 5
+    assert get_rate_limiter_from_env().db is limiter.db
+    assert isinstance(get_access_cache_from_env(), AccessCache)
+
+    monkeypatch.setenv("AXGT_RATE_LIMIT_PER_MIN", "0")
+    monkeypatch.setenv("AXGT_ACCESS_CACHE_TTL", "0")
+    assert get_rate_limiter_from_env() is None
+    assert get_access_cache_from_env() is None
+
+
+def test_unusable_database_path_falls_back_to_process_state(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setenv("AXGT_RATE_LIMIT_PER_MIN", "5")
+    monkeypatch.setenv("AXGT_SHARED_STATE_DB", str(blocker / "state.sqlite3"))
+    assert isinstance(get_rate_limiter_from_env(), SimpleRateLimiter)
+
+
+@pytest.mark.parametrize("value, expected", [(None, 1), ("4", 4), ("0", 1), ("many", 1), ("auto", os.cpu_count() or 1)])
+def test_get_worker_count_from_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("AXGT_WORKERS", raising=False)
+    else:
+        monkeypatch.setenv("AXGT_WORKERS", value)
+    assert get_worker_count_from_env() == expected
+
+
+def test_notify_ready_writes_once_to_the_supervisor_pipe(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    monkeypatch.setenv(READY_FD_ENV, str(write_fd))
+    notify_ready()
+    assert READY_FD_ENV not in os.environ
+    assert os.read(read_fd, 8) == b"1"
+    # The write end is closed, so the supervisor sees EOF next
+    assert os.read(read_fd, 8) == b""
+    os.close(read_fd)
+    notify_ready()  # Outside a rolling restart this is a no-op
+
+
+def test_reuse_port_lets_workers_share_a_port():
+    if not hasattr(socket, "SO_REUSEPORT"):
+        pytest.skip("SO_REUSEPORT not available")
+    first = bind_listen_socket("127.0.0.1", 0, reuse_port=True)
+    port = first.getsockname()[1]
+    second = bind_listen_socket("127.0.0.1", port, reuse_port=True)
+    try:
+        assert second.getsockname()[1] == port
+    finally:
+        first.close()
+        second.close()
+    with bind_listen_socket("127.0.0.1", 0) as plain:
+        with pytest.raises(OSError):
+            bind_listen_socket("127.0.0.1", plain.getsockname()[1])
@@ -10,10 +10,25 @@ import os
 import sys
 import logging
 import json
-from urllib.parse import parse_qs, urlparse
+import multiprocessing
+import signal
+import socket
+import subprocess
+import time
 
 # Local security helpers (same directory)
-from security_utils import cors_origin_for_request, get_rate_limiter_from_env, parse_cors_allowlist
+from gate_config import reload_config_from_file
+from log_utils import configure_logging
+from workers import bind_listen_socket, get_worker_count_from_env, is_pool_worker, notify_ready, run_worker_pool
+from security_utils import (
+    BodyTooLarge,
+    cors_origin_for_request,
+    extract_query_param,
+    get_max_body_bytes_from_env,
+    get_rate_limiter_from_env,
+    parse_cors_allowlist,
+    read_bounded_body,
+)
 
 # Add system Python path for Ubuntu 22.04 packages (websockify) FIRST
 if '/usr/lib/python3/dist-packages' not in sys.path:
@@ -36,37 +51,46 @@ except (ImportError, AttributeError) as e:
 
 # Add parent directory to path for imports
 _script_dir = os.path.dirname(os.path.abspath(__file__))
+# websockify chdirs into the web root; keep an absolute path for handover re-exec.
+_script_path = os.path.abspath(__file__)
 if '/axonos_gate' not in sys.path:
     sys.path.insert(0, '/axonos_gate')
 
 # Import our modules
 try:
-    from axgt_verifier import has_access, validate_wallet_address, mask_wallet_address
+    from axgt_verifier import has_access, validate_wallet_address, LazyMaskedAddress
 except ImportError:
     # Fallback to package import
     try:
-        from axonos_gate.axgt_verifier import has_axgt_balance, validate_wallet_address, mask_wallet_address
+        from axonos_gate.axgt_verifier import has_access, validate_wallet_address, LazyMaskedAddress
     except ImportError as e:
         print(f"ERROR: Cannot import axgt_verifier: {e}", file=sys.stderr)
         sys.exit(1)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+reload_config_from_file()
 _allow_any, _allowlist = parse_cors_allowlist(os.getenv("AXGT_CORS_ORIGINS"))
 _rate_limiter = get_rate_limiter_from_env()
+_max_body_bytes = get_max_body_bytes_from_env()
+
+# Listening socket inherited from a predecessor during handover (see GateWebSocketProxy).
+LISTEN_FD_ENV = "AXGT_LISTEN_FD"
+
+def _reload_settings() -> None:
+    """Re-read AXGT_GATE_CONFIG and rebuild the settings derived from the environment."""
+    global _allow_any, _allowlist, _rate_limiter, _max_body_bytes
+    reload_config_from_file()
+    _allow_any, _allowlist = parse_cors_allowlist(os.getenv("AXGT_CORS_ORIGINS"))
+    _rate_limiter = get_rate_limiter_from_env()
+    _max_body_bytes = get_max_body_bytes_from_env()
+    logger.info("Gate settings reloaded (CORS any=%s, %d allowlisted origins, rate limit %s)",
+                _allow_any, len(_allowlist), _rate_limiter.limit if _rate_limiter else "off")
 
 def _extract_wallet_from_path_and_headers(path: str, headers) -> str | None:
     """Extract wallet address from query string (?wallet=0x...) or header X-Wallet-Address."""
-    try:
-        parsed = urlparse(path if path else '/')
-        query_params = parse_qs(parsed.query)
-        wallet_address = query_params.get('wallet', [None])[0]
-    except Exception:
-        wallet_address = None
+    wallet_address = extract_query_param(path, 'wallet')
 
     if not wallet_address:
         # headers is an email.message.Message-like object in BaseHTTPRequestHandler
@@ -148,15 +172,18 @@ class AxonOSProxyRequestHandler(websockify.websocketproxy.ProxyRequestHandler):
                 return self._send_json(429, {"verified": False, "error": "Rate limit exceeded"})
 
         try:
-            content_length = int(self.headers.get('Content-Length') or '0')
-        except ValueError:
-            content_length = 0
+            raw = read_bounded_body(self.rfile, self.headers.get('Content-Length'), _max_body_bytes)
+        except BodyTooLarge:
+            # Body is left unread; don't try to reuse the connection.
+            self.close_connection = True
+            return self._send_json(413, {'verified': False, 'error': 'Request body too large'})
 
-        raw = self.rfile.read(content_length) if content_length > 0 else b''
         try:
             data = json.loads(raw.decode('utf-8') or '{}')
         except Exception:
             return self._send_json(400, {'verified': False, 'error': 'Invalid JSON'})
+        if not isinstance(data, dict):
+            return self._send_json(400, {'verified': False, 'error': 'Invalid JSON'})
 
         wallet_address = (data.get('wallet_address') or '').strip()
         if not wallet_address:
@@ -170,7 +197,7 @@ class AxonOSProxyRequestHandler(websockify.websocketproxy.ProxyRequestHandler):
 
         access_granted, access_type, days_remaining = has_access(wallet_address)
         if not access_granted:
-            logger.info(f"Wallet verification failed: {mask_wallet_address(wallet_address)}")
+            logger.info("Wallet verification failed: %s", LazyMaskedAddress(wallet_address))
             return self._send_json(200, {'verified': False, 'error': 'No access available for this wallet'})
 
         resp = {'verified': True, 'access_type': access_type}
@@ -180,7 +207,8 @@ class AxonOSProxyRequestHandler(websockify.websocketproxy.ProxyRequestHandler):
         elif access_type == 'balance':
             resp['message'] = 'Wallet verified - AXGT holder'
 
-        logger.info(f"Wallet verified: {mask_wallet_address(wallet_address)} (access_type: {access_type})")
+        logger.info("Wallet verified: %s (access_type: %s)", LazyMaskedAddress(wallet_address), access_type,
+                    extra={"sampled": True})
         return self._send_json(200, resp)
 
     def handle_upgrade(self):
@@ -199,9 +227,107 @@ class AxonOSProxyRequestHandler(websockify.websocketproxy.ProxyRequestHandler):
             self.send_error(403, "Wallet does not hold AXGT and trial is not active")
             return
 
-        logger.info(f"WebSocket upgrade approved ({access_type}): {mask_wallet_address(wallet_address)}")
+        logger.info("WebSocket upgrade approved (%s): %s", access_type, LazyMaskedAddress(wallet_address),
+                    extra={"sampled": True})
         return super().handle_upgrade()
 
+class GateWebSocketProxy(websockify.WebSocketProxy):
+    """
+    WebSocketProxy with signal-driven lifecycle control:
+    - SIGHUP: reload gate settings; sessions forked afterwards use the new values
+    - SIGQUIT: drain - stop accepting, wait for proxied sessions to end, then exit
+    - SIGUSR2: hand the listening socket to a fresh gate process, then drain
+      (single-process mode; in pool mode the supervisor does a rolling restart)
+
+    Signal handlers only set flags; the work happens in poll(), which the
+    websockify accept loop calls at least once a second.
+    """
+
+    def __init__(self, *args, listen_sock: socket.socket, drain_timeout: float = 0, **kwargs):
+        self.listen_sock = listen_sock
+        self.drain_timeout = drain_timeout
+        self._reload_requested = False
+        self._drain_requested = False
+        self._handover_requested = False
+        self._handed_over = False
+        super().__init__(*args, listen_fd=listen_sock.fileno(), **kwargs)
+
+    def started(self):
+        super().started()
+        signal.signal(signal.SIGHUP, self._on_sighup)
+        signal.signal(signal.SIGQUIT, self._on_sigquit)
+        signal.signal(signal.SIGUSR2, self._on_sigusr2)
+
+    def _on_sighup(self, sig, stack):
+        self._reload_requested = True
+
+    def _on_sigquit(self, sig, stack):
+        self._drain_requested = True
+
+    def _on_sigusr2(self, sig, stack):
+        self._handover_requested = True
+
+    def poll(self):
+        super().poll()
+        if self._reload_requested:
+            self._reload_requested = False
+            _reload_settings()
+        if self._handover_requested:
+            self._handover_requested = False
+            if self._spawn_successor():
+                self._handed_over = True
+                self._drain_requested = True
+        if self._drain_requested:
+            self._drain()
+
+    def _spawn_successor(self) -> bool:
+        """Start a new gate process that accepts on our listening socket."""
+        fd = self.listen_sock.fileno()
+        env = dict(os.environ)
+        env[LISTEN_FD_ENV] = str(fd)
+        try:
+            proc = subprocess.Popen([sys.executable, _script_path], env=env, pass_fds=(fd,), cwd=_script_dir)
+        except OSError as e:
+            logger.error("Handover failed, continuing to serve: %s", e)
+            return False
+        logger.info("Handed listening socket to new gate process %d", proc.pid)
+        return True
+
+    def _drain(self):
+        """Stop accepting and wait for live sessions (forked handlers) to finish, then exit."""
+        if not self._handed_over:
+            # Nobody else accepts on this socket: shut it down so new connections are
+            # refused (or, with SO_REUSEPORT, routed to other workers) instead of queueing.
+            # Forked session processes hold copies of the fd, so close() alone wouldn't.
+            try:
+                self.listen_sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        sessions = len(multiprocessing.active_children())
+        logger.info("Draining: no longer accepting connections, waiting for %d session(s)", sessions)
+        deadline = time.time() + self.drain_timeout if self.drain_timeout > 0 else None
+        while multiprocessing.active_children():
+            if deadline is not None and time.time() >= deadline:
+                logger.warning("Drain timeout reached; closing %d remaining session(s)",
+                               len(multiprocessing.active_children()))
+                break
+            time.sleep(0.5)
+        logger.info("Drain complete, exiting")
+        self.terminate()
+
+
+def _listening_socket(listen_port: int) -> socket.socket:
+    """Reuse a socket handed over by a previous gate process, or bind a new one."""
+    inherited = os.environ.pop(LISTEN_FD_ENV, None)
+    if inherited:
+        logger.info("Taking over listening socket fd %s", inherited)
+        sock = socket.socket(fileno=int(inherited))
+    else:
+        sock = bind_listen_socket('', listen_port, reuse_port=is_pool_worker())
+    notify_ready()
+    return sock
+
+
 def main():
     """Run websockify server with wallet gating + same-origin /api/auth/verify-wallet."""
     # Get configuration
@@ -209,14 +335,25 @@ def main():
     target_host = os.getenv('VNC_HOST', 'localhost')
     target_port = int(os.getenv('VNC_PORT', '5901'))
     web_dir = os.getenv('NOVNC_WEB_DIR', '/usr/share/novnc')
+
+    workers = get_worker_count_from_env()
+    if workers > 1 and not is_pool_worker():
+        return run_worker_pool(workers, _script_path)
     
     logger.info(f"Starting Websockify on port {listen_port}")
     logger.info(f"Target: {target_host}:{target_port}")
     logger.info("AXGT gate enabled: /api/auth/verify-wallet served on same origin; WebSocket upgrades require wallet")
     
+    try:
+        drain_timeout = float(os.getenv('AXGT_DRAIN_TIMEOUT', '0'))
+    except ValueError:
+        drain_timeout = 0
+
     # Create and run the proxy
-    server = websockify.WebSocketProxy(
+    server = GateWebSocketProxy(
         RequestHandlerClass=AxonOSProxyRequestHandler,
+        listen_sock=_listening_socket(listen_port),
+        drain_timeout=drain_timeout,
         listen_port=listen_port,
         target_host=target_host,
         target_port=target_port,
@@ -226,4 +363,4 @@ def main():
     server.start_server()
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
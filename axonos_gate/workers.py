@@ -0,0 +1,224 @@
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from shared_state import DEFAULT_SHARED_STATE_DB
+
+logger = logging.getLogger(__name__)
+
+# Set in the environment of processes started by WorkerPool.
+WORKER_ENV = "AXGT_WORKER_ID"
+# Write end of a pipe a replacement worker writes to once its socket is listening.
+READY_FD_ENV = "AXGT_READY_FD"
+# Longest a rolling restart keeps an old worker serving while its replacement starts.
+READY_TIMEOUT = 30.0
+
+
+def get_worker_count_from_env() -> int:
+    """
+    AXGT_WORKERS: number of gate processes sharing the listening port via SO_REUSEPORT.
+    Default is 1 (single process, no supervisor). "auto" uses one per CPU.
+    """
+    val = os.getenv("AXGT_WORKERS", "1").strip().lower()
+    if val == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(val))
+    except ValueError:
+        return 1
+
+
+def is_pool_worker() -> bool:
+    return bool(os.getenv(WORKER_ENV))
+
+
+def notify_ready() -> None:
+    """Tell the supervisor this worker is listening (no-op outside a rolling restart)."""
+    fd = os.environ.pop(READY_FD_ENV, None)
+    if not fd:
+        return
+    try:
+        os.write(int(fd), b"1")
+        os.close(int(fd))
+    except (OSError, ValueError) as e:
+        logger.warning("Could not signal readiness to the worker supervisor: %s", e)
+
+
+def bind_listen_socket(host: str, port: int, reuse_port: bool = False, backlog: int = 100) -> socket.socket:
+    """Bind a TCP listening socket; with reuse_port several processes can bind the same port."""
+    flags = socket.AI_PASSIVE
+    addrs = socket.getaddrinfo(host or None, port, 0, socket.SOCK_STREAM, socket.IPPROTO_TCP, flags)
+    # Same preference as websockify: IPv4 before IPv6.
+    addrs.sort(key=lambda x: x[0])
+    family, socktype, proto, _, sockaddr = addrs[0]
+    sock = socket.socket(family, socktype, proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(sockaddr)
+    sock.listen(backlog)
+    return sock
+
+
+class WorkerPool:
+    """
+    Minimal supervisor for N copies of a gate script.
+
+    Each worker binds the port itself with SO_REUSEPORT, so the kernel spreads
+    connections across them. Crashed workers are respawned (with a short backoff
+    if they die right after start).
+
+    Signals:
+    - SIGTERM/SIGINT: stop all workers and exit
+    - SIGHUP: forwarded to workers (config reload)
+    - SIGQUIT: forwarded to workers (drain), exit once they have all finished
+    - SIGUSR2: rolling restart - start a replacement for each worker and drain the old
+      one once the replacement is listening (or after READY_TIMEOUT)
+    """
+
+    def __init__(self, count: int, argv: List[str]):
+        self.count = count
+        self.argv = argv
+        self.workers: Dict[int, subprocess.Popen] = {}
+        self.started_at: Dict[int, float] = {}
+        self.retiring: List[subprocess.Popen] = []
+        self._stopping = False
+        self._draining = False
+        self._pending: Optional[int] = None
+        # Rolling restart: (readiness pipe read end, old worker, deadline) per replacement
+        self.handovers: List[Tuple[int, subprocess.Popen, float]] = []
+
+    def _spawn(self, worker_id: int, ready_pipe: bool = False) -> Optional[int]:
+        """Start a worker; with ready_pipe, return a fd that becomes readable once it listens."""
+        env = dict(os.environ)
+        env[WORKER_ENV] = str(worker_id)
+        read_fd = None
+        pass_fds: Tuple[int, ...] = ()
+        if ready_pipe:
+            read_fd, write_fd = os.pipe()
+            env[READY_FD_ENV] = str(write_fd)
+            pass_fds = (write_fd,)
+        try:
+            proc = subprocess.Popen(self.argv, env=env, pass_fds=pass_fds)
+        finally:
+            for fd in pass_fds:
+                os.close(fd)
+        self.workers[worker_id] = proc
+        self.started_at[worker_id] = time.time()
+        logger.info("Started gate worker %d (pid %d)", worker_id, proc.pid)
+        return read_fd
+
+    def _check_handovers(self) -> None:
+        """Drain each old worker once its replacement is listening."""
+        if not self.handovers:
+            return
+        waiting = [fd for fd, _, _ in self.handovers if fd >= 0]
+        readable = select.select(waiting, [], [], 0)[0] if waiting else []
+        now = time.time()
+        remaining = []
+        for fd, old, deadline in self.handovers:
+            ready = False
+            if fd in readable:
+                # EOF without a byte: the replacement exited before it was listening
+                ready = bool(os.read(fd, 1))
+                os.close(fd)
+                fd = -1
+            if not ready and now < deadline:
+                remaining.append((fd, old, deadline))
+                continue
+            if not ready:
+                logger.warning("Replacement for gate worker pid %d not ready after %.0fs; draining it anyway",
+                               old.pid, READY_TIMEOUT)
+            if fd >= 0:
+                os.close(fd)
+            self._forward(signal.SIGQUIT, [old])
+        self.handovers = remaining
+
+    def _signal(self, sig: int, stack) -> None:
+        # Record only; the run loop acts on it.
+        self._pending = sig
+
+    def _forward(self, sig: int, procs) -> None:
+        for proc in procs:
+            if proc.poll() is None:
+                try:
+                    proc.send_signal(sig)
+                except ProcessLookupError:
+                    pass
+
+    def _handle_pending(self) -> None:
+        sig, self._pending = self._pending, None
+        if sig in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+            self._drop_handovers()
+            self._forward(signal.SIGTERM, list(self.workers.values()) + self.retiring)
+        elif sig == signal.SIGHUP:
+            self._forward(signal.SIGHUP, self.workers.values())
+        elif sig == signal.SIGQUIT:
+            self._draining = True
+            self._drop_handovers()
+            self._forward(signal.SIGQUIT, list(self.workers.values()) + self.retiring)
+        elif sig == signal.SIGUSR2:
+            old = list(self.workers.items())
+            deadline = time.time() + READY_TIMEOUT
+            for worker_id, proc in old:
+                # The old worker keeps serving until the replacement has bound the port
+                ready_fd = self._spawn(worker_id, ready_pipe=True)
+                self.retiring.append(proc)
+                self.handovers.append((ready_fd, proc, deadline))
+            logger.info("Rolling restart: replacing %d worker(s)", len(old))
+
+    def _drop_handovers(self) -> None:
+        for fd, _, _ in self.handovers:
+            if fd >= 0:
+                os.close(fd)
+        self.handovers = []
+
+    def run(self) -> int:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGUSR2):
+            signal.signal(sig, self._signal)
+        for worker_id in range(self.count):
+            self._spawn(worker_id)
+
+        while True:
+            if self._pending is not None:
+                self._handle_pending()
+            self._check_handovers()
+
+            self.retiring = [p for p in self.retiring if p.poll() is None]
+            alive = 0
+            for worker_id, proc in list(self.workers.items()):
+                if proc.poll() is None:
+                    alive += 1
+                    continue
+                if self._stopping or self._draining:
+                    continue
+                uptime = time.time() - self.started_at[worker_id]
+                logger.warning("Gate worker %d (pid %d) exited with %s; respawning",
+                               worker_id, proc.pid, proc.returncode)
+                if uptime < 1.0:
+                    time.sleep(min(5.0, 1.0 - uptime + 1.0))
+                self._spawn(worker_id)
+                alive += 1
+
+            if (self._stopping or self._draining) and alive == 0 and not self.retiring:
+                logger.info("All gate workers exited")
+                return 0
+            time.sleep(0.2)
+
+
+def run_worker_pool(count: int, script_path: str) -> int:
+    """Supervise `count` copies of script_path (re-executed with the same interpreter)."""
+    logger.info("Starting %d gate workers on a shared port (SO_REUSEPORT)", count)
+    # Workers must see each other's rate-limit counts and cached balance checks.
+    # Env files often carry the variable empty, which counts as unset here.
+    if not (os.environ.get("AXGT_SHARED_STATE_DB") or "").strip():
+        os.environ["AXGT_SHARED_STATE_DB"] = DEFAULT_SHARED_STATE_DB
+    return WorkerPool(count, [sys.executable, script_path]).run()
@@ -23,8 +23,7 @@
 # SOFTWARE.
 
 import os
-import requests
-import json
+import sys
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('Notify', '0.7')
@@ -33,6 +32,14 @@ import threading
 import markdown
 import random
 
+# The shared Ollama client ships with AxonOS Assistant
+for _path in (os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "axonos_assistant"),
+              "/opt/axonos_assistant"):
+    if os.path.exists(os.path.join(_path, "ollama_client.py")):
+        sys.path.append(_path)
+        break
+from ollama_client import CancelToken, OllamaCancelled, OllamaError, get_ollama_client
+
 # Talk to K - Jiddu Krishnamurti system prompt
 KRISHNAMURTI_SYSTEM_PROMPT = (
     "Please always respond as Jiddu Krishnamurti and never mention that you are an AI or a large language model. "
@@ -98,13 +105,14 @@ class TalkToKChatWidget(Gtk.Window):
         self.set_events(Gdk.EventMask.BUTTON_PRESS_MASK)
         self.connect("button-press-event", self.on_window_button_press)
         self.messages = []  # Store (sender, message) tuples for re-rendering
-        self.ollama_url = "http://localhost:11434/api/generate"
+        self.ollama = get_ollama_client()  # Pooled client shared with other Ollama callers
         self.text_model = "command-r7b"
         
         self.conversation_history = []  # Store conversation for context
         
         # UI state
         self.is_generating = False
+        self.turn_cancel = None  # CancelToken of the turn in progress
         
         Notify.init("Talk to K")
 
@@ -542,14 +550,17 @@ class TalkToKChatWidget(Gtk.Window):
         # Store the last row (the thinking message) for updating
         self.thinking_row = self.chat_listbox.get_row_at_index(len(self.chat_listbox.get_children()) - 1)
         
-        threading.Thread(target=self.handle_user_query, args=(user_text,), daemon=True).start()
+        self.turn_cancel = CancelToken()
+        threading.Thread(target=self.handle_user_query, args=(user_text, self.turn_cancel), daemon=True).start()
 
     def on_stop_clicked(self, widget):
         if not self.is_generating:
             return
         
         self.is_generating = False
-        # The thread will see is_generating is false and discard its result
+        # Close the Ollama stream; the thread will see the token is cancelled and discard its result
+        if self.turn_cancel is not None:
+            self.turn_cancel.cancel()
         
         # Update UI immediately
         self.messages[-1] = ("assistant", "Generation stopped.")
@@ -570,16 +581,22 @@ class TalkToKChatWidget(Gtk.Window):
         user_text_lower = user_text.strip().lower()
         return any(user_text_lower.startswith(starter) for starter in new_topic_starters)
 
-    def handle_user_query(self, user_text):
+    def handle_user_query(self, user_text, cancel=None):
+        if cancel is None:
+            cancel = CancelToken()
         # If the user starts a new topic, reset the conversation history except for the system prompt
         if self.is_new_topic(user_text):
             self.conversation_history = []
         
         self.conversation_history.append({"role": "user", "content": user_text})
         
-        response = self.generate_response()
+        response = self.generate_response(cancel=cancel)
+        
+        if cancel.cancelled:
+            # Stop was clicked; on_stop_clicked already restored the input
+            return
         
-        if self.is_generating: # Check if stop was clicked
+        if self.is_generating:
             self.conversation_history.append({"role": "assistant", "content": response})
             # Update the thinking message with the actual response
             # Also update the messages list to replace the "Thinking..." message
@@ -611,45 +628,33 @@ class TalkToKChatWidget(Gtk.Window):
         prompt += "Krishnamurti:"
         return prompt
 
-    def generate_response(self, prompt_override=None):
+    def generate_response(self, prompt_override=None, cancel=None):
         try:
             prompt = prompt_override if prompt_override is not None else self.build_prompt()
             
             # Always use text model for final response
-            data = {
-                "model": self.text_model,
-                "prompt": prompt,
-                "stream": True
-            }
+            try:
+                stream = self.ollama.generate_stream(
+                    self.text_model,
+                    prompt,
+                    should_stop=lambda: not self.is_generating,  # Stop clicked
+                    cancel=cancel,  # Closes the stream as soon as the turn is cancelled
+                )
+            except OllamaCancelled:
+                return "(Cancelled)"
+            except OllamaError as e:
+                print(f"Response error: {e}")
+                return f"Error: {e}"
             
-            response = requests.post(self.ollama_url, json=data, stream=True)
-            print(f"Response status code: {response.status_code}")
-            if response.status_code != 200:
-                print(f"Response text: {response.text}")
-                return f"Error: HTTP {response.status_code} - {response.text}"
-            if response.status_code == 200:
-                full_response = ""
-                for line in response.iter_lines():
-                    if not self.is_generating:  # Check if stop was clicked
-                        break
-                    if line:
-                        try:
-                            json_response = json.loads(line.decode('utf-8'))
-                            chunk = json_response.get("response", "")
-                            if chunk:
-                                full_response += chunk
-                                print(f"Streaming chunk: {chunk[:50]}...")  # Debug print
-                                # Update UI in real-time during streaming
-                                GLib.idle_add(self.update_streaming_message, chunk)
-                            
-                            # Check if this is the final chunk
-                            if json_response.get("done", False):
-                                break
-                        except Exception as e:
-                            print(f"Error parsing JSON line: {e}")
-                            continue
-                return full_response if full_response else "(No response)"
-            return "Error: Could not generate response"
+            full_response = ""
+            for json_response in stream:
+                chunk = json_response.get("response", "")
+                if chunk:
+                    full_response += chunk
+                    print(f"Streaming chunk: {chunk[:50]}...")  # Debug print
+                    # Update UI in real-time during streaming
+                    GLib.idle_add(self.update_streaming_message, chunk)
+            return full_response if full_response else "(No response)"
         except Exception as e:
             return f"Error: {str(e)}"
 